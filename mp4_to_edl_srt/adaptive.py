@@ -0,0 +1,179 @@
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from audio_pipe import SAMPLE_RATE
+from long_file import _shift_segment
+from resegment import join_words
+
+
+class AdaptiveOptions(NamedTuple):
+    """Limits that send a greedily decoded segment to the beam-search pass."""
+    min_avg_logprob: float = -0.7  # 平均対数確率がこれより低いセグメントを再デコードする
+    max_compression_ratio: float = 2.4  # 圧縮率がこれより高い（繰り返しが多い）セグメントを再デコードする
+    max_no_speech_prob: float = 0.6  # 無音確率がこれより高いのに文字が出ているセグメントを再デコードする
+    padding: float = 1.0  # 再デコードする区間の前後に付ける音声（秒、文脈用で結果には使わない）
+    merge_gap: float = 2.0  # 再デコードする区間の間がこれより短ければ1つにまとめる（秒）
+
+
+class EscalationWindow(NamedTuple):
+    """A stretch of audio decoded again with beam search."""
+    start: float  # 再デコードする音声の開始（秒、余白を含む）
+    end: float  # 終了
+    keep_from: float  # 再デコード結果から採用する範囲の開始（置き換える1回目のセグメントの範囲）
+    keep_until: float  # 終了
+    first: int  # 置き換える1回目のセグメントのインデックス範囲 [first, stop)
+    stop: int
+
+
+def greedy_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns backend parameters for greedy decoding (no beam search, no best-of sampling)."""
+    if params["backend"] == "whisper":
+        return {**params, "beam_size": None, "best_of": None, "patience": None}
+    return {**params, "beam_size": 1}
+
+
+def needs_escalation(segment: Dict[str, Any], options: AdaptiveOptions) -> bool:
+    """Returns True if a first-pass segment crosses one of the confidence limits."""
+    if not segment.get("text", "").strip():
+        return False
+    return (
+        segment.get("avg_logprob", 0.0) < options.min_avg_logprob
+        or segment.get("compression_ratio", 0.0) > options.max_compression_ratio
+        or segment.get("no_speech_prob", 0.0) > options.max_no_speech_prob
+    )
+
+
+def plan_escalation(segments: List[Dict[str, Any]], options: AdaptiveOptions,
+                    total_seconds: float) -> List[EscalationWindow]:
+    """
+    Groups the low-confidence segments of the first pass into windows to decode again.
+
+    近い（merge_gap 未満）低信頼セグメントは間のセグメントごと1つの区間にまとめ、
+    前後に padding 秒の音声を付けて再デコードします。余白部分の結果は採用しないため、
+    隣の1回目のセグメントと重複しません。
+
+    Args:
+        segments: First-pass segments in time order.
+        options: Escalation limits.
+        total_seconds: Length of the recording.
+
+    Returns:
+        The windows in time order.
+    """
+    flagged = [i for i, segment in enumerate(segments) if needs_escalation(segment, options)]
+    runs: List[List[int]] = []
+    for i in flagged:
+        if runs and segments[i]["start"] - segments[runs[-1][1]]["end"] < options.merge_gap:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+
+    windows: List[EscalationWindow] = []
+    for first, last in runs:
+        keep_from = segments[first]["start"]
+        keep_until = max(segment["end"] for segment in segments[first:last + 1])
+        windows.append(EscalationWindow(
+            max(0.0, keep_from - options.padding),
+            min(total_seconds, keep_until + options.padding),
+            keep_from, keep_until, first, last + 1,
+        ))
+    return windows
+
+
+def _kept_segments(segments: List[Dict[str, Any]], window: EscalationWindow,
+                   language: str) -> List[Dict[str, Any]]:
+    """Returns the re-decoded segments inside the window's keep range (timestamps already shifted)."""
+    kept = []
+    for segment in segments:
+        words = segment.get("words") or []
+        if words:
+            inside = [w for w in words if window.keep_from <= (w["start"] + w["end"]) / 2 < window.keep_until]
+            if not inside:
+                continue
+            if len(inside) < len(words):
+                segment = {**segment, "words": inside, "text": join_words(inside, language),
+                           "start": inside[0]["start"], "end": inside[-1]["end"]}
+        elif not window.keep_from <= (segment["start"] + segment["end"]) / 2 < window.keep_until:
+            continue
+        kept.append(segment)
+    return kept
+
+
+def splice_segments(segments: List[Dict[str, Any]], windows: List[EscalationWindow],
+                    window_segments: List[List[Dict[str, Any]]], language: str) -> List[Dict[str, Any]]:
+    """
+    Replaces the first-pass segments of each window with its beam-search segments.
+
+    Args:
+        segments: First-pass segments in time order.
+        windows: Windows from plan_escalation.
+        window_segments: Segments of each window with window-relative timestamps.
+        language: Transcription language (used to rebuild the text of trimmed segments).
+
+    Returns:
+        The spliced segments in time order.
+    """
+    spliced: List[Dict[str, Any]] = []
+    position = 0
+    for window, redecoded in zip(windows, window_segments):
+        spliced.extend(segments[position:window.first])
+        shifted = [_shift_segment(segment, window.start) for segment in redecoded]
+        spliced.extend(_kept_segments(shifted, window, language))
+        position = window.stop
+    spliced.extend(segments[position:])
+    return spliced
+
+
+def transcribe_adaptive(audio: Any, params: Dict[str, Any],
+                        first_pass: Callable[[Any, Dict[str, Any]], Dict[str, Any]],
+                        transcribe_fn: Callable[[Any, Dict[str, Any]], Dict[str, Any]],
+                        load_audio: Callable[[], np.ndarray], options: AdaptiveOptions,
+                        total_seconds: float, sample_rate: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """
+    Decodes greedily, then decodes only the low-confidence windows again with beam search.
+
+    Args:
+        audio: Audio passed to the first pass (a file path or samples).
+        params: Backend parameters of the full (beam-search) decode.
+        first_pass: Function (audio, params) -> result used for the greedy pass (may chunk the audio).
+        transcribe_fn: Function (samples, params) -> result used for each window.
+        load_audio: Returns the recording as mono float32 samples (called only if a window is found).
+        options: Escalation limits.
+        total_seconds: Length of the recording (0: up to the end of the last segment).
+        sample_rate: Sample rate of the samples.
+
+    Returns:
+        The transcription result, with an "adaptive" entry reporting the escalated audio.
+    """
+    result = first_pass(audio, greedy_params(params))
+    segments = result["segments"]
+    language = result.get("language") or params["language"]
+    if not total_seconds:
+        total_seconds = max((segment["end"] for segment in segments), default=0.0)
+    windows = plan_escalation(segments, options, total_seconds)
+
+    if windows:
+        samples = audio if isinstance(audio, np.ndarray) else load_audio()
+        window_segments = [
+            transcribe_fn(samples[int(w.start * sample_rate):int(w.end * sample_rate)], params)["segments"]
+            for w in windows
+        ]
+        segments = splice_segments(segments, windows, window_segments, language)
+
+    escalated = sum(w.keep_until - w.keep_from for w in windows)
+    decoded = sum(w.end - w.start for w in windows)
+    fraction = escalated / total_seconds if total_seconds > 0 else 0.0
+    print(f"2段階デコード: {len(windows)}区間 ({escalated:.1f}秒 / {total_seconds:.1f}秒, "
+          f"{fraction * 100:.1f}%) をビームサーチで再デコードしました")
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language,
+        "adaptive": {
+            "windows": len(windows),
+            "escalated_seconds": escalated,
+            "decoded_seconds": decoded,
+            "total_seconds": total_seconds,
+        },
+    }
@@ -0,0 +1,495 @@
+import importlib.util
+import os
+import re
+import time
+import wave
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
+
+from audio_pipe import SAMPLE_RATE, load_pcm
+from model_registry import get_model_registry
+from resegment import join_words
+
+# torch / whisper / faster_whisper はインポートだけで数秒かかるため、最初の文字起こしで初めて
+# インポートする。CLI・GUI・ワーカープロセスの起動を遅くせず、使わないエンジンは読み込まない
+
+
+@lru_cache(maxsize=None)
+def faster_whisper_available() -> bool:
+    """Returns True if faster-whisper is installed (checked without importing it)."""
+    # faster-whisperのサポート（インストールされていない場合は標準のwhisperを使う）
+    if importlib.util.find_spec("faster_whisper") is not None:
+        print("faster-whisperライブラリが利用可能です。高速モードが使用できます。")
+        return True
+    print("faster-whisperライブラリが見つかりません。標準モードで実行します。")
+    print("高速モードを使用するには次のコマンドを実行してください: pip install faster-whisper")
+    return False
+
+
+@lru_cache(maxsize=None)
+def batched_inference_available() -> bool:
+    """Returns True if faster-whisper has the batched inference pipeline (1.1 or later), without importing it."""
+    if not faster_whisper_available():
+        return False
+    import importlib.metadata
+    try:
+        version = importlib.metadata.version("faster-whisper")
+    except importlib.metadata.PackageNotFoundError:
+        # パッケージ情報がない場合は、文字起こしの実行時に確認する
+        return True
+    major, minor = (int(part) for part in (re.findall(r"\d+", version) + ["0", "0"])[:2])
+    return (major, minor) >= (1, 1)
+
+
+def _segment_to_dict(segment: Any) -> Dict[str, Any]:
+    """Converts a faster-whisper or whisper segment to a JSON-serializable dictionary."""
+    if isinstance(segment, dict):
+        get = segment.get
+        raw_words = segment.get("words") or []
+    else:
+        get = lambda name, default=None: getattr(segment, name, default)
+        raw_words = getattr(segment, "words", None) or []
+
+    words = []
+    for word in raw_words:
+        word_get = word.get if isinstance(word, dict) else (lambda name, w=word: getattr(w, name, None))
+        words.append({
+            "word": word_get("word"),
+            "start": float(word_get("start")),
+            "end": float(word_get("end")),
+            "probability": float(word_get("probability") or 0.0),
+        })
+
+    return {
+        "start": float(get("start", 0.0)),
+        "end": float(get("end", 0.0)),
+        "text": get("text", ""),
+        "words": words,
+        "avg_logprob": float(get("avg_logprob", 0.0) or 0.0),
+        "compression_ratio": float(get("compression_ratio", 0.0) or 0.0),
+        "no_speech_prob": float(get("no_speech_prob", 0.0) or 0.0),
+    }
+
+
+class ASRBackend:
+    """
+    Interface of an ASR engine: audio in, segments with word timestamps out.
+
+    audio_input は音声ファイルのパスか16kHzのfloat32サンプル、params は MP4File が作る
+    パラメータ（params["backend"] がバックエンド名）です。セグメントは _segment_to_dict と
+    同じ形の辞書（start, end, text, words, avg_logprob, compression_ratio, no_speech_prob）です。
+    サブクラスは segments と transcribe の少なくとも一方を実装します。
+    インスタンスは状態を持たないため、ワーカープロセスでも同じ名前で取得して使えます。
+    """
+    name = ""
+    streaming = False  # segments() がデコードしながらセグメントを返す
+    parallel_chunks = True  # 長時間ファイルのチャンクを複数のワーカープロセスで文字起こしできる
+
+    def available(self) -> bool:
+        """Returns True if the engine can be used in this environment."""
+        return True
+
+    def segments(self, audio_input: Any, params: Dict[str, Any]) -> Tuple[Iterator[Dict[str, Any]], str]:
+        """
+        Starts a transcription and returns its segments.
+
+        Returns:
+            A tuple of an iterator of segment dictionaries (in time order) and the detected language.
+        """
+        result = self.transcribe(audio_input, params)
+        return iter(result["segments"]), result["language"]
+
+    def transcribe(self, audio_input: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Transcribes the whole audio.
+
+        Returns:
+            The transcription result (text, segments with words, language).
+        """
+        segments, language = self.segments(audio_input, params)
+        # segmentsはジェネレータで一度しか消費できないため、単語のタイムスタンプを含めて
+        # 辞書のリストに展開して保存する（セグメント化はsegment_audioで行う）
+        result_segments = list(segments)
+        return {
+            "text": " ".join([segment["text"] for segment in result_segments]),
+            "segments": result_segments,
+            "language": language
+        }
+
+
+class FasterWhisperBackend(ASRBackend):
+    """faster-whisper (CTranslate2) on the CPU, sequential or batched."""
+    name = "faster-whisper"
+    streaming = True
+
+    def available(self) -> bool:
+        return faster_whisper_available()
+
+    def segments(self, audio_input: Any, params: Dict[str, Any]) -> Tuple[Iterator[Dict[str, Any]], str]:
+        """
+        Starts a faster-whisper transcription and returns its segments lazily.
+
+        model.transcribe は言語判定だけを行って戻り、セグメントはジェネレータを
+        消費したときに30秒ずつデコードされます。ジェネレータは一度しか消費できません。
+
+        Args:
+            audio_input: Path to an audio file or 16 kHz float32 samples.
+            params: Parameters from MP4File._faster_whisper_params.
+
+        Returns:
+            A tuple of an iterator of segment dictionaries (in time order) and the detected language.
+        """
+        # モデルの取得からデコードの終了まで、モデルを使用中として登録する（その間はアイドル解放されない）
+        key = ("faster-whisper", params["model"], params["device"], params["compute_type"])
+        pin = ExitStack()
+        pin.enter_context(get_model_registry().in_use(*key))
+        try:
+            segments, language = self._start(audio_input, params)
+        except BaseException:
+            pin.close()
+            raise
+        return _InUseSegments(segments, pin), language
+
+    def _start(self, audio_input: Any, params: Dict[str, Any]) -> Tuple[Iterator[Any], str]:
+        """Loads the model (if needed) and starts the transcription, returning faster-whisper's raw segments."""
+        import faster_whisper
+
+        # 高速なwhisperモデルを使用 - 常にCPUで実行
+        # モデルはプロセス内で一度だけロードし、ファイル間で再利用する
+        model = get_model_registry().get(
+            "faster-whisper",
+            params["model"],
+            params["device"],
+            params["compute_type"],
+            lambda: faster_whisper.WhisperModel(
+                model_size_or_path=params["model"], 
+                device=params["device"],
+                compute_type=params["compute_type"]
+            ),
+        )
+
+        print(f"モデル情報: {params['model']} ({params['device']}, {params['compute_type']})")
+        batched = params.get("batched")
+        if batched and not hasattr(faster_whisper, "BatchedInferencePipeline"):
+            print("このfaster-whisperにはバッチ推論パイプラインがありません（1.1以降が必要）。逐次デコードで実行します")
+            batched = None
+        if batched:
+            # 音声区間検出で切り出したチャンクをまとめて1回の順伝播でデコードする
+            # （チャンクは独立にデコードされるため condition_on_previous_text は使われない）
+            print(f"バッチ推論パイプラインで文字起こしします (バッチサイズ: {batched['batch_size']})")
+            segments, info = faster_whisper.BatchedInferencePipeline(model=model).transcribe(
+                audio_input,
+                batch_size=batched["batch_size"],
+                language=params["language"],
+                task="transcribe",
+                initial_prompt=params["initial_prompt"],
+                temperature=params["temperature"],
+                beam_size=params["beam_size"],
+                word_timestamps=params["word_timestamps"],
+                vad_filter=params["vad_filter"],
+                vad_parameters=params["vad_parameters"]
+            )
+        else:
+            # faster-whisperのTranscribeオプション
+            segments, info = model.transcribe(
+                audio_input,
+                language=params["language"],
+                task="transcribe",
+                initial_prompt=params["initial_prompt"],
+                condition_on_previous_text=params["condition_on_previous_text"],
+                temperature=params["temperature"],
+                beam_size=params["beam_size"],
+                word_timestamps=params["word_timestamps"],
+                vad_filter=params["vad_filter"],
+                vad_parameters=params["vad_parameters"]
+            )
+
+        print(f"検出された言語: {info.language} (確度: {info.language_probability:.2f})")
+        return segments, info.language
+
+
+class _InUseSegments:
+    """
+    Lazily decoded faster-whisper segments that keep the model in use until decoding ends.
+
+    ジェネレータと違い、一度も消費されずに破棄された場合も使用中の登録を解除します。
+    """
+
+    def __init__(self, segments: Iterator[Any], pin: ExitStack):
+        self._segments = segments
+        self._pin = pin
+
+    def __iter__(self) -> "_InUseSegments":
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        try:
+            return _segment_to_dict(next(self._segments))
+        except BaseException:
+            # 終了（StopIteration）またはデコードのエラー
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Stops decoding and releases the model."""
+        self._pin.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper (PyTorch), choosing the model by available GPU memory."""
+    name = "whisper"
+    # GPUを使うため、チャンクはこのプロセスで順番に処理する
+    parallel_chunks = False
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("whisper") is not None
+
+    def transcribe(self, audio_input: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Transcribes audio with openai-whisper, choosing the model by available GPU memory.
+
+        Args:
+            audio_input: Path to an audio file or 16 kHz float32 samples.
+            params: Parameters from MP4File._whisper_params.
+
+        Returns:
+            The transcription result (text, segments with words, language).
+        """
+        import torch
+        import whisper
+
+        # 勾配計算を無効化
+        torch.set_grad_enabled(False)
+
+        # CUDA初期化前の設定
+        if torch.cuda.is_available():
+            # GPUキャッシュをクリア
+            torch.cuda.empty_cache()
+            # メモリの断片化を防ぐ
+            torch.cuda.memory.set_per_process_memory_fraction(0.8)  # GPUメモリの80%まで使用に制限
+            # CUDAストリームを同期
+            torch.cuda.synchronize()
+
+            # CUBLASワークスペースを制限
+            os.environ['CUBLAS_WORKSPACE_CONFIG'] = ':4096:8'
+
+            # 利用可能なGPUメモリをチェック
+            total_memory = torch.cuda.get_device_properties(0).total_memory
+            available_memory = total_memory - torch.cuda.memory_allocated(0)
+            print(f"利用可能なGPUメモリ: {available_memory / 1024**3:.2f} GB")
+
+        # ロードしたモデルを、取得から文字起こしの終了まで使用中として登録する
+        pin = ExitStack()
+
+        # モデルロードの関数を定義
+        def load_model_safely(model_name, device):
+            nonlocal pin
+            candidate = ExitStack()
+            candidate.enter_context(get_model_registry().in_use("whisper", model_name, device, "float32"))
+            try:
+                # 古いバージョンのWhisperでは一部のパラメータがサポートされていないため削除
+                model = get_model_registry().get(
+                    "whisper",
+                    model_name,
+                    device,
+                    "float32",
+                    lambda: whisper.load_model(
+                        model_name,
+                        device=device,
+                        download_root=os.path.join(os.path.expanduser("~"), ".cache", "whisper")
+                    ),
+                )
+                pin = candidate
+                return model
+            except Exception as e:
+                candidate.close()
+                print(f"モデルロード中のエラー: {str(e)}")
+                return None
+        # モデルサイズの要件（より現実的な見積もり）
+        model_memory_requirements = {
+            "large-v3": 10 * 1024**3,    # 10GB
+            "large-v2": 10 * 1024**3,    # 10GB  
+            "medium": 5 * 1024**3,       # 5GB
+            "small": 2 * 1024**3         # 2GB
+        }
+
+        # 指定されたモデルから順に（GPUメモリが足りなければより小さいモデルを）試す
+        candidates = list(model_memory_requirements)
+        if params["model"] in model_memory_requirements:
+            candidates = candidates[candidates.index(params["model"]):]
+
+        # モデル選択
+        model = None
+
+        # ロード済みのモデルがあれば再利用（ロード済みモデルでGPUメモリが減っていても別モデルを選ばない）
+        loaded_whisper_models = {
+            key[1]: key[2] for key in get_model_registry().loaded_models() if key[0] == "whisper"
+        }
+        for model_name in candidates:
+            if model_name in loaded_whisper_models:
+                model = load_model_safely(model_name, loaded_whisper_models[model_name])
+                break
+
+        if model is None and torch.cuda.is_available():
+            # 利用可能なメモリに基づいてモデルを選択
+            for model_name in candidates:
+                required_memory = model_memory_requirements[model_name]
+                if available_memory >= required_memory * 1.2:  # 20%のバッファを追加
+                    print(f"選択したモデル: {model_name} (必要メモリ: {required_memory / 1024**3:.1f}GB)")
+                    model = load_model_safely(model_name, "cuda")
+                    if model is not None:
+                        print(f"{model_name}モデルのロードに成功しました")
+                        break
+                    else:
+                        torch.cuda.empty_cache()
+                        torch.cuda.synchronize()
+
+        # どのモデルもロードできなかった場合、CPUでsmallモデルを使用
+        if model is None:
+            print("警告: GPUモデルのロードに失敗したため、CPUでsmallモデルを使用します")
+            model = load_model_safely("small", "cpu")
+            if model is None:
+                raise Exception("すべてのモデルのロードに失敗しました")
+            print("smallモデルをCPUにロードしました")
+        # 文字起こしを実行
+        transcribe_options = {
+            "language": params["language"],
+            "task": "transcribe",
+            "temperature": params["temperature"],  # 決定的な出力
+            "beam_size": params["beam_size"],
+            "best_of": params["best_of"],  # 複数候補から最良を選択
+            "patience": params["patience"],
+            "initial_prompt": params["initial_prompt"],
+            "condition_on_previous_text": params["condition_on_previous_text"],
+            "verbose": True,
+            "fp16": False,  # 精度を優先
+            "suppress_tokens": [-1],  # 特殊トークンを抑制
+            "word_timestamps": params["word_timestamps"]  # 単語レベルのタイムスタンプ
+        }
+
+        # 文字起こしを実行
+        with pin:
+            result = model.transcribe(audio_input, **transcribe_options)
+
+        return {
+            "text": result.get("text", ""),
+            "segments": [_segment_to_dict(segment) for segment in result.get("segments", [])],
+            "language": result.get("language", params["language"]),
+        }
+
+
+# 合成セグメントに使う単語（内容に意味はなく、文字数と単語数の分布を実際の字幕に近づけるためのもの）
+_FAKE_WORDS = ("今日", "は", "よろしく", "お願い", "します", "それ", "では", "始め", "ましょう",
+               "この", "映像", "の", "編集", "について", "説明", "です", "ね", "はい")
+
+
+def _audio_seconds(audio_input: Any) -> float:
+    """Returns the length of a sample array or an audio file in seconds."""
+    if isinstance(audio_input, (str, os.PathLike)):
+        try:
+            # WAVはヘッダーだけを読む
+            with wave.open(os.fspath(audio_input), "rb") as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, EOFError):
+            audio_input = load_pcm(os.fspath(audio_input), filters=None)
+    return len(audio_input) / SAMPLE_RATE
+
+
+class FakeBackend(ASRBackend):
+    """
+    Emits deterministic synthetic segments without a model, for benchmarking the rest of the pipeline.
+
+    音声の内容は見ずに、長さだけから segment_seconds ごとのセグメント（1秒あたり3単語）を
+    作ります。同じ長さの音声には常に同じ結果を返します。speed を指定すると、音声の
+    speed 倍の速さ（0: 待たない）でデコードしているかのように、セグメントを順に返します。
+    """
+    name = "fake"
+    streaming = True
+
+    def segments(self, audio_input: Any, params: Dict[str, Any]) -> Tuple[Iterator[Dict[str, Any]], str]:
+        """
+        Returns the synthetic segments of the audio.
+
+        Args:
+            audio_input: Path to an audio file or 16 kHz float32 samples.
+            params: Parameters from MP4File._fake_params.
+
+        Returns:
+            A tuple of an iterator of segment dictionaries (in time order) and the language in params.
+        """
+        total = _audio_seconds(audio_input)
+        speed = f"{params['speed']}倍速" if params["speed"] else "待機なし"
+        print(f"フェイクバックエンド: {total:.1f}秒の音声から合成セグメントを生成します (速度: {speed})")
+        return self._generate(total, params), params["language"]
+
+    def _generate(self, total: float, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        segment_seconds = params["segment_seconds"]
+        speed = params["speed"]
+        started = time.perf_counter()
+        index = 0
+        start = 0.0
+        while start < total:
+            # 各セグメントの最後の1割は無音（セグメントの間の間）とする
+            end = min(start + segment_seconds * 0.9, total)
+            n_words = max(1, int((end - start) * 3))
+            step = (end - start) / n_words
+            words: List[Dict[str, Any]] = [{
+                "word": _FAKE_WORDS[(index * 7 + i) % len(_FAKE_WORDS)],
+                "start": start + i * step,
+                "end": start + (i + 1) * step,
+                "probability": 0.9,
+            } for i in range(n_words)]
+            if speed:
+                # 実際のデコードと同じように、音声のこの位置までデコードし終えた時刻に返す
+                time.sleep(max(0.0, started + end / speed - time.perf_counter()))
+            yield {
+                "start": start,
+                "end": end,
+                "text": join_words(words, params["language"]),
+                "words": words,
+                "avg_logprob": -0.2,
+                "compression_ratio": 1.2,
+                "no_speech_prob": 0.05,
+            }
+            index += 1
+            start += segment_seconds
+
+
+# 名前で選べるバックエンド（"auto" は faster-whisper があればそれを、なければ whisper を使う）
+BACKENDS: Dict[str, ASRBackend] = {
+    backend.name: backend for backend in (FasterWhisperBackend(), WhisperBackend(), FakeBackend())
+}
+
+
+def get_backend(name: str) -> ASRBackend:
+    """Returns the backend registered under the name (ValueError if unknown)."""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"不明なASRバックエンドです: {name} (選択肢: {', '.join(BACKENDS)})") from None
+
+
+def resolve_backend(name: str) -> str:
+    """Returns the backend "auto" stands for in this environment, or the name unchanged."""
+    if name == "auto":
+        return "faster-whisper" if faster_whisper_available() else "whisper"
+    get_backend(name)
+    return name
+
+
+def faster_whisper_segments(audio_input: Any, params: Dict[str, Any]) -> Tuple[Iterator[Dict[str, Any]], str]:
+    """Starts a faster-whisper transcription and returns its segments lazily (see FasterWhisperBackend)."""
+    return BACKENDS["faster-whisper"].segments(audio_input, params)
+
+
+def run_asr(audio_input: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Transcribes audio with the backend named in params["backend"].
+
+    モジュールレベルの関数なので、ワーカープロセスにも渡せます。
+    """
+    return get_backend(params["backend"]).transcribe(audio_input, params)
@@ -0,0 +1,134 @@
+import subprocess
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+# Whisperの入力形式（16kHz モノラル float32）
+SAMPLE_RATE = 16000
+# extract_audioと同じ音量調整とフィルタリング
+AUDIO_FILTERS = "volume=1.5,highpass=f=80,lowpass=f=8000"
+# パイプから一度に読み込む長さ（秒）
+DEFAULT_CHUNK_SECONDS = 30.0
+
+_BYTES_PER_SAMPLE = 4  # float32
+
+
+def ffmpeg_pcm_command(filepath: str, sample_rate: int = SAMPLE_RATE,
+                       filters: Optional[str] = AUDIO_FILTERS) -> List[str]:
+    """Returns the FFmpeg command that writes mono float32 PCM of filepath to stdout."""
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-v", "error",
+        "-i", filepath,
+        "-vn",  # 動画ストリームを無視
+        "-ac", "1",  # モノラル
+        "-ar", str(sample_rate),  # Whisperのサンプリングレートで直接出力（再サンプリング不要）
+    ]
+    if filters:
+        command += ["-af", filters]
+    command += ["-f", "f32le", "-acodec", "pcm_f32le", "pipe:1"]
+    return command
+
+
+def _finish(process: subprocess.Popen, command: List[str], completed: bool) -> None:
+    """Waits for FFmpeg and raises CalledProcessError if it failed."""
+    process.stdout.close()
+    if not completed:
+        # 読み込みが途中で中断された場合はFFmpegを停止する
+        process.kill()
+        process.wait()
+        process.stderr.close()
+        return
+    stderr = process.stderr.read().decode("utf-8", errors="replace")
+    process.stderr.close()
+    returncode = process.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+
+
+def load_pcm(filepath: str, duration: Optional[float] = None, sample_rate: int = SAMPLE_RATE,
+             chunk_seconds: float = DEFAULT_CHUNK_SECONDS, filters: Optional[str] = AUDIO_FILTERS) -> np.ndarray:
+    """
+    Decodes the audio of a media file into a float32 NumPy array via an FFmpeg pipe.
+
+    パイプの出力を一定サイズずつ、あらかじめ確保したバッファに直接読み込むため、
+    一時ファイルを作らず、デコード結果のバイト列を二重に保持することもありません。
+
+    Args:
+        filepath: Path to the media file.
+        duration: Expected duration in seconds, used to size the buffer up front.
+        sample_rate: Output sample rate.
+        chunk_seconds: Amount of audio read from the pipe per read call.
+        filters: FFmpeg audio filters (None for already filtered audio).
+
+    Returns:
+        Mono float32 samples at sample_rate.
+    """
+    command = ffmpeg_pcm_command(filepath, sample_rate, filters)
+    chunk_bytes = int(chunk_seconds * sample_rate) * _BYTES_PER_SAMPLE
+    capacity = int(((duration or chunk_seconds) + 1.0) * sample_rate)
+    buffer = np.empty(capacity, dtype=np.float32)
+    filled = 0  # バイト数
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    completed = False
+    try:
+        while True:
+            if filled + chunk_bytes > buffer.nbytes:
+                # 想定より長い場合はバッファを拡張
+                grown = np.empty(max(buffer.size * 2, (filled + chunk_bytes) // _BYTES_PER_SAMPLE + 1),
+                                 dtype=np.float32)
+                grown.view(np.uint8)[:filled] = buffer.view(np.uint8)[:filled]
+                buffer = grown
+            raw = memoryview(buffer.view(np.uint8))
+            read = process.stdout.readinto(raw[filled:filled + chunk_bytes])
+            if not read:
+                break
+            filled += read
+        completed = True
+    finally:
+        _finish(process, command, completed)
+
+    samples = buffer[:filled // _BYTES_PER_SAMPLE]
+    # 確保しすぎた場合は余分な領域を解放
+    if buffer.size - samples.size > 10 * sample_rate:
+        samples = samples.copy()
+    return samples
+
+
+def iter_pcm_chunks(filepath: str, sample_rate: int = SAMPLE_RATE,
+                    chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+                    filters: Optional[str] = AUDIO_FILTERS) -> Iterator[np.ndarray]:
+    """
+    Yields the audio of a media file as bounded float32 chunks.
+
+    非常に長いファイルでも、メモリ使用量はチャンク1つ分に抑えられます。
+
+    Args:
+        filepath: Path to the media file.
+        sample_rate: Output sample rate.
+        chunk_seconds: Length of each chunk in seconds (the last chunk may be shorter).
+        filters: FFmpeg audio filters (None for already filtered audio).
+    """
+    command = ffmpeg_pcm_command(filepath, sample_rate, filters)
+    chunk_bytes = int(chunk_seconds * sample_rate) * _BYTES_PER_SAMPLE
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    completed = False
+    try:
+        pending = b""
+        while True:
+            data = process.stdout.read(chunk_bytes - len(pending))
+            if not data:
+                break
+            pending += data
+            if len(pending) == chunk_bytes:
+                yield np.frombuffer(pending, dtype=np.float32)
+                pending = b""
+        usable = len(pending) - len(pending) % _BYTES_PER_SAMPLE
+        if usable:
+            yield np.frombuffer(pending[:usable], dtype=np.float32)
+        completed = True
+    finally:
+        _finish(process, command, completed)
@@ -0,0 +1,412 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from fractions import Fraction
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from mp4_box import AudioStream
+from mp4_file import MP4File
+from preflight import FileProbe
+from transcription_cache import file_identity
+
+# 既定のカタログ（全プロジェクト共通のSQLiteデータベース）
+DEFAULT_CATALOG_PATH = os.environ.get(
+    "MP4_TO_EDL_SRT_CATALOG",
+    os.path.join(os.path.expanduser("~"), ".cache", "mp4_to_edl_srt", "catalog.sqlite3")
+)
+
+# スキーマのバージョン（PRAGMA user_version に記録する）
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,          -- 絶対パス
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,      -- 内容全体のSHA-256（コピーやtouchでも同じ内容と分かる）
+    -- 事前チェック（メタデータ）
+    duration REAL,
+    timecode TEXT,
+    frame_rate TEXT,                -- タイムコードのフレームレート（"30000/1001" など）
+    creation_time TEXT,
+    audio_codec TEXT,
+    sample_rate INTEGER,
+    channels INTEGER,
+    probe_error TEXT,               -- 除外した理由（NULL: 処理できる）
+    probed_at REAL,
+    -- 文字起こしと出力
+    timecode_offset TEXT,
+    backend TEXT,
+    model TEXT,
+    params TEXT,                    -- 文字起こしのパラメータ（JSON）
+    segment_count INTEGER,
+    processing_seconds REAL,        -- 最後に文字起こしした時の処理時間
+    processed_at REAL,
+    edl_path TEXT,
+    srt_path TEXT
+);
+CREATE INDEX IF NOT EXISTS files_duration ON files (duration);
+CREATE INDEX IF NOT EXISTS files_model_duration ON files (model, duration);
+CREATE INDEX IF NOT EXISTS files_processed_at ON files (processed_at);
+-- 最後の文字起こし結果（内容が変わっていないファイルはパラメータが同じなら文字起こしを省略する）
+CREATE TABLE IF NOT EXISTS transcripts (
+    path TEXT PRIMARY KEY,          -- files.path
+    params TEXT NOT NULL,           -- 文字起こしのパラメータ（JSON）
+    result TEXT NOT NULL            -- 文字起こし結果（JSON。セグメントと単語のタイムスタンプ）
+);
+"""
+
+# ファイルの内容が変わった場合に消す（古くなる）列
+_CONTENT_COLUMNS = (
+    "duration", "timecode", "frame_rate", "creation_time", "audio_codec", "sample_rate", "channels", "probe_error",
+    "probed_at", "timecode_offset", "backend", "model", "params", "segment_count", "processing_seconds",
+    "processed_at", "edl_path", "srt_path",
+)
+
+
+def file_fingerprint(path: str) -> str:
+    """Hashes the whole content of a file (only computed for new files and changed modification times)."""
+    return file_identity(path, content_hash=True)["sha256"]
+
+
+class Catalog:
+    """
+    SQLite catalog of every source file the tool has seen.
+
+    ファイルごとにパス・サイズ・更新時刻・指紋、事前チェックの結果（長さ、タイムコード、音声）、
+    文字起こしのパラメータと結果、セグメント数、処理時間、出力先を記録します。
+    内容が変わっていないファイルは事前チェックで再び調べず、同じパラメータなら文字起こしも省略します。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Opens (and creates if needed) the catalog.
+
+        Args:
+            path: SQLite database file (default: DEFAULT_CATALOG_PATH).
+        """
+        self.path: str = os.path.normpath(path or DEFAULT_CATALOG_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 複数の実行が同じカタログを使ってもよいよう、ロックを待ってから書き込む
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if 0 < version < 2:
+                # バージョン1はフレームレートを記録していないため、次の事前チェックで調べ直す
+                self.connection.execute("ALTER TABLE files ADD COLUMN frame_rate TEXT")
+                self.connection.execute("UPDATE files SET probed_at = NULL")
+            # バージョン2までの指紋は先頭・末尾だけのハッシュ。更新時刻が変わった時に内容全体のハッシュと
+            # 一致しないため、変わったファイルとして調べ直す（文字起こし結果はバージョン3から記録する）
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _sync_identity(self, path: str) -> bool:
+        """
+        Updates the recorded identity of a file.
+
+        サイズと更新時刻が同じなら変わっていないとみなします。更新時刻だけが変わった場合は
+        指紋を比べ、内容が変わっていれば古い情報を消します。
+
+        Returns:
+            True if the file is unchanged since it was last recorded.
+        """
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, fingerprint FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row["size"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        fingerprint = file_fingerprint(path)
+        if row is None:
+            self.connection.execute(
+                "INSERT INTO files (path, size, mtime_ns, fingerprint) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, fingerprint),
+            )
+            return False
+        unchanged = row["fingerprint"] == fingerprint
+        stale = "" if unchanged else ", " + ", ".join(f"{column} = NULL" for column in _CONTENT_COLUMNS)
+        self.connection.execute(
+            f"UPDATE files SET size = ?, mtime_ns = ?, fingerprint = ?{stale} WHERE path = ?",
+            (stat.st_size, stat.st_mtime_ns, fingerprint, path),
+        )
+        if not unchanged:
+            self.connection.execute("DELETE FROM transcripts WHERE path = ?", (path,))
+        return unchanged
+
+    def known_probes(self, paths: Iterable[str]) -> Dict[str, FileProbe]:
+        """
+        Returns the recorded pre-flight results of the files that have not changed.
+
+        除外したファイルは（FFprobeがなかったなど一時的な理由もあるため）毎回調べ直します。
+
+        Args:
+            paths: Input files.
+
+        Returns:
+            A dictionary from each given path to its recorded probe (file_index is 0).
+        """
+        known = {}
+        with self.connection:
+            for path in paths:
+                absolute_path = os.path.abspath(path)
+                try:
+                    if not self._sync_identity(absolute_path):
+                        continue
+                except OSError:
+                    continue
+                row = self.connection.execute(
+                    "SELECT * FROM files WHERE path = ? AND probed_at IS NOT NULL AND probe_error IS NULL",
+                    (absolute_path,)
+                ).fetchone()
+                if row is not None:
+                    audio = (AudioStream(row["audio_codec"], row["sample_rate"], row["channels"])
+                             if row["audio_codec"] is not None else None)
+                    frame_rate = Fraction(row["frame_rate"]) if row["frame_rate"] else None
+                    known[path] = FileProbe(path, 0, row["duration"], audio, row["timecode"],
+                                            row["creation_time"], None, frame_rate)
+        return known
+
+    def known_transcriptions(self, paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the recorded transcription results of the files that have not changed.
+
+        MP4File は記録したパラメータが今回のパラメータと同じ場合だけ結果を使います。
+
+        Args:
+            paths: Input files.
+
+        Returns:
+            A dictionary from each given path to {"params": ..., "result": ...}.
+        """
+        known = {}
+        with self.connection:
+            for path in paths:
+                absolute_path = os.path.abspath(path)
+                try:
+                    if not self._sync_identity(absolute_path):
+                        continue
+                except OSError:
+                    continue
+                row = self.connection.execute(
+                    "SELECT params, result FROM transcripts WHERE path = ?", (absolute_path,)
+                ).fetchone()
+                if row is not None:
+                    known[path] = {"params": json.loads(row["params"]), "result": json.loads(row["result"])}
+        return known
+
+    def record_probes(self, probes: Iterable[FileProbe]) -> None:
+        """Records pre-flight results."""
+        now = time.time()
+        with self.connection:
+            for probe in probes:
+                path = os.path.abspath(probe.path)
+                try:
+                    self._sync_identity(path)
+                except OSError:
+                    continue
+                audio = probe.audio or AudioStream(None, None, None)
+                self.connection.execute(
+                    "UPDATE files SET duration = ?, timecode = ?, frame_rate = ?, creation_time = ?, "
+                    "audio_codec = ?, sample_rate = ?, channels = ?, probe_error = ?, probed_at = ? WHERE path = ?",
+                    (probe.duration, probe.timecode, str(probe.frame_rate) if probe.frame_rate else None,
+                     probe.creation_time, audio.codec, audio.sample_rate, audio.channels, probe.error, now, path),
+                )
+
+    def record_file(self, mp4_file: MP4File, output_folder: str) -> None:
+        """
+        Records a processed file: its metadata, transcription parameters and result,
+        segment count, processing time and output files.
+
+        Args:
+            mp4_file: A file returned by the processing steps.
+            output_folder: Folder holding the project's output.edl and output.srt.
+        """
+        path = os.path.abspath(mp4_file.filepath)
+        params = mp4_file.transcription_params
+        output_folder = os.path.abspath(output_folder)
+        with self.connection:
+            try:
+                self._sync_identity(path)
+            except OSError:
+                return
+            self.connection.execute(
+                "UPDATE files SET duration = COALESCE(?, duration), "
+                "creation_time = COALESCE(?, creation_time), timecode_offset = ?, "
+                "backend = COALESCE(?, backend), model = COALESCE(?, model), params = COALESCE(?, params), "
+                "segment_count = ?, processing_seconds = COALESCE(?, processing_seconds), "
+                "processed_at = ?, edl_path = ?, srt_path = ? WHERE path = ?",
+                (mp4_file.duration, mp4_file.creation_time,
+                 mp4_file.timecode_offset.to_cmx() if mp4_file.timecode_offset else None,
+                 params.get("backend"), params.get("model"),
+                 json.dumps(params, sort_keys=True, ensure_ascii=False) if params else None,
+                 len(mp4_file.segments), mp4_file.processing_seconds, time.time(),
+                 os.path.join(output_folder, "output.edl"), os.path.join(output_folder, "output.srt"), path),
+            )
+            if params and mp4_file.transcription_result:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO transcripts (path, params, result) VALUES (?, ?, ?)",
+                    (path, json.dumps(params, sort_keys=True, ensure_ascii=False),
+                     json.dumps(mp4_file.transcription_result, ensure_ascii=False)),
+                )
+
+    def query(self, min_duration: Optional[float] = None, max_duration: Optional[float] = None,
+              model: Optional[str] = None, not_model: Optional[str] = None,
+              untranscribed: bool = False, rejected: bool = False, folder: Optional[str] = None,
+              limit: Optional[int] = None) -> List[sqlite3.Row]:
+        """
+        Returns the recorded files matching all of the given conditions, longest first.
+
+        Args:
+            min_duration: Files at least this many seconds long.
+            max_duration: Files at most this many seconds long.
+            model: Files transcribed with this model.
+            not_model: Files not transcribed with this model (including untranscribed files).
+            untranscribed: Files that have never been transcribed.
+            rejected: Files rejected by the pre-flight check.
+            folder: Files in this folder or its subfolders.
+            limit: Maximum number of rows.
+
+        Returns:
+            The matching rows of the files table.
+        """
+        conditions: List[str] = []
+        values: List[Any] = []
+        if min_duration is not None:
+            conditions.append("duration >= ?")
+            values.append(min_duration)
+        if max_duration is not None:
+            conditions.append("duration <= ?")
+            values.append(max_duration)
+        if model is not None:
+            conditions.append("model = ?")
+            values.append(model)
+        if not_model is not None:
+            conditions.append("(model IS NULL OR model != ?)")
+            values.append(not_model)
+        if untranscribed:
+            conditions.append("model IS NULL")
+        if rejected:
+            conditions.append("probe_error IS NOT NULL")
+        if folder is not None:
+            # 主キーのインデックスを使う範囲検索
+            prefix = os.path.join(os.path.abspath(folder), "")
+            conditions.append("path >= ? AND path < ?")
+            values.extend([prefix, prefix + "\U0010ffff"])
+        sql = "SELECT * FROM files"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY duration DESC, path"
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(limit)
+        return self.connection.execute(sql, values).fetchall()
+
+    def get(self, path: str) -> Optional[sqlite3.Row]:
+        """Returns the record of a file, or None if it is not in the catalog."""
+        return self.connection.execute(
+            "SELECT * FROM files WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of files, transcribed and rejected files and the total duration."""
+        row = self.connection.execute(
+            "SELECT COUNT(*) AS files, COUNT(model) AS transcribed, COUNT(probe_error) AS rejected, "
+            "COALESCE(SUM(duration), 0) AS total_seconds FROM files"
+        ).fetchone()
+        return dict(row)
+
+    def models(self) -> List[Tuple[str, int]]:
+        """Returns (model, number of files) for every model files were transcribed with."""
+        return [tuple(row) for row in self.connection.execute(
+            "SELECT model, COUNT(*) FROM files WHERE model IS NOT NULL GROUP BY model ORDER BY COUNT(*) DESC"
+        )]
+
+    def prune_missing(self) -> int:
+        """Removes the records of files that no longer exist and returns how many were removed."""
+        missing = [row["path"] for row in self.connection.execute("SELECT path FROM files")
+                   if not os.path.exists(row["path"])]
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in missing])
+            self.connection.executemany("DELETE FROM transcripts WHERE path = ?", [(path,) for path in missing])
+        return len(missing)
+
+
+def _format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+
+
+def catalog_main(argv: Optional[List[str]] = None) -> None:
+    """Command line interface to query the media catalog."""
+    parser = argparse.ArgumentParser(prog="main.py catalog", description="Media catalog queries")
+    parser.add_argument("--catalog", default=None, help=f"Catalog database (default: {DEFAULT_CATALOG_PATH})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show the number of files, the total duration and the models used")
+    list_parser = subparsers.add_parser("list", help="List files matching all of the given conditions, longest first")
+    list_parser.add_argument("--min-duration", type=float, default=None, help="At least this many seconds long")
+    list_parser.add_argument("--max-duration", type=float, default=None, help="At most this many seconds long")
+    list_parser.add_argument("--model", default=None, help="Transcribed with this model")
+    list_parser.add_argument("--not-model", default=None,
+                             help="Not transcribed with this model (including untranscribed files)")
+    list_parser.add_argument("--untranscribed", action="store_true", help="Never transcribed")
+    list_parser.add_argument("--rejected", action="store_true", help="Rejected by the pre-flight check")
+    list_parser.add_argument("--folder", default=None, help="In this folder or its subfolders")
+    list_parser.add_argument("--limit", type=int, default=None, help="Maximum number of files")
+    list_parser.add_argument("--json", action="store_true", help="Print the records as JSON lines")
+    show_parser = subparsers.add_parser("show", help="Show everything recorded about a file")
+    show_parser.add_argument("path", help="Source file")
+    subparsers.add_parser("prune", help="Remove the records of files that no longer exist")
+
+    args = parser.parse_args(argv)
+    with Catalog(args.catalog) as catalog:
+        if args.command == "stats":
+            stats = catalog.stats()
+            print(f"カタログ: {catalog.path}")
+            print(f"ファイル数: {stats['files']} (文字起こし済み {stats['transcribed']}, 除外 {stats['rejected']})")
+            print(f"音声の合計: {_format_duration(stats['total_seconds'])}")
+            for model, count in catalog.models():
+                print(f" - {model}: {count}ファイル")
+        elif args.command == "list":
+            rows = catalog.query(args.min_duration, args.max_duration, args.model, args.not_model,
+                                 args.untranscribed, args.rejected, args.folder, args.limit)
+            for row in rows:
+                if args.json:
+                    print(json.dumps(dict(row), ensure_ascii=False))
+                else:
+                    print(f"{_format_duration(row['duration']):>9s}  {row['model'] or '-':16s}  "
+                          f"{row['segment_count'] if row['segment_count'] is not None else '-':>5}  "
+                          f"{row['path']}" + (f"  ({row['probe_error']})" if row["probe_error"] else ""))
+            if not args.json:
+                print(f"{len(rows)}個のファイル")
+        elif args.command == "show":
+            row = catalog.get(args.path)
+            if row is None:
+                sys.exit(f"カタログにありません: {args.path}")
+            for key in row.keys():
+                print(f"{key}: {row[key]}")
+        elif args.command == "prune":
+            # 字幕の検索インデックスも同じデータベースにある
+            from search import SearchIndex
+            print(f"{catalog.prune_missing()}個のファイルの記録を削除しました")
+            with SearchIndex(catalog.path) as index:
+                print(f"{index.remove_missing()}個のファイルの字幕を検索インデックスから削除しました")
+
+
+if __name__ == "__main__":
+    catalog_main(sys.argv[1:])
@@ -0,0 +1,138 @@
+from bisect import bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from audio_pipe import SAMPLE_RATE
+from resegment import join_words
+
+
+class ClipSpan(NamedTuple):
+    """Where a clip's audio lies in a batch buffer."""
+    start: float  # バッファ内の開始時刻（秒）
+    duration: float  # クリップの長さ（秒）
+
+
+def plan_batches(durations: Sequence[Optional[float]], max_clip_seconds: float,
+                 max_batch_seconds: float) -> List[List[int]]:
+    """
+    Groups consecutive short files into batches transcribed in one ASR pass.
+
+    max_clip_seconds 以下のファイルが続く間、合計が max_batch_seconds を超えない範囲で
+    1つのバッチにまとめます。長いファイルと長さが不明なファイルは単独のグループになります。
+
+    Args:
+        durations: Duration of each file in processing order (None if unknown).
+        max_clip_seconds: Files at most this long are batched.
+        max_batch_seconds: Maximum total audio of one batch.
+
+    Returns:
+        Groups of file indices in order; groups with a single index are processed alone.
+    """
+    groups: List[List[int]] = []
+    batch: List[int] = []
+    batch_seconds = 0.0
+    for index, duration in enumerate(durations):
+        if duration is None or duration > max_clip_seconds:
+            if batch:
+                groups.append(batch)
+                batch, batch_seconds = [], 0.0
+            groups.append([index])
+            continue
+        if batch and batch_seconds + duration > max_batch_seconds:
+            groups.append(batch)
+            batch, batch_seconds = [], 0.0
+        batch.append(index)
+        batch_seconds += duration
+    if batch:
+        groups.append(batch)
+    return groups
+
+
+def concatenate_clips(clips: Sequence[np.ndarray], gap_seconds: float,
+                      sample_rate: int = SAMPLE_RATE) -> Tuple[np.ndarray, List[ClipSpan]]:
+    """
+    Joins the audio of several clips with silence between them.
+
+    Args:
+        clips: Mono float32 samples of each clip.
+        gap_seconds: Silence inserted between neighbouring clips.
+        sample_rate: Sample rate of the samples.
+
+    Returns:
+        A tuple of the batch buffer and the offset table (one ClipSpan per clip).
+    """
+    gap = int(gap_seconds * sample_rate)
+    total = sum(len(clip) for clip in clips) + gap * max(0, len(clips) - 1)
+    buffer = np.zeros(total, dtype=np.float32)
+    spans: List[ClipSpan] = []
+    position = 0
+    for clip in clips:
+        buffer[position:position + len(clip)] = clip
+        spans.append(ClipSpan(position / sample_rate, len(clip) / sample_rate))
+        position += len(clip) + gap
+    return buffer, spans
+
+
+def _clip_index(starts: List[float], seconds: float) -> int:
+    # 区切りの無音にかかる時刻は直前のクリップに含める
+    return max(0, bisect_right(starts, seconds) - 1)
+
+
+def _local_segment(segment: Dict[str, Any], words: List[Dict[str, Any]], span: ClipSpan,
+                   language: str) -> Dict[str, Any]:
+    """Returns a segment (or a part of it) with timestamps relative to its clip."""
+    def local(seconds: float) -> float:
+        return min(max(seconds - span.start, 0.0), span.duration)
+
+    result = dict(segment)
+    if words:
+        result["words"] = [{**word, "start": local(word["start"]), "end": local(word["end"])} for word in words]
+        result["start"] = result["words"][0]["start"]
+        result["end"] = result["words"][-1]["end"]
+        if len(words) != len(segment.get("words") or []):
+            # クリップの境界で分けたセグメントは、単語からテキストを作り直す
+            result["text"] = join_words(words, language)
+    else:
+        result["words"] = []
+        result["start"] = local(segment["start"])
+        result["end"] = local(segment["end"])
+    return result
+
+
+def split_segments(segments: Sequence[Dict[str, Any]], spans: Sequence[ClipSpan],
+                   language: str = "ja") -> List[List[Dict[str, Any]]]:
+    """
+    Distributes the segments of a batch transcription back to the clips.
+
+    単語のタイムスタンプがある場合は単語ごとに（単語の中央の時刻で）クリップを決め、
+    クリップの境界をまたぐセグメントは分割します。単語がない場合はセグメントの中央の時刻で決めます。
+    時刻は各クリップの先頭からの秒数に変換し、クリップの範囲に収めます。
+
+    Args:
+        segments: Segments of the batch buffer in time order.
+        spans: Offset table from concatenate_clips.
+        language: Transcription language (used to rebuild the text of split segments).
+
+    Returns:
+        The segments of each clip, with clip-relative timestamps.
+    """
+    starts = [span.start for span in spans]
+    per_clip: List[List[Dict[str, Any]]] = [[] for _ in spans]
+    for segment in segments:
+        words = segment.get("words") or []
+        if not words:
+            index = _clip_index(starts, (segment["start"] + segment["end"]) / 2)
+            per_clip[index].append(_local_segment(segment, [], spans[index], language))
+            continue
+        # 同じクリップに属する連続した単語ごとに分ける
+        group: List[Dict[str, Any]] = []
+        group_index = _clip_index(starts, (words[0]["start"] + words[0]["end"]) / 2)
+        for word in words:
+            index = _clip_index(starts, (word["start"] + word["end"]) / 2)
+            if index != group_index:
+                per_clip[group_index].append(_local_segment(segment, group, spans[group_index], language))
+                group, group_index = [], index
+            group.append(word)
+        per_clip[group_index].append(_local_segment(segment, group, spans[group_index], language))
+    return per_clip
@@ -0,0 +1,278 @@
+import copy
+import json
+import os
+from typing import Any, Dict, NamedTuple, Optional
+
+# faster-whisperで使用するモデルと統一された初期プロンプト
+FASTER_WHISPER_MODEL = "deepdml/faster-whisper-large-v3-turbo-ct2"
+DEFAULT_INITIAL_PROMPT = "これは日本語の会話音声です。正確な文字起こしをお願いします。"
+
+# 文字起こしモード: "sequential" は30秒ずつ順にデコード、"batched" は音声区間をまとめてバッチでデコード
+TRANSCRIPTION_MODES = ("sequential", "batched")
+DEFAULT_BATCH_SIZE = 16
+
+# ASRバックエンド: "auto" は faster-whisper があればそれを、なければ標準のwhisperを使う。
+# "fake" はモデルを使わずに合成セグメントを返す（ASR以外の処理のベンチマーク用）
+ASR_BACKENDS = ("auto", "faster-whisper", "whisper", "fake")
+
+# 性能プリセット: 精度と処理速度のバランスを決める設定の組み合わせ。
+# 設定ファイルの値より優先され、コマンドラインで個別に指定した値がさらに優先される。
+# どのプリセットも同じ項目を指定するため、プリセットを切り替えると結果が一意に決まる
+PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    # 速度優先: 貪欲法でバッチ推論し、無音を事前に除いて2ファイルずつ並列に処理する
+    "fast": {
+        "whisper": {
+            "faster_whisper_model": FASTER_WHISPER_MODEL,
+            "compute_type": "int8",
+            "beam_size": 1,
+            "best_of": 1,
+            "mode": "batched",
+            "batch_size": DEFAULT_BATCH_SIZE,
+        },
+        "processing": {"workers": 2, "chunk_workers": 4, "vad": True, "adaptive": False},
+    },
+    # 従来の既定値: large-v3-turbo (int8) をビームサーチで逐次デコード
+    "balanced": {
+        "whisper": {
+            "faster_whisper_model": FASTER_WHISPER_MODEL,
+            "compute_type": "int8",
+            "beam_size": 5,
+            "best_of": 5,
+            "mode": "sequential",
+            "batch_size": DEFAULT_BATCH_SIZE,
+        },
+        "processing": {"workers": 1, "chunk_workers": 2, "vad": False, "adaptive": False},
+    },
+    # 精度優先: 量子化しないlarge-v3をビームサーチで逐次デコード
+    "accurate": {
+        "whisper": {
+            "faster_whisper_model": "large-v3",
+            "compute_type": "float32",
+            "beam_size": 5,
+            "best_of": 5,
+            "mode": "sequential",
+            "batch_size": DEFAULT_BATCH_SIZE,
+        },
+        "processing": {"workers": 1, "chunk_workers": 2, "vad": False, "adaptive": False},
+    },
+}
+
+
+class TranscriptionConfig(NamedTuple):
+    """Resolved settings of one conversion job (see ConfigManager.resolve)."""
+    preset: str = ""  # 適用したプリセット（"": なし）
+    backend: str = "auto"  # ASR_BACKENDS のいずれか
+    # faster-whisper
+    model: str = FASTER_WHISPER_MODEL
+    device: str = "cpu"
+    compute_type: str = "int8"
+    # 標準のwhisper（faster-whisperがない場合）: このモデルから、GPUメモリが足りなければより小さいモデルを使う
+    whisper_model: str = "large-v3"
+    # デコード
+    language: str = "ja"
+    initial_prompt: str = DEFAULT_INITIAL_PROMPT
+    temperature: float = 0.0
+    beam_size: int = 5
+    best_of: int = 5
+    patience: float = 1.0
+    condition_on_previous_text: bool = True
+    word_timestamps: bool = True
+    vad_filter: bool = True  # faster-whisper内蔵の音声区間検出
+    vad_min_silence_ms: int = 500
+    mode: str = "sequential"
+    batch_size: int = DEFAULT_BATCH_SIZE
+    # 音声・セグメント化
+    preprocessing: bool = False  # WAVファイルの前処理（ノイズ除去など）
+    min_segment_length: float = 0.2  # これより短いセグメントは除く（秒）
+    # 処理
+    workers: int = 1
+    chunk_workers: int = 2
+    vad: bool = False  # エネルギーによる音声区間検出の事前処理
+    adaptive: bool = False  # 2段階デコード
+    # フェイクバックエンド
+    fake_speed: float = 0.0  # 音声の何倍速でセグメントを返すか（0: 待たない）
+    fake_segment_seconds: float = 4.0  # 合成セグメントの間隔（秒）
+
+
+class ConfigManager:
+    """アプリケーション設定を管理するクラス"""
+
+    DEFAULT_CONFIG = {
+        "whisper": {
+            "backend": "auto",  # "faster-whisper" / "whisper" / "fake"（"auto": faster-whisperがあれば使用）
+            "model": "large-v3",  # 最高精度のlarge-v3モデルを使用（標準のwhisper）
+            "faster_whisper_model": FASTER_WHISPER_MODEL,
+            "device": "cpu",  # faster-whisperは常にCPUで実行
+            "compute_type": "int8",  # int8量子化で効率的に実行
+            "language": "ja",
+            "initial_prompt": DEFAULT_INITIAL_PROMPT,
+            "temperature": 0.0,  # 決定的な出力のため0に設定
+            "beam_size": 5,
+            "condition_on_previous": True,
+            "word_timestamps": True,
+            "best_of": 5,  # 複数候補から最良を選択
+            "patience": 1.0,  # ビーム探索の忍耐度
+            "vad_filter": True,  # faster-whisperの音声区間検出フィルタ
+            "vad_min_silence_ms": 500,
+            "mode": "sequential",  # "batched": faster-whisperのバッチ推論パイプラインを使用
+            "batch_size": DEFAULT_BATCH_SIZE,
+            "fake_speed": 0.0,  # フェイクバックエンドの速度（音声の何倍速か、0: 待たない）
+            "fake_segment_seconds": 4.0
+        },
+        "audio": {
+            "sample_rate": 44100,
+            "channels": 2,
+            "format": "wav",
+            "preprocessing": False  # 音声前処理（process_folderでは常に無効にしていた）
+        },
+        "segmentation": {
+            "threshold": 0.5,
+            "min_segment_length": 0.2,
+            "max_segment_length": 30.0,
+            "merge_threshold": 0.3
+        },
+        "processing": {
+            "preset": "",  # "fast" / "balanced" / "accurate"（"": プリセットを使わない）
+            "workers": 1,
+            "chunk_workers": 2,
+            "vad": False,
+            "adaptive": False
+        },
+        "edl": {
+            "title": "MP4 to EDL Project",
+            "fcm": "NON-DROP FRAME",
+            "use_timecode_offset": True
+        },
+        "paths": {
+            "last_input_folder": "",
+            "last_output_folder": ""
+        },
+        "gui": {
+            "theme": "default",
+            "font_size": 10,
+            "window_width": 800,
+            "window_height": 900
+        }
+    }
+
+    def __init__(self, config_path="config.json"):
+        """設定を初期化（config_pathがNoneの場合はファイルを使わず既定値のみ）"""
+        self.config_path = config_path
+        self.config = self.load_config()
+
+    def load_config(self):
+        """設定ファイルを読み込む"""
+        if self.config_path is None:
+            return copy.deepcopy(self.DEFAULT_CONFIG)
+        if os.path.exists(self.config_path):
+            try:
+                with open(self.config_path, "r", encoding="utf-8") as f:
+                    loaded_config = json.load(f)
+
+                # デフォルト設定をベースに、ロードした設定で上書き（既定値の辞書は変更しない）
+                config = copy.deepcopy(self.DEFAULT_CONFIG)
+                self._update_nested_dict(config, loaded_config)
+                return config
+            except Exception as e:
+                print(f"設定ファイル読み込みエラー: {e}")
+                return copy.deepcopy(self.DEFAULT_CONFIG)
+        else:
+            # 設定ファイルがない場合はデフォルト設定を保存
+            self._save_config(self.DEFAULT_CONFIG)
+            return copy.deepcopy(self.DEFAULT_CONFIG)
+
+    def _update_nested_dict(self, d, u):
+        """ネストされた辞書を再帰的に更新"""
+        for k, v in u.items():
+            if isinstance(v, dict) and k in d and isinstance(d[k], dict):
+                self._update_nested_dict(d[k], v)
+            else:
+                d[k] = v
+
+    def save_config(self):
+        """現在の設定をファイルに保存"""
+        self._save_config(self.config)
+
+    def _save_config(self, config):
+        """設定をJSONファイルに保存"""
+        if self.config_path is None:
+            return
+        try:
+            with open(self.config_path, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+        except Exception as e:
+            print(f"設定ファイル保存エラー: {e}")
+
+    def get(self, section, key=None):
+        """設定値を取得"""
+        if key is None:
+            return self.config.get(section, {})
+        return self.config.get(section, {}).get(key)
+
+    def set(self, section, key, value):
+        """設定値を設定"""
+        if section not in self.config:
+            self.config[section] = {}
+        self.config[section][key] = value
+
+    def update_section(self, section, values):
+        """セクション全体を更新"""
+        if section not in self.config:
+            self.config[section] = {}
+        self.config[section].update(values)
+
+    def resolve(self, preset: Optional[str] = None,
+                overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> TranscriptionConfig:
+        """
+        Resolves the settings of a job: defaults < config file < preset < overrides.
+
+        Args:
+            preset: Name of a preset in PRESETS (None: the config file's processing.preset).
+            overrides: Values in the same sections as the config file (e.g. from the command line).
+
+        Returns:
+            The resolved settings passed to process_folder and MP4File.
+        """
+        config = copy.deepcopy(self.config)
+        preset = preset or config["processing"].get("preset") or ""
+        if preset:
+            if preset not in PRESETS:
+                raise ValueError(f"不明なプリセットです: {preset} (選択肢: {', '.join(PRESETS)})")
+            self._update_nested_dict(config, PRESETS[preset])
+        if overrides:
+            self._update_nested_dict(config, overrides)
+
+        whisper = config["whisper"]
+        processing = config["processing"]
+        if whisper["mode"] not in TRANSCRIPTION_MODES:
+            raise ValueError(f"不明な文字起こしモードです: {whisper['mode']}")
+        if whisper["backend"] not in ASR_BACKENDS:
+            raise ValueError(f"不明なASRバックエンドです: {whisper['backend']} (選択肢: {', '.join(ASR_BACKENDS)})")
+        return TranscriptionConfig(
+            preset=preset,
+            backend=whisper["backend"],
+            model=whisper["faster_whisper_model"],
+            device=whisper["device"],
+            compute_type=whisper["compute_type"],
+            whisper_model=whisper["model"],
+            language=whisper["language"],
+            initial_prompt=whisper["initial_prompt"],
+            temperature=float(whisper["temperature"]),
+            beam_size=int(whisper["beam_size"]),
+            best_of=int(whisper["best_of"]),
+            patience=float(whisper["patience"]),
+            condition_on_previous_text=bool(whisper["condition_on_previous"]),
+            word_timestamps=bool(whisper["word_timestamps"]),
+            vad_filter=bool(whisper["vad_filter"]),
+            vad_min_silence_ms=int(whisper["vad_min_silence_ms"]),
+            mode=whisper["mode"],
+            batch_size=int(whisper["batch_size"]),
+            preprocessing=bool(config["audio"]["preprocessing"]),
+            min_segment_length=float(config["segmentation"]["min_segment_length"]),
+            workers=int(processing["workers"]),
+            chunk_workers=int(processing["chunk_workers"]),
+            vad=bool(processing["vad"]),
+            adaptive=bool(processing["adaptive"]),
+            fake_speed=float(whisper["fake_speed"]),
+            fake_segment_seconds=float(whisper["fake_segment_seconds"]),
+        )
@@ -1,5 +1,4 @@
-import re
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, TextIO
 
 
 class EDLData:
@@ -20,27 +19,74 @@ class EDLData:
             "events": self.events,
         }
 
-    def __str__(self) -> str:
-        """Returns the EDL data as a string in CMX 3600 format."""
-        lines = [f"TITLE: {self.title}", f"FCM: {self.fcm}", ""]
+    def header_lines(self) -> List[str]:
+        """Returns the TITLE and FCM header lines."""
+        return [f"TITLE: {self.title}", f"FCM: {self.fcm}"]
+
+    @staticmethod
+    def event_lines(number: int, event: Dict) -> Iterator[str]:
+        """
+        Yields the CMX 3600 lines of one event, preceded by the blank separator line.
+
+        Args:
+            number: The event number.
+            event: The event (reel name, track type, transition, source/record timecodes).
+        """
+        # イベント間の空行
+        yield ""
+        # イベント番号と基本情報、タイムコード情報（タイムコードはここで初めて文字列になる）
+        yield (
+            f"{number:03d}  {event['reel_name']:8s} {event['track_type']:4s} {event['transition']:1s}        "
+            f"{event['source_in']} {event['source_out']} {event['record_in']} {event['record_out']}"
+        )
         
-        for i, event in enumerate(self.events, 1):
-            # イベント番号と基本情報
-            line = f"{i:03d}  {event['reel_name']:8s} {event['track_type']:4s} {event['transition']:1s}        "
-            
-            # タイムコード情報
-            line += f"{event['source_in']} {event['source_out']} {event['record_in']} {event['record_out']}"
-            lines.append(line)
-            
-            # クリップ名（コメント行）
-            if 'clip_name' in event:
-                lines.append(f"* FROM CLIP NAME: {event['clip_name']}")
-            
-            # オーディオチャンネル情報（AA/Vの場合はステレオオーディオを指定）
-            if event['track_type'] == 'AA/V':
-                lines.append(f"* AUDIO LEVEL CH1: 0.0 CH2: 0.0")
-            
-            # イベント間の空行
-            lines.append("")
+        # クリップ名（コメント行）
+        if 'clip_name' in event:
+            yield f"* FROM CLIP NAME: {event['clip_name']}"
         
-        return "\n".join(lines)
+        # オーディオチャンネル情報（AA/Vの場合はステレオオーディオを指定）
+        if event['track_type'] == 'AA/V':
+            yield "* AUDIO LEVEL CH1: 0.0 CH2: 0.0"
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yields the lines of the EDL in CMX 3600 format (without line endings)."""
+        yield from self.header_lines()
+        for number, event in enumerate(self.events, 1):
+            yield from self.event_lines(number, event)
+
+    def write_header(self, stream: TextIO) -> None:
+        """Writes the TITLE and FCM header lines to a text stream."""
+        for line in self.header_lines():
+            stream.write(f"{line}\n")
+
+    def write_events(self, stream: TextIO, start_number: int = 1,
+                     events: Optional[Iterable[Dict]] = None) -> int:
+        """
+        Writes events to a text stream one at a time.
+
+        ヘッダを書き込んだ出力に、後から処理したファイルのイベントを続けて追記できます。
+        イベントは1つずつ書き込まれるため、EDL全体を文字列としてメモリに保持しません。
+
+        Args:
+            stream: An open text stream.
+            start_number: Number of the first written event.
+            events: Events to write (defaults to this EDL's events).
+
+        Returns:
+            The number of the next event.
+        """
+        number = start_number
+        for event in self.events if events is None else events:
+            for line in self.event_lines(number, event):
+                stream.write(f"{line}\n")
+            number += 1
+        return number
+
+    def write_to(self, stream: TextIO) -> None:
+        """Writes the whole EDL (header and events) to a text stream."""
+        self.write_header(stream)
+        self.write_events(stream)
+
+    def __str__(self) -> str:
+        """Returns the EDL data as a string in CMX 3600 format."""
+        return "".join(f"{line}\n" for line in self.iter_lines())
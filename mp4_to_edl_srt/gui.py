@@ -2,12 +2,13 @@ import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
-import subprocess
 import sys
 import glob
 import json
 
 from main import process_folder
+from config import ConfigManager, PRESETS
+from model_registry import get_model_registry
 
 
 # 多言語対応のための翻訳データ
@@ -34,7 +35,13 @@ TRANSLATIONS = {
         "confirm_message": "Are you sure you want to start the conversion?",
         "yes": "Yes",
         "no": "No",
-        "processing_file": "Processing file"
+        "processing_file": "Processing file",
+        "keep_model_loaded": "Keep the Whisper model loaded between conversions",
+        "model_kept_loaded": "The model stays loaded for the next conversion (released after 10 minutes idle).",
+        "live_subtitle": "Live subtitle:",
+        "show_live_subtitles": "Show live subtitles while transcribing (processes one file at a time)",
+        "preset": "Performance preset:",
+        "preset_help": "fast: greedy batched decoding / balanced: default / accurate: large-v3 without quantization"
     },
     "ja": {  # 日本語
         "title": "MP4 to EDL/SRT コンバーター",
@@ -58,7 +65,13 @@ TRANSLATIONS = {
         "confirm_message": "変換を開始しますか？",
         "yes": "はい",
         "no": "いいえ",
-        "processing_file": "処理中のファイル"
+        "processing_file": "処理中のファイル",
+        "keep_model_loaded": "変換間でWhisperモデルを保持する",
+        "model_kept_loaded": "モデルは次の変換のために保持されます（10分間使用されないと解放されます）。",
+        "live_subtitle": "ライブ字幕:",
+        "show_live_subtitles": "文字起こし中にライブ字幕を表示（ファイルを1つずつ処理します）",
+        "preset": "性能プリセット:",
+        "preset_help": "fast: 貪欲法のバッチ推論 / balanced: 標準 / accurate: 量子化なしのlarge-v3"
     }
 }
 
@@ -67,6 +80,7 @@ class MP4ToEDLSRTApp:
     def __init__(self, root):
         self.root = root
         self.language = tk.StringVar(value="ja")  # デフォルト言語は日本語
+        self.preset = tk.StringVar(value="balanced")  # 性能プリセット
         
         # 言語設定を読み込む（もし以前に保存されていれば）
         self.settings_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
@@ -80,6 +94,13 @@ class MP4ToEDLSRTApp:
         self.output_folder = tk.StringVar(value=os.path.join(os.getcwd(), "output"))
         self.initial_prompt = tk.StringVar(value=self.get_text("initial_prompt_default"))
         self.use_timecode_offset = tk.BooleanVar(value=True)
+        self.keep_model_loaded = tk.BooleanVar(value=True)
+        self.live_subtitle = tk.StringVar(value="")
+        # ライブ字幕は1ファイルずつの逐次処理になるため、既定では無効（プリセットの並列処理を使う）
+        self.show_live_subtitles = tk.BooleanVar(value=False)
+        
+        # ウィンドウを閉じるときにロード済みモデルを解放
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.create_widgets()
         
@@ -101,6 +122,7 @@ class MP4ToEDLSRTApp:
         try:
             settings = {
                 "language": self.language.get(),
+                "preset": self.preset.get(),
                 "last_input_folder": self.input_folder.get(),
                 "last_output_folder": self.output_folder.get()
             }
@@ -117,6 +139,8 @@ class MP4ToEDLSRTApp:
                     settings = json.load(f)
                     if "language" in settings:
                         self.language.set(settings["language"])
+                    if settings.get("preset") in PRESETS:
+                        self.preset.set(settings["preset"])
                     if "last_input_folder" in settings and os.path.exists(settings["last_input_folder"]):
                         self.input_folder = tk.StringVar(value=settings["last_input_folder"])
                     if "last_output_folder" in settings and os.path.exists(settings["last_output_folder"]):
@@ -181,6 +205,18 @@ class MP4ToEDLSRTApp:
         options_frame.pack(fill=tk.X, pady=10)
         
         ttk.Checkbutton(options_frame, text=self.get_text("use_timecode"), variable=self.use_timecode_offset).pack(anchor=tk.W, padx=10, pady=5)
+        ttk.Checkbutton(options_frame, text=self.get_text("keep_model_loaded"), variable=self.keep_model_loaded).pack(anchor=tk.W, padx=10, pady=5)
+        ttk.Checkbutton(options_frame, text=self.get_text("show_live_subtitles"), variable=self.show_live_subtitles).pack(anchor=tk.W, padx=10, pady=5)
+        
+        # 性能プリセット（精度と処理速度のバランス）
+        preset_frame = ttk.Frame(options_frame)
+        preset_frame.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(preset_frame, text=self.get_text("preset")).pack(side=tk.LEFT, padx=(0, 5))
+        preset_combo = ttk.Combobox(preset_frame, textvariable=self.preset, state="readonly", width=12)
+        preset_combo["values"] = list(PRESETS)
+        preset_combo.pack(side=tk.LEFT)
+        preset_combo.bind("<<ComboboxSelected>>", lambda event: self.save_settings())
+        ttk.Label(preset_frame, text=self.get_text("preset_help")).pack(side=tk.LEFT, padx=(10, 0))
         
         # ログエリア
         log_frame = ttk.Frame(main_frame)
@@ -193,13 +229,25 @@ class MP4ToEDLSRTApp:
         log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.log_text.config(yscrollcommand=log_scrollbar.set)
         
+        # ライブ字幕（文字起こし中に最新の字幕を表示）
+        live_frame = ttk.Frame(main_frame)
+        live_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(live_frame, text=self.get_text("live_subtitle")).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(live_frame, textvariable=self.live_subtitle, wraplength=600, font=("Arial", 12)).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
         # ボタン
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=10)
         
-        ttk.Button(button_frame, text=self.get_text("cancel"), command=self.root.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text=self.get_text("cancel"), command=self.on_close).pack(side=tk.RIGHT, padx=5)
         ttk.Button(button_frame, text=self.get_text("start_conversion"), command=self.start_conversion).pack(side=tk.RIGHT)
 
+    def on_close(self):
+        """ロード済みモデルを解放してウィンドウを閉じる"""
+        get_model_registry().evict()
+        self.root.destroy()
+
     def browse_input_folder(self):
         folder = filedialog.askdirectory(title=self.get_text("input_folder"))
         if folder:
@@ -222,6 +270,11 @@ class MP4ToEDLSRTApp:
         self.log_text.see(tk.END)
         self.root.update_idletasks()
 
+    def show_live_subtitle(self, mp4_file, segment):
+        """文字起こし中の字幕を表示する（処理スレッドから呼ばれる）"""
+        text = f"{os.path.basename(mp4_file.filepath)} {segment.start_timecode.to_srt()}  {segment.transcription}"
+        self.root.after(0, self.live_subtitle.set, text)
+
     def start_conversion(self):
         input_folder = self.input_folder.get()
         output_folder = self.output_folder.get()
@@ -245,17 +298,16 @@ class MP4ToEDLSRTApp:
         self.log_text.delete(1.0, tk.END)
         self.log(f"{self.get_text('processing')}")
         
-        # 環境変数にプロンプトを設定
-        os.environ["WHISPER_INITIAL_PROMPT"] = self.initial_prompt.get()
-        
         # 別スレッドで処理を実行
         threading.Thread(
             target=self.run_conversion,
-            args=(input_folder, output_folder, self.use_timecode_offset.get()),
+            args=(input_folder, output_folder, self.use_timecode_offset.get(), self.keep_model_loaded.get(),
+                  self.preset.get(), self.initial_prompt.get(), self.show_live_subtitles.get()),
             daemon=True
         ).start()
 
-    def run_conversion(self, input_folder, output_folder, use_timecode_offset=True):
+    def run_conversion(self, input_folder, output_folder, use_timecode_offset=True, keep_model_loaded=True,
+                       preset="balanced", initial_prompt=None, show_live_subtitles=False):
         try:
             # 標準出力をリダイレクトするクラス
             class StdoutRedirector:
@@ -291,7 +343,11 @@ class MP4ToEDLSRTApp:
             
             try:
                 # 処理実行
-                process_folder(input_folder, output_folder, use_timecode_offset)
+                process_folder(input_folder, output_folder, use_timecode_offset,
+                               keep_models_loaded=keep_model_loaded,
+                               config=ConfigManager(None).resolve(preset),
+                               initial_prompt=initial_prompt,
+                               on_segment=self.show_live_subtitle if show_live_subtitles else None)
                 
                 # 処理完了通知（GUIスレッドで実行）
                 self.root.after(0, lambda: self.conversion_completed(output_folder))
@@ -306,6 +362,8 @@ class MP4ToEDLSRTApp:
     def conversion_completed(self, output_folder):
         self.log(f"\n{self.get_text('completed')}")
         self.log(f"{self.get_text('output_files')} {output_folder}")
+        if self.keep_model_loaded.get() and get_model_registry().loaded_models():
+            self.log(self.get_text("model_kept_loaded"))
         messagebox.showinfo(self.get_text("completed"), f"{self.get_text('output_files')} {output_folder}")
 
 
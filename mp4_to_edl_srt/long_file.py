@@ -0,0 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from audio_pipe import SAMPLE_RATE
+from resegment import join_words
+
+# 無音区間の探索に使うフレーム長と平滑化の長さ（秒）
+_FRAME_SECONDS = 0.02
+_SMOOTH_SECONDS = 0.3
+# チャンクの継ぎ目で重複とみなす時間の許容誤差（秒）
+_SEAM_TOLERANCE = 0.1
+
+
+class Chunk(NamedTuple):
+    """A slice of a long recording and the part of it whose segments are kept."""
+    start: float  # チャンク音声の開始（秒）
+    end: float  # チャンク音声の終了（秒）
+    keep_from: float  # このチャンクから採用するセグメント開始時刻の下限
+    keep_until: float  # 上限（次のチャンクとの継ぎ目）
+
+
+def _frame_energy(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Returns the smoothed RMS energy of consecutive frames."""
+    frame = int(_FRAME_SECONDS * sample_rate)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    width = max(1, int(_SMOOTH_SECONDS / _FRAME_SECONDS))
+    return np.convolve(rms, np.ones(width, dtype=np.float32) / width, mode="same")
+
+
+def plan_chunks(audio: np.ndarray, chunk_seconds: float, overlap_seconds: float,
+                sample_rate: int = SAMPLE_RATE) -> List[Chunk]:
+    """
+    Splits a recording into chunks of roughly chunk_seconds, cutting at silence.
+
+    目標の分割位置の前後（チャンク長の1/4、最大60秒）で最もエネルギーの小さい位置で
+    分割します。各チャンクは直前の分割位置より overlap_seconds だけ前から始まり、
+    重なりの中央を継ぎ目として、どちらのチャンクのセグメントを採用するかを決めます。
+
+    Args:
+        audio: Mono float32 samples.
+        chunk_seconds: Target chunk length in seconds.
+        overlap_seconds: Audio shared by neighbouring chunks, in seconds.
+        sample_rate: Sample rate of audio.
+
+    Returns:
+        The chunks in time order.
+    """
+    total = len(audio) / sample_rate
+    energy = _frame_energy(audio, sample_rate)
+    search = min(chunk_seconds / 4, 60.0)
+
+    cuts = [0.0]
+    while total - cuts[-1] > chunk_seconds * 1.5:
+        target = cuts[-1] + chunk_seconds
+        lo = int(max(cuts[-1] + chunk_seconds / 2, target - search) / _FRAME_SECONDS)
+        hi = int(min(total - chunk_seconds / 2, target + search) / _FRAME_SECONDS)
+        if hi > lo and hi <= len(energy):
+            cut = (lo + int(np.argmin(energy[lo:hi])) + 0.5) * _FRAME_SECONDS
+        else:
+            cut = target
+        cuts.append(cut)
+    cuts.append(total)
+
+    chunks = []
+    for i in range(len(cuts) - 1):
+        start = max(0.0, cuts[i] - overlap_seconds) if i > 0 else 0.0
+        keep_from = cuts[i] - overlap_seconds / 2 if i > 0 else float("-inf")
+        keep_until = cuts[i + 1] - overlap_seconds / 2 if i < len(cuts) - 2 else float("inf")
+        chunks.append(Chunk(start, cuts[i + 1], keep_from, keep_until))
+    return chunks
+
+
+def _shift_segment(segment: Dict[str, Any], offset: float) -> Dict[str, Any]:
+    """Returns a copy of a segment with its (and its words') timestamps moved by offset."""
+    shifted = dict(segment)
+    shifted["start"] = segment["start"] + offset
+    shifted["end"] = segment["end"] + offset
+    shifted["words"] = [
+        {**word, "start": word["start"] + offset, "end": word["end"] + offset}
+        for word in segment.get("words", [])
+    ]
+    return shifted
+
+
+def stitch_chunks(chunks: List[Chunk], chunk_segments: List[List[Dict[str, Any]]],
+                  language: str = "ja") -> List[Dict[str, Any]]:
+    """
+    Merges per-chunk segments into one timestamp-corrected segment list.
+
+    自チャンクの採用範囲 [keep_from, keep_until) にかかるセグメントだけを採用します。
+    前のチャンクで採用したセグメントと重なる単語は後のチャンク側から取り除くため、
+    継ぎ目の単語は重複も欠落もしません。
+
+    Args:
+        chunks: Chunks from plan_chunks.
+        chunk_segments: Segments of each chunk with chunk-relative timestamps.
+        language: Transcription language; the text of a segment trimmed at a seam is
+            rebuilt from its remaining words (CJK words are joined without spaces).
+
+    Returns:
+        Segments with timestamps relative to the start of the recording.
+    """
+    stitched: List[Dict[str, Any]] = []
+    last_end = float("-inf")
+    for chunk, segments in zip(chunks, chunk_segments):
+        # 前のチャンクで採用した最後のセグメントの終了時刻
+        previous_end = last_end
+        for segment in segments:
+            segment = _shift_segment(segment, chunk.start)
+            # 採用範囲の前で終わる、または後で始まるセグメントは隣のチャンクに任せる
+            if segment["end"] <= chunk.keep_from or segment["start"] >= chunk.keep_until:
+                continue
+
+            if segment["start"] < previous_end - _SEAM_TOLERANCE:
+                words = segment["words"]
+                if words:
+                    kept_words = [w for w in words if w["start"] >= previous_end - _SEAM_TOLERANCE]
+                    if not kept_words:
+                        continue
+                    if len(kept_words) < len(words):
+                        segment["words"] = kept_words
+                        segment["text"] = join_words(kept_words, language)
+                        segment["start"] = kept_words[0]["start"]
+                elif (segment["start"] + segment["end"]) / 2 < previous_end:
+                    # 単語情報がない場合は、中央が前のセグメントと重なれば重複とみなす
+                    continue
+
+            stitched.append(segment)
+            last_end = max(last_end, segment["end"])
+    return stitched
+
+
+def transcribe_long(audio: np.ndarray, params: Dict[str, Any],
+                    transcribe_fn: Callable[[Any, Dict[str, Any]], Dict[str, Any]],
+                    chunk_seconds: float, overlap_seconds: float, workers: int = 2,
+                    sample_rate: int = SAMPLE_RATE) -> Dict[str, Any]:
+    """
+    Transcribes a long recording as silence-aligned chunks across worker processes.
+
+    Args:
+        audio: Mono float32 samples of the whole recording.
+        params: Backend parameters passed to transcribe_fn.
+        transcribe_fn: Module-level function (audio, params) -> transcription result.
+        chunk_seconds: Target chunk length in seconds.
+        overlap_seconds: Overlap between neighbouring chunks in seconds.
+        workers: Number of worker processes (1 transcribes the chunks in this process).
+        sample_rate: Sample rate of audio.
+
+    Returns:
+        The stitched transcription result (text, segments with words, language).
+    """
+    chunks = plan_chunks(audio, chunk_seconds, overlap_seconds, sample_rate)
+    print(f"長時間ファイルを{len(chunks)}チャンクに分割して文字起こしします "
+          f"(目標 {chunk_seconds / 60:.1f}分, 重なり {overlap_seconds:.1f}秒, ワーカー {workers})")
+    for i, chunk in enumerate(chunks, 1):
+        print(f" - チャンク {i}: {chunk.start:.1f}秒 - {chunk.end:.1f}秒")
+
+    chunk_audio = [audio[int(c.start * sample_rate):int(c.end * sample_rate)] for c in chunks]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = [executor.submit(transcribe_fn, samples, params) for samples in chunk_audio]
+            results = [future.result() for future in futures]
+    else:
+        results = [transcribe_fn(samples, params) for samples in chunk_audio]
+
+    language = results[0].get("language") if results else params.get("language")
+    segments = stitch_chunks(chunks, [result["segments"] for result in results], language or "ja")
+    print(f"チャンクを結合しました: {len(segments)}セグメント")
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language,
+    }
@@ -1,17 +1,425 @@
 import os
 import argparse
+import json
 import re
 import subprocess
+import sys
 import glob
-from typing import List, Dict, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial, wraps
+from typing import Any, Callable, List, Dict, Iterable, Iterator, Tuple, Optional
 
 from mp4_file import MP4File
+from mp4_box import MovieInfo
+from asr_backend import batched_inference_available
+from config import ConfigManager, TranscriptionConfig, ASR_BACKENDS, PRESETS, TRANSCRIPTION_MODES
 from edl_data import EDLData
-from srt_data import SRTData
+from srt_data import SRTData, LiveSRTWriter
 from segment import Segment
+from timecode import Timecode
+from model_registry import get_model_registry
+from transcription_cache import TranscriptionCache, cache_main
+from pipeline import Stage, StagedPipeline
+from resegment import ResegmentOptions
+from search import SearchIndex, search_main
+from vad import VADOptions
+from clip_batch import plan_batches
+from adaptive import AdaptiveOptions
+from catalog import Catalog, catalog_main
+from preflight import DEFAULT_PREFLIGHT_WORKERS, RTF_HISTORY_PATH, load_rtf_history, record_rtf, run_preflight
+from scheduler import plan_schedule, submit_in_order
 
+# パイプラインモードの各ステージの既定スレッド数
+DEFAULT_STAGE_WORKERS = {"probe": 4, "audio": 2, "asr": 1, "segment": 1}
 
-def process_folder(input_folder: str, output_folder: str, use_timecode_offset: bool = True) -> None:
+# 出力フォルダに保存する、単語のタイムスタンプ付きの文字起こし（resegmentコマンドで再利用）
+TRANSCRIPT_FILENAME = "output.transcript.jsonl"
+# ライブ字幕モードで処理中に書き出す途中経過のSRT（最終的なSRTの保存後に削除）
+PARTIAL_SRT_FILENAME = "output.partial.srt"
+# 事前チェックの結果（各ファイルの長さ・音声・タイムコードと除外理由、処理時間の見積もり）
+MANIFEST_FILENAME = "output.manifest.json"
+
+# 処理するファイル: (リール名に使うファイル番号, パス, 事前チェックで読んだメタデータ,
+#                    カタログに記録した前回の文字起こし)
+FileTask = Tuple[int, str, Optional[MovieInfo], Optional[Dict[str, Any]]]
+
+
+def _report_file_error(e: Exception) -> None:
+    """Prints a per-file error. The file is skipped and processing continues."""
+    if isinstance(e, FileNotFoundError):
+        print(f"エラー: ファイルが見つかりません: {e}")
+    elif isinstance(e, subprocess.CalledProcessError):
+        print(f"エラー: FFmpegの実行中にエラーが発生しました: {e}")
+    else:
+        print(f"エラー: 処理中に予期しないエラーが発生しました: {e}")
+
+
+def _process_file(mp4_file_path: str, file_index: int, movie_info: Optional[MovieInfo],
+                  known_transcription: Optional[Dict[str, Any]], total_files: int,
+                  initial_prompt: str, use_timecode_offset: bool,
+                  file_options: Optional[Dict[str, Any]] = None,
+                  on_segment: Optional[Callable[[MP4File, Segment], None]] = None) -> Optional[MP4File]:
+    """
+    Runs every per-file step except record-timeline placement.
+
+    ワーカープロセスからも呼び出されるため、モジュールレベルに定義しています。
+
+    Args:
+        mp4_file_path: Path to the MP4 file.
+        file_index: 1-based index of the file in sorted order (used for the reel name).
+        movie_info: Metadata read by the pre-flight check (None: read it from the file).
+        known_transcription: Transcription recorded in the media catalog for the unchanged
+            file, used instead of ASR if its parameters match.
+        total_files: Number of MP4 files in the folder.
+        initial_prompt: Initial prompt passed to Whisper.
+        use_timecode_offset: Whether to use the MP4 file's internal timecode as offset.
+        file_options: Keyword arguments for MP4File (transcription cache, audio source,
+            long-file chunking).
+        on_segment: Streaming mode. Called with the file and each subtitle segment as soon
+            as it is decoded (this process only).
+
+    Returns:
+        The processed MP4File with placement-free EDL events, or None on error.
+    """
+    try:
+        print(f"ファイル {file_index}/{total_files} を処理中: {os.path.basename(mp4_file_path)}")
+        started = time.perf_counter()
+        
+        # MP4ファイルを処理
+        mp4_file = MP4File(mp4_file_path, file_index, movie_info=movie_info,
+                           known_transcription=known_transcription, **(file_options or {}))
+        # カタログかキャッシュに結果がある場合は音声抽出と文字起こしを省略
+        cached = mp4_file.load_cached_transcription(initial_prompt)
+        if on_segment is not None:
+            # ストリーミング: デコードされたセグメントから順に字幕化する
+            if not cached:
+                mp4_file.extract_audio()
+            for _ in mp4_file.stream_segments(initial_prompt=initial_prompt, on_segment=on_segment):
+                pass
+        else:
+            if not cached:
+                mp4_file.extract_audio()
+                mp4_file.transcribe(initial_prompt=initial_prompt)  # 初期プロンプトを渡す
+            mp4_file.segment_audio(threshold=0.5)
+        if not cached:
+            # 処理速度の履歴（次回の処理時間の見積もりとスケジューリングに使う）
+            mp4_file.processing_seconds = time.perf_counter() - started
+        
+        # レコード位置に依存しないEDLイベントを生成
+        mp4_file.build_edl_events(use_timecode_offset=use_timecode_offset)
+        return mp4_file
+            
+    except Exception as e:
+        _report_file_error(e)
+    return None
+
+
+def _timed_results(results: Iterable[Optional[MP4File]],
+                   timings: List[Tuple[float, float]]) -> Iterator[Optional[MP4File]]:
+    """Passes results through, collecting (duration, processing seconds) of the files that were transcribed."""
+    for mp4_file in results:
+        if mp4_file is not None and mp4_file.processing_seconds is not None and mp4_file.duration:
+            timings.append((mp4_file.duration, mp4_file.processing_seconds))
+        yield mp4_file
+
+
+def _cataloged_results(results: Iterable[Optional[MP4File]], catalog: Catalog, search_index: SearchIndex,
+                       output_folder: str) -> Iterator[Optional[MP4File]]:
+    """Passes results through, recording each processed file in the catalog and indexing its subtitles."""
+    for mp4_file in results:
+        if mp4_file is not None:
+            catalog.record_file(mp4_file, output_folder)
+            search_index.index_file(mp4_file)
+        yield mp4_file
+
+
+def _live_subtitle_callback(partial_srt: LiveSRTWriter,
+                            callback: Optional[Callable[[MP4File, Segment], None]]) -> Callable[[MP4File, Segment], None]:
+    """Returns an on_segment callback that prints each subtitle and appends it to the partial SRT."""
+    def on_segment(mp4_file: MP4File, segment: Segment) -> None:
+        partial_srt.write(segment)
+        print(f"[字幕] {os.path.basename(mp4_file.filepath)} "
+              f"{segment.start_timecode.to_srt()} --> {segment.end_timecode.to_srt()} | {segment.transcription}")
+        if callback is not None:
+            callback(mp4_file, segment)
+    return on_segment
+
+
+def _skip_on_error(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """Wraps a pipeline stage so that a failing file is reported and dropped."""
+    @wraps(func)
+    def wrapper(item: Any) -> Any:
+        try:
+            return func(item)
+        except Exception as e:
+            _report_file_error(e)
+            return None
+    return wrapper
+
+
+def _run_staged_pipeline(tasks: List[FileTask], total_files: int, initial_prompt: str,
+                         use_timecode_offset: bool, file_options: Dict[str, Any],
+                         stage_workers: Dict[str, int], queue_size: int) -> Iterator[Optional[MP4File]]:
+    """
+    Processes files through overlapped probe → audio → ASR → segmentation/EDL stages.
+
+    次のファイルのメタデータ取得と音声抽出を、現在のファイルの文字起こしと並行して行います。
+    ステージ間のキューの上限によって、音声抽出がASRより先行しすぎることはありません。
+
+    Args:
+        tasks: (file index, path, pre-flight metadata, catalog transcription) of each file to process,
+            in sorted order.
+        total_files: Number of MP4 files in the folder.
+
+    Yields:
+        The processed MP4File (or None on error) for each file, in sorted order.
+    """
+    def probe(task: FileTask) -> MP4File:
+        file_index, mp4_file_path, movie_info, known_transcription = task
+        print(f"ファイル {file_index}/{total_files} を処理中: {os.path.basename(mp4_file_path)}")
+        return MP4File(mp4_file_path, file_index, movie_info=movie_info,
+                       known_transcription=known_transcription, **file_options)
+
+    def extract(mp4_file: MP4File) -> Tuple[MP4File, bool]:
+        # カタログかキャッシュに結果がある場合は音声抽出と文字起こしを省略
+        cached = mp4_file.load_cached_transcription(initial_prompt)
+        if not cached:
+            mp4_file.extract_audio()
+        return mp4_file, cached
+
+    def transcribe(entry: Tuple[MP4File, bool]) -> MP4File:
+        mp4_file, cached = entry
+        if not cached:
+            mp4_file.transcribe(initial_prompt=initial_prompt)
+        return mp4_file
+
+    def segment(mp4_file: MP4File) -> MP4File:
+        mp4_file.segment_audio(threshold=0.5)
+        mp4_file.build_edl_events(use_timecode_offset=use_timecode_offset)
+        return mp4_file
+
+    stages = [
+        Stage("probe", _skip_on_error(probe), stage_workers["probe"]),
+        Stage("audio", _skip_on_error(extract), stage_workers["audio"]),
+        Stage("asr", _skip_on_error(transcribe), stage_workers["asr"]),
+        Stage("segment", _skip_on_error(segment), stage_workers["segment"]),
+    ]
+    print("ステージパイプラインで処理します: " + ", ".join(f"{st.name}={st.workers}" for st in stages)
+          + f" (キュー上限: {queue_size})")
+    pipeline = StagedPipeline(stages, queue_size=queue_size)
+    try:
+        yield from pipeline.run(tasks)
+    finally:
+        # 結果の受け取りを途中でやめた場合も、ステージのスレッドを止める
+        pipeline.close()
+
+
+def _run_clip_batches(tasks: List[FileTask], total_files: int, initial_prompt: str,
+                      use_timecode_offset: bool, file_options: Dict[str, Any], max_clip_seconds: float,
+                      max_batch_seconds: float, gap_seconds: float) -> Iterator[Optional[MP4File]]:
+    """
+    Processes files serially, transcribing runs of consecutive short files in one ASR pass.
+
+    先に全ファイルのメタデータを取得し、max_clip_seconds 以下のファイルが続く部分を
+    max_batch_seconds までまとめて MP4File.transcribe_batch で文字起こしします。
+    キャッシュにヒットしたファイル、長いファイル、まとめての文字起こしに失敗したバッチの
+    ファイルは、通常どおりファイルごとに処理します。
+
+    Args:
+        tasks: (file index, path, pre-flight metadata, catalog transcription) of each file to process,
+            in sorted order.
+        total_files: Number of MP4 files in the folder.
+
+    Yields:
+        The processed MP4File (or None on error) for each file, in sorted order.
+    """
+    mp4_files: List[Optional[MP4File]] = []
+    durations: List[Optional[float]] = []
+    for file_index, mp4_file_path, movie_info, known_transcription in tasks:
+        print(f"ファイル {file_index}/{total_files} のメタデータを取得中: {os.path.basename(mp4_file_path)}")
+        mp4_file = MP4File(mp4_file_path, file_index, movie_info=movie_info,
+                           known_transcription=known_transcription, **file_options)
+        duration = mp4_file.duration
+        if duration is not None and duration <= max_clip_seconds:
+            # 短いファイルの音声はメモリ上で結合する
+            mp4_file.audio_source = "pipe"
+            if mp4_file.load_cached_transcription(initial_prompt):
+                duration = None  # 文字起こし済みのファイルはまとめない
+        mp4_files.append(mp4_file)
+        durations.append(duration)
+    
+    for group in plan_batches(durations, max_clip_seconds, max_batch_seconds):
+        if len(group) > 1:
+            try:
+                MP4File.transcribe_batch([mp4_files[index] for index in group], initial_prompt, gap_seconds)
+            except Exception as e:
+                print(f"警告: まとめての文字起こしに失敗しました。ファイルごとに処理します: {e}")
+                for index in group:
+                    mp4_files[index].transcription_result = {}
+        for index in group:
+            mp4_file = mp4_files[index]
+            mp4_files[index] = None  # 処理済みのファイルは保持しない
+            try:
+                if not mp4_file.transcription_result:
+                    mp4_file.extract_audio()
+                    mp4_file.transcribe(initial_prompt=initial_prompt)
+                mp4_file.segment_audio(threshold=0.5)
+                mp4_file.build_edl_events(use_timecode_offset=use_timecode_offset)
+            except Exception as e:
+                _report_file_error(e)
+                mp4_file = None
+            yield mp4_file
+
+
+def write_project_outputs(results: Iterable[Optional[MP4File]], output_folder: str,
+                          save_transcript: bool = True) -> None:
+    """
+    Places processed files on the record timeline and writes the project's EDL, SRT and transcript.
+
+    レコードタイムラインは最初のファイルのフレームレートとドロップフレームに合わせ（EDLのFCM）、
+    フレームレートの異なるファイルはイベントの長さを換算して並べます。
+    EDLと文字起こし（単語のタイムスタンプ付き）はファイルごとに一時ファイルへ追記し、
+    最後に置き換えます。MP4Fileオブジェクトは保持せず、SRT用のSegmentStoreだけを残します。
+
+    Args:
+        results: Processed files (None for failed files) in sorted order, with
+            placement-free EDL events.
+        output_folder: Folder receiving output.edl, output.srt and the transcript.
+        save_transcript: Whether to write the transcript used by the resegment command.
+    """
+    # EDLはファイルごとに出力へ追記する（プロジェクト全体のイベントをメモリに溜めない）
+    edl_data = EDLData(title="MP4 to EDL Project", fcm="NON-DROP FRAME")
+    edl_output_path = os.path.join(output_folder, "output.edl")
+    # 途中で失敗した場合に不完全なEDLが残らないよう、一時ファイルに書いてから置き換える
+    edl_tmp_path = f"{edl_output_path}.{os.getpid()}.tmp"
+    next_event_number = 1
+    # 再セグメント化（resegmentコマンド）用の文字起こし。1行に1ファイル
+    transcript_output_path = os.path.join(output_folder, TRANSCRIPT_FILENAME)
+    transcript_tmp_path = f"{transcript_output_path}.{os.getpid()}.tmp"
+    
+    # 次のレコードの開始時間（最初のファイルで00:00:00:00にする）
+    next_record_start: Optional[Timecode] = None
+    
+    # 処理済みファイルのセグメント（SRT用）。MP4Fileオブジェクト自体は保持せず、
+    # 列形式のSegmentStoreだけを残すことで、大量のファイルでもメモリ使用量を抑える
+    segment_stores = []
+    # 2段階デコードで再デコードした音声の合計（秒）
+    escalated_seconds = adaptive_seconds = 0.0
+    
+    edl_stream = open(edl_tmp_path, "w", encoding="utf-8")
+    transcript_stream = open(transcript_tmp_path, "w", encoding="utf-8") if save_transcript else None
+    try:
+        # 各ファイルの結果をソート順に受け取り、レコードタイムラインに配置
+        for mp4_file in results:
+            if mp4_file is None:
+                continue
+            if next_record_start is None:
+                next_record_start = Timecode(0, mp4_file.frame_rate, mp4_file.drop_frame)
+                edl_data.fcm = "DROP FRAME" if mp4_file.drop_frame else "NON-DROP FRAME"
+                edl_data.write_header(edl_stream)
+            
+            file_edl_data, next_record_start = mp4_file.place_edl_events(next_record_start)
+            next_event_number = file_edl_data.write_events(edl_stream, next_event_number)
+            if transcript_stream is not None:
+                transcript_stream.write(json.dumps(mp4_file.transcript_entry(), ensure_ascii=False) + "\n")
+            
+            # セグメントのストアだけを保存
+            segment_stores.append(mp4_file.segments)
+            # キャッシュから読み込んだファイルは今回デコードしていないため数えない
+            adaptive = mp4_file.adaptive_report
+            if adaptive:
+                escalated_seconds += adaptive["escalated_seconds"]
+                adaptive_seconds += adaptive["total_seconds"]
+        if next_record_start is None:
+            edl_data.write_header(edl_stream)
+    except BaseException:
+        edl_stream.close()
+        os.remove(edl_tmp_path)
+        if transcript_stream is not None:
+            transcript_stream.close()
+            os.remove(transcript_tmp_path)
+        raise
+    
+    # EDLファイルを確定
+    edl_stream.close()
+    os.replace(edl_tmp_path, edl_output_path)
+    print(f"EDLファイルを保存しました: {edl_output_path} ({next_event_number - 1}イベント)")
+    if transcript_stream is not None:
+        transcript_stream.close()
+        os.replace(transcript_tmp_path, transcript_output_path)
+        print(f"文字起こし（単語のタイムスタンプ付き）を保存しました: {transcript_output_path}")
+    
+    # EDL生成後にSRTデータを生成
+    print(f"EDLに基づいてSRTデータを生成します...")
+    # ファイルごとに開始時間順に並べ、全体はk-wayマージで書き出す（全体の再ソートは不要）
+    segment_streams = [segments.srt_entries() for segments in segment_stores]
+    
+    # SRTファイルを書き込み
+    srt_output_path = os.path.join(output_folder, "output.srt")
+    SRTData.write_merged(srt_output_path, segment_streams)
+    print(f"SRTファイルを保存しました: {srt_output_path}")
+    print(f"EDLとSRTのタイムコードが同期されました")
+    if adaptive_seconds > 0:
+        print(f"2段階デコード: 音声全体の {escalated_seconds / adaptive_seconds * 100:.1f}% "
+              f"({escalated_seconds:.1f}秒 / {adaptive_seconds:.1f}秒) をビームサーチで再デコードしました")
+
+
+def resegment_project(project_folder: str, output_folder: Optional[str] = None,
+                      resegment_options: Optional[ResegmentOptions] = None,
+                      use_timecode_offset: bool = True) -> None:
+    """
+    Rebuilds a finished project's EDL and SRT from its saved transcript without running ASR.
+
+    Args:
+        project_folder: Output folder of a previous run (holding output.transcript.jsonl).
+        output_folder: Folder for the new EDL/SRT (default: project_folder).
+        resegment_options: Segment limits applied to the word timestamps
+            (None: use Whisper's segments).
+        use_timecode_offset: Whether to use the MP4 file's internal timecode as offset.
+    """
+    project_folder = os.path.normpath(project_folder)
+    output_folder = os.path.normpath(output_folder or project_folder)
+    transcript_path = os.path.join(project_folder, TRANSCRIPT_FILENAME)
+    if not os.path.exists(transcript_path):
+        print(f"エラー: 文字起こしファイルが見つかりません: {transcript_path}")
+        return
+    os.makedirs(output_folder, exist_ok=True)
+    
+    started = time.perf_counter()
+    
+    def restored_files() -> Iterator[MP4File]:
+        with open(transcript_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                mp4_file = MP4File.from_transcript(json.loads(line), resegment_options=resegment_options)
+                mp4_file.segment_audio(threshold=0.5)
+                mp4_file.build_edl_events(use_timecode_offset=use_timecode_offset)
+                yield mp4_file
+    
+    # 同じフォルダに書き出す場合、文字起こしは変わらないので書き直さない
+    write_project_outputs(restored_files(), output_folder, save_transcript=output_folder != project_folder)
+    print(f"再セグメント化完了: {time.perf_counter() - started:.2f}秒")
+
+
+def process_folder(input_folder: str, output_folder: str, use_timecode_offset: bool = True,
+                   workers: Optional[int] = None, keep_models_loaded: bool = True,
+                   use_cache: bool = True, cache_dir: Optional[str] = None,
+                   audio_source: str = "file", pipeline: bool = False,
+                   stage_workers: Optional[Dict[str, int]] = None, queue_size: int = 2,
+                   chunk_minutes: Optional[float] = None, chunk_overlap: float = 2.0,
+                   chunk_workers: Optional[int] = None,
+                   resegment_options: Optional[ResegmentOptions] = None, vad: Optional[VADOptions] = None,
+                   batch_clip_seconds: Optional[float] = None, batch_max_seconds: float = 600.0,
+                   batch_gap: float = 1.0, adaptive: Optional[AdaptiveOptions] = None,
+                   config: Optional[TranscriptionConfig] = None, initial_prompt: Optional[str] = None,
+                   live: bool = False,
+                   on_segment: Optional[Callable[[MP4File, Segment], None]] = None,
+                   preflight: bool = True, preflight_workers: int = DEFAULT_PREFLIGHT_WORKERS,
+                   preflight_only: bool = False, schedule: str = "lpt",
+                   use_catalog: bool = True, catalog_path: Optional[str] = None) -> None:
     """
     Processes a folder of MP4 files to generate combined EDL and SRT files.
     
@@ -19,6 +427,60 @@ def process_folder(input_folder: str, output_folder: str, use_timecode_offset: b
         input_folder: Path to the folder containing MP4 files.
         output_folder: Path to save the output EDL and SRT files.
         use_timecode_offset: Whether to use the MP4 file's internal timecode as offset.
+        workers: Number of worker processes. Files are processed in parallel when
+            greater than 1; record timecodes are assigned afterwards in sorted order,
+            so the output is identical to the serial run. None uses config.workers.
+        keep_models_loaded: Whether to keep the Whisper model loaded after the batch
+            so that later runs in the same process skip the load (evicted on idle timeout).
+        use_cache: Whether to reuse and store transcription results in the on-disk cache.
+        cache_dir: Directory of the transcription cache (default location if None).
+        audio_source: "file" writes a WAV next to each MP4; "pipe" streams 16 kHz float32
+            PCM from FFmpeg straight into the ASR engine without temporary files.
+        pipeline: Overlap probing, audio extraction, transcription and segmentation of
+            consecutive files in a staged producer/consumer pipeline.
+        stage_workers: Threads per pipeline stage ("probe", "audio", "asr", "segment").
+        queue_size: Maximum number of files waiting between two pipeline stages.
+        chunk_minutes: Long-file mode. Files longer than 1.5x this length are split at
+            silence into chunks of roughly this many minutes and transcribed in parallel.
+        chunk_overlap: Overlap between neighbouring chunks in seconds.
+        chunk_workers: Worker processes transcribing the chunks of one file (None: config.chunk_workers).
+        resegment_options: Build segments from word timestamps within these limits
+            instead of using Whisper's segments.
+        vad: Energy-based speech detection pre-pass. Only the detected speech (with padding)
+            is transcribed, and files without speech skip ASR entirely. If None, config.vad
+            enables it with the default options.
+        batch_clip_seconds: Short-clip batching. Runs of consecutive files at most this many
+            seconds long are concatenated and transcribed in one ASR pass (serial mode only).
+        batch_max_seconds: Maximum total audio of one short-clip batch in seconds.
+        batch_gap: Seconds of silence between the files of a short-clip batch.
+        adaptive: Adaptive two-pass decoding. Files are decoded greedily and only the segments
+            crossing these confidence limits are decoded again with beam search. If None,
+            config.adaptive enables it with the default limits.
+        config: Resolved model, decoding and processing settings (ConfigManager.resolve);
+            the built-in defaults if None.
+        initial_prompt: Initial prompt passed to Whisper (None: the WHISPER_INITIAL_PROMPT
+            environment variable or the built-in prompt).
+        live: Print each subtitle as soon as it is decoded and append it to
+            output.partial.srt while the batch runs (files are processed serially).
+        on_segment: Streaming mode callback, called in this process with the file and each
+            subtitle segment as soon as it is decoded (files are processed serially).
+        preflight: Probe every file concurrently before any expensive work, reject empty,
+            unreadable, zero-length and audio-less files, and write output.manifest.json
+            with the total media duration and an estimated run time.
+        preflight_workers: Threads probing files in the pre-flight check.
+        preflight_only: Stop after the pre-flight check (dry run).
+        schedule: Order in which worker processes pick up files when workers > 1.
+            "lpt" starts the longest files first (by pre-flight duration; the measured
+            processing speed of earlier runs only scales the predicted run time);
+            "sorted" uses file name order.
+            Either way the EDL and SRT list the files in file name order.
+        use_catalog: Record every file's metadata, transcription parameters, segment count,
+            processing time and outputs in the SQLite media catalog, and reuse the recorded
+            pre-flight results of unchanged files instead of probing them again. Unchanged
+            files transcribed earlier with the same parameters reuse the recorded
+            transcription instead of running ASR (even without the transcription cache).
+            The subtitles are added to the catalog's full-text search index (`main.py search`).
+        catalog_path: Catalog database (default location if None).
     """
     # 入力・出力フォルダのパスを正規化
     input_folder = os.path.normpath(input_folder)
@@ -27,24 +489,37 @@ def process_folder(input_folder: str, output_folder: str, use_timecode_offset: b
     print(f"入力フォルダ: {input_folder}")
     print(f"出力フォルダ: {output_folder}")
     print(f"内部タイムコードの使用: {'有効' if use_timecode_offset else '無効'}")
+    print(f"音声の入力方法: {'FFmpegパイプ (メモリ上)' if audio_source == 'pipe' else 'WAVファイル'}")
     
-    # 環境変数から初期プロンプトを取得
-    initial_prompt = os.environ.get("WHISPER_INITIAL_PROMPT", "日本語での自然な会話。文脈に応じて適切な表現を使用してください。")
-    print(f"初期プロンプト: {initial_prompt}")
+    # 設定（プリセット・設定ファイル・コマンドラインから解決済み）
+    config = config or TranscriptionConfig()
+    if workers is None:
+        workers = config.workers
+    if chunk_workers is None:
+        chunk_workers = config.chunk_workers
+    if vad is None and config.vad:
+        vad = VADOptions()
+    if adaptive is None and config.adaptive:
+        adaptive = AdaptiveOptions()
+    print(f"設定プリセット: {config.preset or 'なし'}")
+    if config.mode == "batched":
+        if batched_inference_available():
+            print(f"文字起こしモード: バッチ推論 (バッチサイズ: {config.batch_size})")
+        else:
+            print("警告: このfaster-whisperにはバッチ推論パイプラインがないため、通常のモードで文字起こしします")
     
-    # 環境変数からWhisperパラメータを取得
-    temperature = os.environ.get("WHISPER_TEMPERATURE", "0.2")
-    beam_size = os.environ.get("WHISPER_BEAM_SIZE", "5")
-    condition_on_previous = os.environ.get("WHISPER_CONDITION_ON_PREVIOUS", "True")
-    # 音声前処理を無効化
-    os.environ["ENABLE_AUDIO_PREPROCESSING"] = "False"
-    enable_preprocessing = "False"
+    # 初期プロンプト（指定がなければ環境変数、それもなければ既定値）
+    if initial_prompt is None:
+        initial_prompt = os.environ.get("WHISPER_INITIAL_PROMPT", "日本語での自然な会話。文脈に応じて適切な表現を使用してください。")
+    print(f"初期プロンプト: {initial_prompt}")
     
     print(f"Whisperパラメータ設定:")
-    print(f" - Temperature: {temperature}")
-    print(f" - Beam Size: {beam_size}")
-    print(f" - 文脈考慮: {condition_on_previous}")
-    print(f" - 音声前処理: {enable_preprocessing}")
+    print(f" - バックエンド: {config.backend}")
+    print(f" - モデル: {config.model} ({config.device}, {config.compute_type})")
+    print(f" - Temperature: {config.temperature}")
+    print(f" - Beam Size: {config.beam_size}")
+    print(f" - 文脈考慮: {config.condition_on_previous_text}")
+    print(f" - 音声前処理: {config.preprocessing}")
     
     # 出力フォルダが存在しない場合は作成
     if not os.path.exists(output_folder):
@@ -60,70 +535,228 @@ def process_folder(input_folder: str, output_folder: str, use_timecode_offset: b
     
     print(f"{len(mp4_files)}個のMP4ファイルを処理します...")
     
-    # EDLとSRTデータの初期化
-    edl_data = EDLData(title="MP4 to EDL Project", fcm="NON-DROP FRAME")
-    srt_data = SRTData()
+    # 文字起こしキャッシュ（出力オプションだけを変えた再実行ではASRを省略できる）
+    transcription_cache = TranscriptionCache(cache_dir) if use_cache else None
+    if transcription_cache is not None:
+        print(f"文字起こしキャッシュ: {transcription_cache.cache_dir}")
     
-    # 次のレコードの開始時間（最初は00:00:00:00から）
-    next_record_start = "00:00:00:00"
+    sorted_mp4_files = sorted(mp4_files)
+    total_files = len(sorted_mp4_files)
+    # (リール名に使うファイル番号, パス, 事前チェックのメタデータ, カタログの文字起こし)。除外したファイルの番号は欠番になる
+    tasks: List[FileTask] = [(file_index, path, None, None) for file_index, path in enumerate(sorted_mp4_files, 1)]
     
-    # 処理済みのMP4ファイルオブジェクトを保存するリスト
-    processed_mp4_files = []
+    # 過去の実行で計測した処理速度（キャッシュを使わない場合は読み書きしない）
+    rtf_history_path = RTF_HISTORY_PATH if use_cache else None
+    rtf_history = load_rtf_history(rtf_history_path)
+    manifest = None
     
-    # 各MP4ファイルを処理
-    for i, mp4_file_path in enumerate(sorted(mp4_files), 1):
-        try:
-            print(f"ファイル {i}/{len(mp4_files)} を処理中: {os.path.basename(mp4_file_path)}")
-            
-            # MP4ファイルを処理
-            mp4_file = MP4File(mp4_file_path, i)
-            mp4_file.extract_audio()
-            mp4_file.transcribe(initial_prompt=initial_prompt)  # 初期プロンプトを渡す
-            mp4_file.segment_audio(threshold=0.5)
-            
-            # EDLデータを生成して結合
-            file_edl_data, next_record_start = mp4_file.generate_edl_data(
-                next_record_start, 
-                use_timecode_offset=use_timecode_offset
+    # カタログと検索インデックスは、途中でエラーが発生しても必ず閉じる
+    with ExitStack() as stack:
+        # メディアカタログ（処理したファイルを記録し、変わっていないファイルの事前チェックを省略する）
+        catalog = stack.enter_context(Catalog(catalog_path)) if use_catalog else None
+        if catalog is not None:
+            print(f"メディアカタログ: {catalog.path}")
+    
+        # 事前チェック: 全ファイルを並行して調べ、処理できないファイルを重い処理の前に除外する
+        if preflight or preflight_only:
+            started = time.perf_counter()
+            known = catalog.known_probes(sorted_mp4_files) if catalog is not None else {}
+            manifest = run_preflight(sorted_mp4_files, config, workers, preflight_workers, rtf_history, known)
+            if catalog is not None:
+                catalog.record_probes(probe for probe in manifest.files if probe.path not in known)
+                if known:
+                    print(f"カタログの記録を使用: {len(known)}個のファイル（前回から変更なし）")
+            manifest_path = os.path.join(output_folder, MANIFEST_FILENAME)
+            manifest.save(manifest_path)
+            print(f"事前チェック: {len(manifest.accepted)}個のファイルを処理します "
+                  f"({len(manifest.rejected)}個を除外, {time.perf_counter() - started:.2f}秒)")
+            for probe in manifest.rejected:
+                print(f" - 除外: {os.path.basename(probe.path)}: {probe.error}")
+            print(f"音声の合計: {manifest.total_seconds / 60:.1f}分, "
+                  f"推定処理時間: 約{manifest.estimated_seconds / 60:.1f}分 "
+                  f"({'過去の実行の処理速度から' if manifest.measured else '目安'})")
+            print(f"事前チェックの結果を保存しました: {manifest_path}")
+            if preflight_only or not manifest.accepted:
+                if not preflight_only:
+                    print("警告: 処理できるファイルがありません。")
+                return
+            # 事前チェックで読んだメタデータを渡し、各ファイルを再び調べない
+            tasks = [(probe.file_index, probe.path, probe.movie_info(), None) for probe in manifest.accepted]
+        if catalog is not None:
+            # 前回から変更のないファイルは、パラメータが同じなら記録した文字起こし結果を使う
+            known_transcriptions = catalog.known_transcriptions(path for _, path, _, _ in tasks)
+            if known_transcriptions:
+                print(f"カタログに文字起こし結果があります: {len(known_transcriptions)}個のファイル（前回から変更なし）")
+                tasks = [(file_index, path, movie_info, known_transcriptions.get(path))
+                         for file_index, path, movie_info, _ in tasks]
+        file_options = {
+            "transcription_cache": transcription_cache,
+            "audio_source": audio_source,
+            "chunk_minutes": chunk_minutes,
+            "chunk_overlap": chunk_overlap,
+            "chunk_workers": chunk_workers,
+            "resegment_options": resegment_options,
+            "vad": vad,
+            "adaptive": adaptive,
+            "config": config,
+        }
+        # ライブ字幕: 1ファイルずつ逐次文字起こしし、デコードされた字幕から順に出力する
+        partial_srt = None
+        if live or on_segment is not None:
+            if pipeline or workers > 1:
+                print("警告: ライブ字幕モードではファイルを1つずつ処理します（ワーカー数・パイプラインの指定は無視されます）")
+                pipeline, workers = False, 1
+            if batch_clip_seconds:
+                print("警告: ライブ字幕モードでは短いファイルをまとめて文字起こししません")
+                batch_clip_seconds = None
+            if live:
+                partial_srt = LiveSRTWriter(os.path.join(output_folder, PARTIAL_SRT_FILENAME))
+                print(f"途中経過のSRT: {partial_srt.output_path}")
+                on_segment = _live_subtitle_callback(partial_srt, on_segment)
+    
+        process_file = partial(
+            _process_file,
+            total_files=total_files,
+            initial_prompt=initial_prompt,
+            use_timecode_offset=use_timecode_offset,
+            file_options=file_options,
+            on_segment=on_segment,
+        )
+    
+        file_indices = [file_index for file_index, _, _, _ in tasks]
+        executor = None
+        planned = None
+        finished: List[float] = []
+        if pipeline:
+            if workers > 1:
+                print("警告: パイプラインモードではワーカープロセス数の指定は無視されます")
+            results = _run_staged_pipeline(
+                tasks, total_files, initial_prompt, use_timecode_offset, file_options,
+                {**DEFAULT_STAGE_WORKERS, **(stage_workers or {})}, queue_size,
             )
-            for event in file_edl_data.events:
-                edl_data.add_event(event)
-            
-            # 処理済みのMP4ファイルオブジェクトを保存
-            processed_mp4_files.append(mp4_file)
-                
-        except FileNotFoundError as e:
-            print(f"エラー: ファイルが見つかりません: {e}")
-            continue
-        except subprocess.CalledProcessError as e:
-            print(f"エラー: FFmpegの実行中にエラーが発生しました: {e}")
-            continue
-        except Exception as e:
-            print(f"エラー: 処理中に予期しないエラーが発生しました: {e}")
-            continue
+        elif batch_clip_seconds:
+            if workers > 1:
+                print("警告: 短いファイルのまとめ処理ではワーカープロセス数の指定は無視されます")
+            print(f"{batch_clip_seconds:.0f}秒以下の連続したファイルをまとめて文字起こしします "
+                  f"(1回あたり最大 {batch_max_seconds:.0f}秒, 間隔 {batch_gap:.1f}秒)")
+            results = _run_clip_batches(
+                tasks, total_files, initial_prompt, use_timecode_offset, file_options,
+                batch_clip_seconds, batch_max_seconds, batch_gap,
+            )
+        elif workers > 1 and len(tasks) > 1:
+            n_workers = min(workers, len(tasks))
+            print(f"{n_workers}個のワーカープロセスで並列処理します")
+            order = range(len(tasks))
+            if schedule == "lpt" and manifest is not None:
+                # 長いファイルから処理を始める（結果はファイル名順に受け取る）
+                durations = {probe.file_index: probe.duration for probe in manifest.accepted}
+                planned = plan_schedule([durations[file_index] for file_index in file_indices], n_workers,
+                                        manifest.rtf)
+                order = planned.order
+                print(f"長いファイルから処理します: 予測処理時間 {planned.predicted_makespan:.1f}秒 "
+                      f"(ファイル名順の場合 {planned.sorted_makespan:.1f}秒)")
+            executor = ProcessPoolExecutor(max_workers=n_workers)
+            results = submit_in_order(executor, process_file, [(path, file_index, movie_info, known)
+                                                               for file_index, path, movie_info, known in tasks],
+                                      order, finished)
+        else:
+            results = (process_file(path, file_index, movie_info, known)
+                       for file_index, path, movie_info, known in tasks)
     
-    # EDLファイルを書き込み
-    edl_output_path = os.path.join(output_folder, "output.edl")
-    with open(edl_output_path, "w", encoding="utf-8") as f:
-        f.write(str(edl_data))
-    print(f"EDLファイルを保存しました: {edl_output_path}")
+        timings: List[Tuple[float, float]] = []
+        started = time.perf_counter()
+        results = _timed_results(results, timings)
+        if catalog is not None:
+            search_index = stack.enter_context(SearchIndex(catalog.path))
+            results = _cataloged_results(results, catalog, search_index, output_folder)
+        try:
+            write_project_outputs(results, output_folder)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            # ワーカープロセスのモデルはプロセス終了時に解放される
+            if not keep_models_loaded:
+                get_model_registry().evict()
+            if partial_srt is not None:
+                partial_srt.close()
     
-    # EDL生成後にSRTデータを生成
-    print(f"EDLに基づいてSRTデータを生成します...")
-    for mp4_file in processed_mp4_files:
-        # EDLのレコードタイムコードに基づいてSRTデータを生成
-        file_srt_data = mp4_file.generate_srt_data()
-        for segment in file_srt_data.segments:
-            srt_data.add_segment(segment)
+        # 最終的なSRTを保存したので、途中経過のSRTは不要（失敗した場合は残す）
+        if partial_srt is not None:
+            os.remove(partial_srt.output_path)
     
-    # SRTファイルを書き込み
-    srt_output_path = os.path.join(output_folder, "output.srt")
-    srt_data.write_to_file(srt_output_path)
-    print(f"SRTファイルを保存しました: {srt_output_path}")
-    print(f"EDLとSRTのタイムコードが同期されました")
+        if planned is not None and finished:
+            print(f"処理時間: 予測 {planned.predicted_makespan:.1f}秒, 実際 {max(finished) - started:.1f}秒")
+        # 文字起こしした音声1秒あたりの処理時間を記録し、次回の見積もりに使う
+        if timings:
+            rtf = sum(seconds for _, seconds in timings) / sum(duration for duration, _ in timings)
+            record_rtf(config, rtf, rtf_history_path)
+            print(f"処理速度: 音声1秒あたり {rtf:.3f}秒 ({len(timings)}ファイル)")
+
+def _config_overrides(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """Returns the settings given explicitly on the command line, in ConfigManager's sections."""
+    whisper = {"backend": args.backend, "mode": args.transcription_mode, "batch_size": args.batch_size,
+               "fake_speed": args.fake_speed, "fake_segment_seconds": args.fake_segment_seconds}
+    processing = {"workers": args.workers, "chunk_workers": args.chunk_workers,
+                  "vad": args.vad, "adaptive": args.adaptive}
+    return {
+        "whisper": {key: value for key, value in whisper.items() if value is not None},
+        "processing": {key: value for key, value in processing.items() if value is not None},
+    }
+
+
+def _add_resegment_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the options that build segments from word timestamps."""
+    parser.add_argument("--max-chars", type=int, default=None,
+                        help="Build segments from word timestamps with at most this many characters")
+    parser.add_argument("--max-duration", type=float, default=None,
+                        help="Build segments from word timestamps no longer than this many seconds")
+    parser.add_argument("--min-gap", type=float, default=None,
+                        help="Build segments from word timestamps, always cutting at pauses of at least "
+                             "this many seconds")
+
+
+def _resegment_options(args: argparse.Namespace) -> Optional[ResegmentOptions]:
+    """Returns the segment limits given on the command line (None if none were given)."""
+    if args.max_chars is None and args.max_duration is None and args.min_gap is None:
+        return None
+    return ResegmentOptions(args.max_chars or 0, args.max_duration or 0.0, args.min_gap or 0.0)
+
+
+def resegment_main(argv: List[str]) -> None:
+    """Command line entry point of `main.py resegment`."""
+    parser = argparse.ArgumentParser(
+        prog="main.py resegment",
+        description="Rebuild a finished project's EDL/SRT from its saved word timestamps without re-running ASR",
+    )
+    parser.add_argument("--project", required=True, help="Output folder of a previous run")
+    parser.add_argument("--output", default=None, help="Folder for the new EDL/SRT (default: the project folder)")
+    parser.add_argument("--no-timecode", action="store_false", dest="use_timecode",
+                        help="Ignore MP4 file's internal timecode")
+    _add_resegment_arguments(parser)
+    args = parser.parse_args(argv)
+    resegment_project(args.project, args.output, resegment_options=_resegment_options(args),
+                      use_timecode_offset=args.use_timecode)
+
 
 def main():
     """Main function to parse arguments and process the folder."""
+    # サブコマンド: キャッシュの確認・削除
+    if len(sys.argv) > 1 and sys.argv[1] == "cache":
+        cache_main(sys.argv[2:])
+        return
+    # サブコマンド: メディアカタログの検索
+    if len(sys.argv) > 1 and sys.argv[1] == "catalog":
+        catalog_main(sys.argv[2:])
+        return
+    # サブコマンド: 全ファイルの字幕の検索
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        search_main(sys.argv[2:])
+        return
+    # サブコマンド: 保存済みの単語タイムスタンプから再セグメント化
+    if len(sys.argv) > 1 and sys.argv[1] == "resegment":
+        resegment_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(description="MP4 to EDL/SRT Converter")
     parser.add_argument("--input", required=True, help="Input folder containing MP4 files")
     parser.add_argument("--output", required=True, help="Output folder for EDL and SRT files")
@@ -131,9 +764,139 @@ def main():
                         help="Use MP4 file's internal timecode as offset (default: True)")
     parser.add_argument("--no-timecode", action="store_false", dest="use_timecode",
                         help="Ignore MP4 file's internal timecode")
+    parser.add_argument("--preset", choices=list(PRESETS), default=None,
+                        help="Performance preset bundling model, compute type, beam size, VAD, batching and "
+                             "worker counts (fast / balanced / accurate); options given explicitly override it")
+    parser.add_argument("--config", default=None, metavar="PATH",
+                        help="JSON settings file read by ConfigManager (created with the defaults if missing)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes for parallel per-file processing (default: 1)")
+    parser.add_argument("--chunk-minutes", type=float, default=None,
+                        help="Long-file mode: split files longer than 1.5x this length at silence into "
+                             "chunks of about this many minutes and transcribe them in parallel")
+    parser.add_argument("--chunk-overlap", type=float, default=2.0,
+                        help="Long-file mode: overlap between chunks in seconds (default: %(default)s)")
+    parser.add_argument("--chunk-workers", type=int, default=None,
+                        help="Long-file mode: worker processes per file (default: 2)")
+    parser.add_argument("--no-cache", action="store_false", dest="use_cache",
+                        help="Do not read or write the transcription cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Transcription cache directory (default: ~/.cache/mp4_to_edl_srt/transcriptions)")
+    parser.add_argument("--no-catalog", action="store_false", dest="use_catalog",
+                        help="Do not read or write the media catalog")
+    parser.add_argument("--catalog", default=None, metavar="PATH",
+                        help="Media catalog database (default: ~/.cache/mp4_to_edl_srt/catalog.sqlite3)")
+    parser.add_argument("--audio-source", choices=["file", "pipe"], default="file",
+                        help="file: extract a WAV next to each MP4; pipe: stream PCM from FFmpeg "
+                             "into the ASR engine in memory (default: file)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap probing, audio extraction, transcription and segmentation "
+                             "of consecutive files in a staged pipeline")
+    parser.add_argument("--probe-workers", type=int, default=DEFAULT_STAGE_WORKERS["probe"],
+                        help="Pipeline: threads for metadata probing (default: %(default)s)")
+    parser.add_argument("--audio-workers", type=int, default=DEFAULT_STAGE_WORKERS["audio"],
+                        help="Pipeline: threads for audio extraction (default: %(default)s)")
+    parser.add_argument("--asr-workers", type=int, default=DEFAULT_STAGE_WORKERS["asr"],
+                        help="Pipeline: threads for transcription (default: %(default)s)")
+    parser.add_argument("--segment-workers", type=int, default=DEFAULT_STAGE_WORKERS["segment"],
+                        help="Pipeline: threads for segmentation and EDL generation (default: %(default)s)")
+    parser.add_argument("--queue-size", type=int, default=2,
+                        help="Pipeline: maximum files waiting between stages (default: %(default)s)")
+    parser.add_argument("--no-preflight", action="store_false", dest="preflight",
+                        help="Skip the pre-flight check that probes every file first and rejects "
+                             "empty, unreadable, zero-length and audio-less files")
+    parser.add_argument("--preflight-only", action="store_true",
+                        help="Only run the pre-flight check: write output.manifest.json with each file's "
+                             "duration, audio stream and timecode plus an estimated run time, then exit")
+    parser.add_argument("--preflight-workers", type=int, default=DEFAULT_PREFLIGHT_WORKERS,
+                        help="Pre-flight check: threads probing files (default: %(default)s)")
+    parser.add_argument("--schedule", choices=["lpt", "sorted"], default="lpt",
+                        help="Order in which worker processes pick up files: 'lpt' starts the longest "
+                             "files first using the pre-flight durations (default), 'sorted' uses file "
+                             "name order. The EDL and SRT are in file name order either way")
+    parser.add_argument("--vad", action="store_const", const=True, default=None,
+                        help="Detect speech by audio energy first and transcribe only the speech regions; "
+                             "files without speech skip ASR")
+    parser.add_argument("--no-vad", action="store_const", const=False, dest="vad",
+                        help="Disable the VAD pre-pass even if the preset enables it")
+    parser.add_argument("--vad-threshold", type=float, default=VADOptions().threshold_db,
+                        help="VAD: dB above the noise floor that starts a speech region (default: %(default)s)")
+    parser.add_argument("--vad-padding", type=float, default=VADOptions().padding,
+                        help="VAD: seconds of audio kept before and after each speech region (default: %(default)s)")
+    parser.add_argument("--backend", choices=ASR_BACKENDS, default=None,
+                        help="ASR engine: 'auto' (faster-whisper if installed, else whisper; default), "
+                             "'faster-whisper', 'whisper', or 'fake' (synthetic segments without a model, "
+                             "for benchmarking everything except ASR)")
+    parser.add_argument("--fake-speed", type=float, default=None,
+                        help="Fake backend: emit segments at this multiple of real time (default: 0, no delay)")
+    parser.add_argument("--fake-segment-seconds", type=float, default=None,
+                        help="Fake backend: seconds between synthetic segments (default: 4.0)")
+    parser.add_argument("--transcription-mode", choices=TRANSCRIPTION_MODES, default=None,
+                        help="faster-whisper decoding: 'sequential' (default) or 'batched' "
+                             "(batched inference pipeline, higher throughput)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Batched mode: speech chunks decoded per forward pass (default: 16)")
+    parser.add_argument("--adaptive", action="store_const", const=True, default=None,
+                        help="Decode greedily and re-decode only low-confidence segments with beam search")
+    parser.add_argument("--no-adaptive", action="store_const", const=False, dest="adaptive",
+                        help="Disable adaptive two-pass decoding even if the preset enables it")
+    parser.add_argument("--adaptive-logprob", type=float, default=AdaptiveOptions().min_avg_logprob,
+                        help="Adaptive mode: re-decode segments with avg_logprob below this (default: %(default)s)")
+    parser.add_argument("--adaptive-compression", type=float, default=AdaptiveOptions().max_compression_ratio,
+                        help="Adaptive mode: re-decode segments with a compression ratio above this "
+                             "(default: %(default)s)")
+    parser.add_argument("--adaptive-no-speech", type=float, default=AdaptiveOptions().max_no_speech_prob,
+                        help="Adaptive mode: re-decode segments with a no-speech probability above this "
+                             "(default: %(default)s)")
+    parser.add_argument("--batch-clips", type=float, default=None, metavar="SECONDS",
+                        help="Transcribe runs of consecutive files at most this many seconds long in one "
+                             "ASR pass (serial mode only)")
+    parser.add_argument("--batch-max-seconds", type=float, default=600.0,
+                        help="Short-clip batching: maximum total audio per ASR pass (default: %(default)s)")
+    parser.add_argument("--batch-gap", type=float, default=1.0,
+                        help="Short-clip batching: seconds of silence between files (default: %(default)s)")
+    parser.add_argument("--live", action="store_true",
+                        help="Print each subtitle as soon as it is decoded and write partial results "
+                             "to output.partial.srt (files are processed one at a time)")
+    _add_resegment_arguments(parser)
     
     args = parser.parse_args()
-    process_folder(args.input, args.output, use_timecode_offset=args.use_timecode)
+    if args.pipeline and args.workers is not None and args.workers > 1:
+        parser.error("--pipeline and --workers cannot be combined")
+    if args.batch_clips and (args.pipeline or (args.workers is not None and args.workers > 1)):
+        parser.error("--batch-clips cannot be combined with --pipeline or --workers")
+    if args.batch_size is not None and args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    try:
+        config = ConfigManager(args.config).resolve(args.preset, _config_overrides(args))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.pipeline or args.batch_clips:
+        # パイプラインと短いファイルのまとめ処理は1プロセスで行う（プリセットのワーカー数は使わない）
+        config = config._replace(workers=1)
+    process_folder(args.input, args.output, use_timecode_offset=args.use_timecode,
+                   use_cache=args.use_cache, cache_dir=args.cache_dir,
+                   use_catalog=args.use_catalog, catalog_path=args.catalog,
+                   audio_source=args.audio_source, pipeline=args.pipeline,
+                   stage_workers={
+                       "probe": args.probe_workers,
+                       "audio": args.audio_workers,
+                       "asr": args.asr_workers,
+                       "segment": args.segment_workers,
+                   },
+                   queue_size=args.queue_size, chunk_minutes=args.chunk_minutes,
+                   chunk_overlap=args.chunk_overlap,
+                   resegment_options=_resegment_options(args), live=args.live,
+                   batch_clip_seconds=args.batch_clips, batch_max_seconds=args.batch_max_seconds,
+                   batch_gap=args.batch_gap, config=config,
+                   preflight=args.preflight, preflight_workers=args.preflight_workers,
+                   preflight_only=args.preflight_only, schedule=args.schedule,
+                   adaptive=AdaptiveOptions(
+                       min_avg_logprob=args.adaptive_logprob,
+                       max_compression_ratio=args.adaptive_compression,
+                       max_no_speech_prob=args.adaptive_no_speech,
+                   ) if config.adaptive else None,
+                   vad=VADOptions(threshold_db=args.vad_threshold, padding=args.vad_padding) if config.vad else None)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,185 @@
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# (backend, model, device, compute_type)
+ModelKey = Tuple[str, str, str, str]
+
+# モデルを保持し続ける既定のアイドル時間（秒）
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded ASR models.
+
+    モデルは (backend, model, device, compute_type) をキーとして初回使用時に
+    ロードされ、ファイル間で再利用されます。明示的な evict() か、
+    アイドルタイムアウトによって解放されます。in_use() で使用中のモデルは
+    アイドル状態とみなされず、使用が終わった時点からアイドル時間を数えます。
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT):
+        """
+        Initializes an empty registry.
+
+        Args:
+            idle_timeout: Seconds a model may stay unused before it is evicted.
+                None disables idle eviction.
+        """
+        self.idle_timeout: Optional[float] = idle_timeout
+        self._models: Dict[ModelKey, Any] = {}
+        self._last_used: Dict[ModelKey, float] = {}
+        self._in_use: Dict[ModelKey, int] = {}  # 使用中の数（アイドル解放の対象外）
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def get(self, backend: str, model: str, device: str, compute_type: str,
+            loader: Callable[[], Any]) -> Any:
+        """
+        Returns a loaded model, calling loader only if it is not loaded yet.
+
+        Args:
+            backend: Backend name (e.g. "faster-whisper", "whisper").
+            model: Model name or path.
+            device: Device the model runs on.
+            compute_type: Compute type / precision of the model.
+            loader: Callable that loads and returns the model.
+
+        Returns:
+            The loaded model.
+        """
+        key = (backend, model, device, compute_type)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同じモデルを複数スレッドが同時にロードしないようにキー単位でロック
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._last_used[key] = time.monotonic()
+                    return self._models[key]
+
+            print(f"モデルをロードしています: {backend} / {model} ({device}, {compute_type})")
+            start = time.perf_counter()
+            loaded = loader()
+            print(f"モデルのロード完了: {time.perf_counter() - start:.1f}秒")
+
+            with self._lock:
+                self._models[key] = loaded
+                self._last_used[key] = time.monotonic()
+            self._ensure_reaper()
+            return loaded
+
+    @contextmanager
+    def in_use(self, backend: str, model: str, device: str, compute_type: str) -> Iterator[None]:
+        """
+        Marks a model as in use for the duration of the block.
+
+        長い文字起こしの途中でアイドルタイムアウトによって解放されないよう、ブロックの間は
+        evict_idle の対象から外し、終了時に最終使用時刻を更新します。
+
+        Args:
+            backend: Backend name of the model (as passed to get).
+            model: Model name or path.
+            device: Device the model runs on.
+            compute_type: Compute type / precision of the model.
+        """
+        key = (backend, model, device, compute_type)
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                if not self._in_use[key]:
+                    del self._in_use[key]
+                if key in self._models:
+                    self._last_used[key] = time.monotonic()
+
+    def evict(self, backend: Optional[str] = None, model: Optional[str] = None) -> int:
+        """
+        Releases loaded models.
+
+        Args:
+            backend: Only evict models of this backend (all backends if None).
+            model: Only evict this model name (all models if None).
+
+        Returns:
+            The number of evicted models.
+        """
+        with self._lock:
+            keys = [
+                key for key in self._models
+                if (backend is None or key[0] == backend) and (model is None or key[1] == model)
+            ]
+            for key in keys:
+                del self._models[key]
+                del self._last_used[key]
+        if keys:
+            gc.collect()
+            for key in keys:
+                print(f"モデルを解放しました: {key[0]} / {key[1]}")
+        return len(keys)
+
+    def evict_idle(self) -> int:
+        """Releases models that have not been used for idle_timeout seconds."""
+        if self.idle_timeout is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            keys = [key for key, last in self._last_used.items()
+                    if now - last >= self.idle_timeout and key not in self._in_use]
+            for key in keys:
+                del self._models[key]
+                del self._last_used[key]
+        if keys:
+            gc.collect()
+            for key in keys:
+                print(f"アイドル状態のモデルを解放しました: {key[0]} / {key[1]}")
+        return len(keys)
+
+    def loaded_models(self) -> List[ModelKey]:
+        """Returns the keys of the currently loaded models."""
+        with self._lock:
+            return list(self._models)
+
+    def _ensure_reaper(self) -> None:
+        """Starts the idle-eviction thread if it is needed and not running."""
+        if self.idle_timeout is None:
+            return
+        with self._lock:
+            if self._reaper is not None and self._reaper.is_alive():
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        """Periodically evicts idle models until no model is loaded."""
+        while True:
+            timeout = self.idle_timeout
+            if timeout is None:
+                return
+            time.sleep(min(timeout, 60.0))
+            self.evict_idle()
+            with self._lock:
+                if not self._models:
+                    self._reaper = None
+                    return
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Returns the process-wide model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
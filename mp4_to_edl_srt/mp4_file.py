@@ -1,246 +1,238 @@
 import os
-import subprocess
-import whisper
-import pydub
-import re
 import json
-import torch  # torchを明示的にインポート
-from typing import List, Dict, Tuple, Optional, Any
+import subprocess
+from typing import Callable, List, Dict, Iterator, Tuple, Optional, Any
 import warnings
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
-from datetime import datetime, timedelta
-
-# faster-whisperのサポートを追加（インストールされていない場合はスキップ）
-try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
-    print("faster-whisperライブラリが利用可能です。高速モードが使用できます。")
-except ImportError:
-    FASTER_WHISPER_AVAILABLE = False
-    print("faster-whisperライブラリが見つかりません。標準モードで実行します。")
-    print("高速モードを使用するには次のコマンドを実行してください: pip install faster-whisper")
-
-from segment import Segment
+from datetime import datetime
+from fractions import Fraction
+import numpy as np
+
+# ConfigManagerと既定のモデル・プロンプトは以前このモジュールで定義していたため、ここからも参照できる
+from config import ConfigManager, TranscriptionConfig, DEFAULT_INITIAL_PROMPT, FASTER_WHISPER_MODEL
+# ASRエンジン（torch / whisper / faster-whisper）は最初の文字起こしで初めてインポートされる
+from asr_backend import batched_inference_available, get_backend, resolve_backend, run_asr
+from segment_store import SegmentStore, SegmentView
+from timecode import Timecode, DEFAULT_RATE, DROP_FRAME_RATES, standard_rate
 from edl_data import EDLData
-from srt_data import SRTData
+from mp4_box import MovieInfo, ffprobe_movie_info, read_movie_info
+from transcription_cache import TranscriptionCache
+from audio_pipe import iter_pcm_chunks, load_pcm, SAMPLE_RATE
+from long_file import transcribe_long
+from resegment import ResegmentOptions, join_words, resegment
+from clip_batch import concatenate_clips, split_segments
+from adaptive import AdaptiveOptions, transcribe_adaptive
+from vad import FRAME_SECONDS, TimeMap, VADOptions, compact_audio, detect_speech, frame_energy_db
 
 # Whisperの警告を非表示にする
 warnings.filterwarnings("ignore", message="FP16 is not supported on CPU; using FP32 instead")
 
-class ConfigManager:
-    """アプリケーション設定を管理するクラス"""
-    
-    DEFAULT_CONFIG = {
-        "whisper": {
-            "model": "large-v3",  # 最高精度のlarge-v3モデルを使用
-            "language": "ja",
-            "initial_prompt": "これは日本語の会話音声です。正確な文字起こしをお願いします。",
-            "temperature": 0.0,  # 決定的な出力のため0に設定
-            "beam_size": 5,
-            "condition_on_previous": True,
-            "word_timestamps": True,
-            "best_of": 5,  # 複数候補から最良を選択
-            "patience": 1.0  # ビーム探索の忍耐度
-        },        "audio": {
-            "sample_rate": 44100,
-            "channels": 2,
-            "format": "wav",
-            "preprocessing": True  # 音声前処理を有効化
-        },
-        "segmentation": {
-            "threshold": 0.5,
-            "min_segment_length": 0.2,
-            "max_segment_length": 30.0,
-            "merge_threshold": 0.3
-        },
-        "edl": {
-            "title": "MP4 to EDL Project",
-            "fcm": "NON-DROP FRAME",
-            "use_timecode_offset": True
-        },
-        "paths": {
-            "last_input_folder": "",
-            "last_output_folder": ""
-        },
-        "gui": {
-            "theme": "default",
-            "font_size": 10,
-            "window_width": 800,
-            "window_height": 900
-        }
-    }
-    
-    def __init__(self, config_path="config.json"):
-        """設定を初期化"""
-        self.config_path = config_path
-        self.config = self.load_config()
-    
-    def load_config(self):
-        """設定ファイルを読み込む"""
-        if os.path.exists(self.config_path):
-            try:
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    loaded_config = json.load(f)
-                    
-                # デフォルト設定をベースに、ロードした設定で上書き
-                config = self.DEFAULT_CONFIG.copy()
-                self._update_nested_dict(config, loaded_config)
-                return config
-            except Exception as e:
-                print(f"設定ファイル読み込みエラー: {e}")
-                return self.DEFAULT_CONFIG.copy()
-        else:
-            # 設定ファイルがない場合はデフォルト設定を保存
-            self._save_config(self.DEFAULT_CONFIG)
-            return self.DEFAULT_CONFIG.copy()
-    
-    def _update_nested_dict(self, d, u):
-        """ネストされた辞書を再帰的に更新"""
-        for k, v in u.items():
-            if isinstance(v, dict) and k in d and isinstance(d[k], dict):
-                self._update_nested_dict(d[k], v)
-            else:
-                d[k] = v
-    
-    def save_config(self):
-        """現在の設定をファイルに保存"""
-        self._save_config(self.config)
-    
-    def _save_config(self, config):
-        """設定をJSONファイルに保存"""
-        try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"設定ファイル保存エラー: {e}")
-    
-    def get(self, section, key=None):
-        """設定値を取得"""
-        if key is None:
-            return self.config.get(section, {})
-        return self.config.get(section, {}).get(key)
-    
-    def set(self, section, key, value):
-        """設定値を設定"""
-        if section not in self.config:
-            self.config[section] = {}
-        self.config[section][key] = value
-    
-    def update_section(self, section, values):
-        """セクション全体を更新"""
-        if section not in self.config:
-            self.config[section] = {}
-        self.config[section].update(values)
+# この数以上のセグメントはNumPyの配列演算でまとめてEDLイベントにする（セグメントごとのログも省略）
+EDL_BATCH_THRESHOLD = 200
+
 
 class MP4File:
-    def __init__(self, filepath: str, file_index: int):
+    def __init__(self, filepath: str, file_index: int,
+                 transcription_cache: Optional[TranscriptionCache] = None,
+                 audio_source: str = "file", chunk_minutes: Optional[float] = None,
+                 chunk_overlap: float = 2.0, chunk_workers: int = 2,
+                 resegment_options: Optional[ResegmentOptions] = None, vad: Optional[VADOptions] = None,
+                 adaptive: Optional[AdaptiveOptions] = None, config: Optional[TranscriptionConfig] = None,
+                 probe: bool = True, movie_info: Optional[MovieInfo] = None,
+                 known_transcription: Optional[Dict[str, Any]] = None):
         self.filepath: str = os.path.normpath(filepath)
         self.file_index: int = file_index  # For reel name (e.g., TAPE01)
+        self.transcription_cache: Optional[TranscriptionCache] = transcription_cache
+        # メディアカタログに記録した前回の文字起こし（{"params": ..., "result": ...}。ファイルは変更なし）
+        self.known_transcription: Optional[Dict[str, Any]] = known_transcription
+        # "file": WAVファイルに書き出す / "pipe": FFmpegのPCM出力をメモリ上で直接ASRに渡す
+        self.audio_source: str = audio_source
         self.audio_filepath: str = ""
+        self.audio_array: Optional[np.ndarray] = None  # audio_source="pipe"の場合の16kHz PCM
+        # 長時間ファイルモード: 約chunk_minutes分のチャンクに分割して並列に文字起こしする
+        self.chunk_minutes: Optional[float] = chunk_minutes
+        self.chunk_overlap: float = chunk_overlap  # チャンク間の重なり（秒）
+        self.chunk_workers: int = chunk_workers
+        # 指定された場合、Whisperのセグメントではなく単語のタイムスタンプからセグメントを作る
+        self.resegment_options: Optional[ResegmentOptions] = resegment_options
+        # 指定された場合、エネルギーによる音声区間検出で無音部分を除いてからASRに渡す
+        self.vad: Optional[VADOptions] = vad
+        # モデル・デコード・セグメント化の設定（ConfigManager.resolveで解決したもの）
+        self.config: TranscriptionConfig = config or TranscriptionConfig()
+        # 指定された場合、貪欲法でデコードし、信頼度の低い区間だけビームサーチで再デコードする
+        self.adaptive: Optional[AdaptiveOptions] = adaptive
         self.transcription_result: Dict = {}
-        self.segments: List[Segment] = []
+        self.transcription_params: Dict[str, Any] = {}  # 文字起こしに使ったパラメータ（カタログに記録）
+        # この実行で2段階デコードした場合の再デコードの集計（キャッシュから読み込んだ場合はNone）
+        self.adaptive_report: Optional[Dict[str, Any]] = None
+        self.segments: SegmentStore = SegmentStore(DEFAULT_RATE)  # 列形式で保持するセグメント
         self.edl_data: EDLData = EDLData(title="My Video Project", fcm="NON-DROP FRAME")
-        self.srt_data: SRTData = SRTData()
+        self.edl_source_events: List[Dict] = []  # レコード配置前のEDLイベント
         self.creation_time: Optional[str] = None
-        self.timecode_offset: Optional[str] = None
+        # EDL/SRTのフレームレートとドロップフレームの有無（タイムコードトラックから。なければ30fpsノンドロップ）
+        self.frame_rate: Fraction = DEFAULT_RATE
+        self.drop_frame: bool = False
+        self.timecode_offset: Optional[Timecode] = None
         self.duration: Optional[float] = None  # 動画の長さ（秒単位）
+        # 音声抽出から字幕化までにかかった時間（秒）。キャッシュから復元した場合はNone
+        self.processing_seconds: Optional[float] = None
         
-        # ファイルのメタデータを抽出
-        self.extract_metadata()
+        # ファイルのメタデータを抽出（保存済みの文字起こしから復元する場合は不要）。
+        # 事前チェックで読んだメタデータ（movie_info）があればファイルを読み直さない
+        if probe:
+            self.extract_metadata(movie_info)
+
+    def transcript_entry(self) -> Dict[str, Any]:
+        """
+        Returns the file's transcript with word timestamps and the metadata needed to rebuild its EDL/SRT.
+
+        プロジェクトの output.transcript.jsonl に1行ずつ保存され、
+        from_transcript で音声抽出と文字起こしをせずに再セグメント化できます。
+        """
+        return {
+            "file": self.filepath,
+            "file_index": self.file_index,
+            "duration": self.duration,
+            "timecode_offset": self.timecode_offset.to_cmx() if self.timecode_offset else None,
+            "frame_rate": str(self.frame_rate),
+            "drop_frame": self.drop_frame,
+            "language": self.transcription_result.get("language"),
+            "segments": self.transcription_result.get("segments", []),
+        }
+
+    @classmethod
+    def from_transcript(cls, entry: Dict[str, Any], **kwargs: Any) -> "MP4File":
+        """
+        Restores a transcribed file from a transcript_entry without probing or transcribing it.
+
+        Args:
+            entry: A dictionary returned by transcript_entry.
+            **kwargs: Other MP4File arguments (e.g. resegment_options).
+
+        Returns:
+            The MP4File, ready for segment_audio and EDL generation.
+        """
+        mp4_file = cls(entry["file"], entry["file_index"], probe=False, **kwargs)
+        mp4_file.duration = entry.get("duration")
+        # フレームレートを保存していない古いトランスクリプトは30fpsノンドロップ
+        mp4_file.set_frame_rate(Fraction(entry.get("frame_rate", str(DEFAULT_RATE))), bool(entry.get("drop_frame")))
+        if entry.get("timecode_offset"):
+            mp4_file.timecode_offset = Timecode.parse(entry["timecode_offset"], mp4_file.frame_rate)
+        else:
+            mp4_file.timecode_offset = Timecode(0, mp4_file.frame_rate, mp4_file.drop_frame)
+        segments = entry.get("segments", [])
+        mp4_file.transcription_result = {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": entry.get("language"),
+        }
+        return mp4_file
+
+    def set_frame_rate(self, rate: Fraction, drop_frame: bool = False) -> None:
+        """
+        Sets the frame rate and timecode numbering of the file's segments and EDL events.
 
-    def extract_metadata(self) -> None:
-        """MP4ファイルからメタデータ（作成時間やタイムコード）を抽出します。"""
+        Args:
+            rate: Frame rate (snapped to a standard rate within 1/100 fps).
+            drop_frame: Drop-frame numbering (ignored for rates without drop-frame).
+        """
+        self.frame_rate = standard_rate(rate)
+        self.drop_frame = drop_frame and self.frame_rate in DROP_FRAME_RATES
+        self.segments = SegmentStore(self.frame_rate, self.drop_frame)
+
+    def extract_metadata(self, info: Optional[MovieInfo] = None) -> None:
+        """
+        MP4ファイルからメタデータ（作成時間やタイムコード）を抽出します。
+
+        Args:
+            info: Metadata already read by the pre-flight check (None: read the file).
+        """
         try:
-            print(f"ファイルのメタデータを抽出中: {self.filepath}")
-            
-            # FFprobeを使用してメタデータを抽出
-            command = [
-                "ffprobe",
-                "-v", "quiet",
-                "-print_format", "json",
-                "-show_format",
-                "-show_streams",
-                self.filepath
-            ]
+            if info is None:
+                print(f"ファイルのメタデータを抽出中: {self.filepath}")
+                # MP4/MOVのボックスから直接読む（数KBの読み込みで済む）。読めない形式はFFprobeを使う
+                info = read_movie_info(self.filepath)
+                if info is None:
+                    print("ボックスを解析できない形式のため、FFprobeでメタデータを取得します")
+                    info = ffprobe_movie_info(self.filepath)
+            else:
+                print(f"事前チェックのメタデータを使用: {self.filepath}")
             
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-            metadata = json.loads(result.stdout)
+            # タイムコードのフレームレートとドロップフレーム（HH:MM:SS;FF）をEDL/SRTでも使う
+            if info.frame_rate:
+                self.set_frame_rate(info.frame_rate, bool(info.timecodes) and ";" in info.timecodes[0])
+                print(f"フレームレート: {float(self.frame_rate):.3f}fps"
+                      f"{' (ドロップフレーム)' if self.drop_frame else ''}")
             
             # 動画の長さを取得
-            if "format" in metadata and "duration" in metadata["format"]:
-                self.duration = float(metadata["format"]["duration"])
-                print(f"ビデオの長さ: {self.duration} 秒 ({self._seconds_to_timecode(self.duration)})")
+            if info.duration is not None:
+                self.duration = info.duration
+                print(f"ビデオの長さ: {self.duration} 秒 "
+                      f"({Timecode.from_seconds(self.duration, self.frame_rate, self.drop_frame)})")
             
             # creation_timeを探す
-            if "format" in metadata and "tags" in metadata["format"]:
-                tags = metadata["format"]["tags"]
-                if "creation_time" in tags:
-                    self.creation_time = tags["creation_time"]
-                    print(f"ファイル作成時間: {self.creation_time}")
-                    
-                    # creation_timeからタイムコードオフセットを計算
-                    try:
-                        # ISO 8601形式の日時文字列をパース (例: 2023-01-01T12:00:00.000Z)
-                        dt = datetime.fromisoformat(self.creation_time.replace('Z', '+00:00'))
-                        # 時間部分だけを取得してタイムコードに変換
-                        hours = dt.hour
-                        minutes = dt.minute
-                        seconds = dt.second
-                        frames = int(dt.microsecond / 1000000 * 30)  # 30fpsとして計算
-                        
-                        self.timecode_offset = f"{hours:02d}:{minutes:02d}:{seconds:02d}:{frames:02d}"
-                        print(f"計算されたタイムコードオフセット: {self.timecode_offset}")
-                    except Exception as e:
-                        print(f"タイムコードオフセットの計算中にエラーが発生しました: {e}")
+            if info.creation_time:
+                self.creation_time = info.creation_time
+                print(f"ファイル作成時間: {self.creation_time}")
+                
+                # creation_timeからタイムコードオフセットを計算
+                try:
+                    # ISO 8601形式の日時文字列をパース (例: 2023-01-01T12:00:00.000Z)
+                    dt = datetime.fromisoformat(self.creation_time.replace('Z', '+00:00'))
+                    # 時間部分だけを取得してタイムコードに変換
+                    self.timecode_offset = (
+                        Timecode.from_components(dt.hour, dt.minute, dt.second, 0, self.frame_rate, self.drop_frame)
+                        + Timecode.from_seconds(dt.microsecond / 1000000, self.frame_rate, self.drop_frame)
+                    )
+                    print(f"計算されたタイムコードオフセット: {self.timecode_offset}")
+                except Exception as e:
+                    print(f"タイムコードオフセットの計算中にエラーが発生しました: {e}")
             
             # タイムコードトラックを探す
-            for stream in metadata.get("streams", []):
-                if stream.get("codec_type") == "video" and "tags" in stream:
-                    tags = stream["tags"]
-                    if "timecode" in tags:
-                        # タイムコードトラックが存在する場合はそれを優先
-                        self.timecode_offset = tags["timecode"]
-                        print(f"ビデオストリームからタイムコードを検出: {self.timecode_offset}")
-                        break
+            for timecode in info.timecodes:
+                # タイムコードトラックが存在する場合はそれを優先
+                try:
+                    self.timecode_offset = Timecode.parse(timecode, self.frame_rate)
+                except ValueError as e:
+                    print(f"警告: ビデオストリームのタイムコードを解析できませんでした: {e}")
+                    continue
+                print(f"ビデオストリームからタイムコードを検出: {self.timecode_offset}")
+                break
             
             if not self.timecode_offset:
                 print(f"警告: タイムコードが検出されませんでした。デフォルトの00:00:00:00を使用します。")
-                self.timecode_offset = "00:00:00:00"
+                self.timecode_offset = Timecode(0, self.frame_rate, self.drop_frame)
                 
         except subprocess.CalledProcessError as e:
             print(f"FFprobeエラー: {e.stderr}")
             print(f"警告: メタデータの抽出に失敗しました。デフォルトのタイムコードを使用します。")
-            self.timecode_offset = "00:00:00:00"
+            self.timecode_offset = Timecode(0, self.frame_rate, self.drop_frame)
         except Exception as e:
             print(f"メタデータ抽出中にエラーが発生しました: {str(e)}")
             print(f"警告: デフォルトのタイムコードを使用します。")
-            self.timecode_offset = "00:00:00:00"
+            self.timecode_offset = Timecode(0, self.frame_rate, self.drop_frame)
 
-    def apply_timecode_offset(self, timecode: str) -> str:
+    def apply_timecode_offset(self, timecode: Timecode) -> Timecode:
         """
         タイムコードにオフセットを適用します。
         
         Args:
-            timecode: 元のタイムコード (HH:MM:SS:FF形式)
+            timecode: 元のタイムコード
             
         Returns:
             オフセットが適用されたタイムコード
         """
-        if not self.timecode_offset or self.timecode_offset == "00:00:00:00":
+        if not self.timecode_offset or not self.timecode_offset.frames:
             return timecode
             
-        # タイムコードを秒に変換
-        tc_seconds = self._timecode_to_seconds(timecode)
-        offset_seconds = self._timecode_to_seconds(self.timecode_offset)
-        
-        # オフセットを適用
-        result_seconds = tc_seconds + offset_seconds
-          # 秒をタイムコードに戻す
-        return self._seconds_to_timecode(result_seconds)
+        # フレーム数の加算なので丸め誤差は生じない
+        return timecode + self.timecode_offset
 
     def extract_audio(self) -> None:
         """Extracts audio from the MP4 file using FFmpeg with enhanced quality."""
+        if self.audio_source == "pipe":
+            self._load_audio_array()
+            return
+        
         base_name = os.path.splitext(os.path.basename(self.filepath))[0]
         output_dir = os.path.dirname(self.filepath)
         self.audio_filepath = os.path.join(output_dir, f"{base_name}.wav")
@@ -264,200 +256,396 @@ class MP4File:
             print(f"FFmpegエラー: {e.stderr}")
             raise Exception(f"FFmpeg error: {e.stderr}")
 
+    def _faster_whisper_params(self) -> Dict[str, Any]:
+        """Returns the model and decode parameters of the faster-whisper backend."""
+        return {
+            "backend": "faster-whisper",
+            "model": self.config.model,
+            "device": self.config.device,
+            "compute_type": self.config.compute_type,
+            "language": self.config.language,
+            "initial_prompt": self.config.initial_prompt,  # 統一されたプロンプト
+            "condition_on_previous_text": self.config.condition_on_previous_text,
+            "temperature": self.config.temperature,
+            "beam_size": self.config.beam_size,
+            "word_timestamps": self.config.word_timestamps,
+            "vad_filter": self.config.vad_filter,  # 音声区間検出フィルタ
+            "vad_parameters": {"min_silence_duration_ms": self.config.vad_min_silence_ms},  # 無音区間のパラメータ
+            "audio_source": self.audio_source,
+            "preprocessing": self._preprocessing_enabled(),
+            "chunking": self._chunking_params(),
+            "vad": self.vad._asdict() if self.vad else None,
+            "batched": {"batch_size": self.config.batch_size} if self._batched_inference() else None,
+            "adaptive": self.adaptive._asdict() if self.adaptive else None,
+        }
+
+    def _batched_inference(self) -> bool:
+        # バッチ推論パイプラインのないfaster-whisperでは通常のモードで文字起こしする
+        return self.config.mode == "batched" and batched_inference_available()
+
+    def _whisper_params(self, initial_prompt: Optional[str]) -> Dict[str, Any]:
+        """Returns the model and decode parameters of the openai-whisper backend."""
+        return {
+            "backend": "whisper",
+            "model": self.config.whisper_model,  # GPUメモリが足りなければより小さいモデルを選択
+            "language": self.config.language,
+            "temperature": self.config.temperature,
+            "beam_size": self.config.beam_size,
+            "best_of": self.config.best_of,
+            "patience": self.config.patience,
+            "initial_prompt": initial_prompt or self.config.initial_prompt,
+            "condition_on_previous_text": self.config.condition_on_previous_text,
+            "word_timestamps": self.config.word_timestamps,
+            "audio_source": self.audio_source,
+            "preprocessing": self._preprocessing_enabled(),
+            "chunking": self._chunking_params(),
+            "vad": self.vad._asdict() if self.vad else None,
+            "adaptive": self.adaptive._asdict() if self.adaptive else None,
+        }
+
+    def _fake_params(self) -> Dict[str, Any]:
+        """Returns the parameters of the fake backend (synthetic segments, no model)."""
+        return {
+            "backend": "fake",
+            "model": "fake",
+            "language": self.config.language,
+            "speed": self.config.fake_speed,
+            "segment_seconds": self.config.fake_segment_seconds,
+            "audio_source": self.audio_source,
+            "preprocessing": self._preprocessing_enabled(),
+            "chunking": self._chunking_params(),
+            "vad": self.vad._asdict() if self.vad else None,
+            "adaptive": self.adaptive._asdict() if self.adaptive else None,
+        }
+
+    def _transcription_params(self, initial_prompt: Optional[str]) -> Dict[str, Any]:
+        """Returns the parameters of the backend transcribe() will use."""
+        backend = resolve_backend(self.config.backend)
+        if backend == "faster-whisper":
+            return self._faster_whisper_params()
+        if backend == "fake":
+            return self._fake_params()
+        return self._whisper_params(initial_prompt)
+
+    def _can_fall_back(self, params: Dict[str, Any]) -> bool:
+        # 自動で選んだfaster-whisperが失敗した場合だけ標準のwhisperで文字起こしし直す
+        return params["backend"] == "faster-whisper" and self.config.backend == "auto"
+
+    def _chunking_params(self) -> Optional[Dict[str, Any]]:
+        """Returns the long-file chunking settings, or None if the file is transcribed in one pass."""
+        if not self.chunk_minutes or not self.duration:
+            return None
+        chunk_seconds = self.chunk_minutes * 60
+        # チャンク長の1.5倍より短いファイルは分割しない
+        if self.duration <= chunk_seconds * 1.5:
+            return None
+        return {"chunk_seconds": chunk_seconds, "overlap_seconds": self.chunk_overlap}
+
+    def _compact_speech(self, audio_input: Any, params: Dict[str, Any]) -> Tuple[Any, Optional[TimeMap]]:
+        """
+        Removes silent stretches before ASR when the VAD pre-pass is enabled.
+
+        Args:
+            audio_input: Path to an audio file or 16 kHz float32 samples.
+            params: Backend parameters (params["vad"] holds the VAD settings).
+
+        Returns:
+            A tuple of the audio to transcribe and the map from its timestamps back to the
+            recording. The audio is None when no speech was found; the map is None when
+            the pre-pass is disabled (audio_input is returned unchanged).
+        """
+        if not params.get("vad"):
+            return audio_input, None
+        options = VADOptions(**params["vad"])
+        
+        if isinstance(audio_input, np.ndarray):
+            energy = frame_energy_db(audio_input)
+        else:
+            # WAVをチャンクごとに読みながらエネルギーだけを計算（この時点では音声全体を読み込まない）
+            energy = frame_energy_db(iter_pcm_chunks(audio_input, filters=None))
+        regions = detect_speech(energy, options)
+        total = len(energy) * FRAME_SECONDS
+        if not regions:
+            print(f"音声区間が検出されませんでした ({total:.1f}秒)。文字起こしを省略します")
+            return None, TimeMap([])
+        
+        speech = sum(end - start for start, end in regions)
+        print(f"音声区間: {len(regions)}個, 合計 {speech:.1f}秒 / {total:.1f}秒 ({speech / max(total, 1e-9):.0%})")
+        if not isinstance(audio_input, np.ndarray):
+            audio_input = load_pcm(audio_input, duration=self.duration, filters=None)
+        return compact_audio(audio_input, regions), TimeMap(regions)
+
+    def _transcribe_audio(self, audio_input: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Transcribes audio in one pass, or as parallel chunks in long-file mode."""
+        # 音声区間検出（オプション）: 音声区間だけをつなげて文字起こしし、時刻を元の録音に戻す
+        audio_input, time_map = self._compact_speech(audio_input, params)
+        if time_map is not None:
+            if audio_input is None:
+                return {"text": "", "segments": [], "language": params["language"]}
+            result = self._transcribe_audio(audio_input, {**params, "vad": None})
+            result["segments"] = [time_map.map_segment(segment) for segment in result["segments"]]
+            return result
+        
+        # 2段階デコード（オプション）: 貪欲法で全体を文字起こしし、信頼度の低い区間だけビームサーチで再デコードする
+        adaptive = params.get("adaptive")
+        if adaptive:
+            if isinstance(audio_input, np.ndarray):
+                total_seconds = len(audio_input) / SAMPLE_RATE
+            else:
+                total_seconds = self.duration or 0.0
+            return transcribe_adaptive(
+                audio_input, {**params, "adaptive": None}, self._transcribe_audio, run_asr,
+                lambda: load_pcm(audio_input, duration=self.duration, filters=None),
+                AdaptiveOptions(**adaptive), total_seconds,
+            )
+        
+        chunking = params.get("chunking")
+        if not chunking:
+            return run_asr(audio_input, params)
+
+        if isinstance(audio_input, np.ndarray):
+            audio = audio_input
+        else:
+            # 抽出済み（フィルタ適用済み）のWAVを16kHzのPCMとして読み込む
+            audio = load_pcm(audio_input, duration=self.duration, filters=None)
+        # GPUを使うバックエンド（標準のwhisper）では、チャンクはこのプロセスで順番に処理する
+        workers = self.chunk_workers if get_backend(params["backend"]).parallel_chunks else 1
+        return transcribe_long(
+            audio, params, run_asr,
+            chunk_seconds=chunking["chunk_seconds"],
+            overlap_seconds=chunking["overlap_seconds"],
+            workers=workers,
+        )
+
+    def _preprocessing_enabled(self) -> bool:
+        # パイプ入力では前処理（ファイルベース）は行わない
+        if self.audio_source == "pipe":
+            return False
+        return self.config.preprocessing
+
+    def load_cached_transcription(self, initial_prompt: str = None) -> bool:
+        """
+        Loads the transcription result from the media catalog or the transcription cache.
+
+        Args:
+            initial_prompt: The initial prompt transcribe() would be called with.
+
+        Returns:
+            True if a cached result was found (audio extraction and ASR can be skipped).
+        """
+        params = self._transcription_params(initial_prompt)
+        # カタログの記録はJSONから読んだものなので、同じ形にしてから比べる
+        if self.known_transcription is not None and \
+                self.known_transcription["params"] == json.loads(json.dumps(params)):
+            self.transcription_result = self.known_transcription["result"]
+            self.transcription_params = params
+            print(f"カタログから文字起こし結果を読み込みました: "
+                  f"{len(self.transcription_result.get('segments', []))}セグメント")
+            return True
+        if self.transcription_cache is None:
+            return False
+        try:
+            key = self.transcription_cache.key_for(self.filepath, params)
+        except OSError:
+            return False
+        result = self.transcription_cache.get(key)
+        if result is None:
+            return False
+        self.transcription_result = result
+        self.transcription_params = params
+        print(f"キャッシュから文字起こし結果を読み込みました: {len(result.get('segments', []))}セグメント")
+        return True
+
+    def _store_transcription(self, params: Dict[str, Any]) -> None:
+        """Stores the current transcription result in the transcription cache."""
+        self.transcription_params = params
+        if self.transcription_cache is None:
+            return
+        try:
+            key = self.transcription_cache.key_for(self.filepath, params)
+            self.transcription_cache.put(key, self.transcription_result, meta={
+                "source": self.filepath,
+                "backend": params["backend"],
+                "model": params["model"],
+            })
+        except OSError as e:
+            print(f"警告: 文字起こし結果をキャッシュに保存できませんでした: {e}")
+
+    def _load_audio_array(self) -> None:
+        """Decodes the audio into memory as 16 kHz float32 PCM through an FFmpeg pipe."""
+        print(f"音声をメモリに読み込み中 (16kHz float32, パイプ出力): {self.filepath}")
+        self.audio_array = load_pcm(self.filepath, duration=self.duration)
+        print(f"音声を読み込みました: {len(self.audio_array) / SAMPLE_RATE:.1f}秒")
+
+    def _prepare_audio_input(self, initial_prompt: Optional[str]) -> Any:
+        """Returns the audio passed to the ASR backend (a file path or in-memory samples)."""
+        if self.audio_source == "pipe":
+            if self.audio_array is None:
+                self._load_audio_array()
+        elif not os.path.exists(self.audio_filepath):
+            raise FileNotFoundError(f"音声ファイルが見つかりません: {self.audio_filepath}")
+        
+        # PyTorchの警告を抑制
+        warnings.filterwarnings("ignore", category=FutureWarning, module="whisper")
+        
+        # GPUメモリの最適化設定
+        os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'max_split_size_mb:512,expandable_segments:True'
+        
+        # 音声ファイルの前処理（オプション）
+        if self.audio_source == "pipe":
+            # メモリ上のPCMをそのまま渡す（WAVの書き出し・再読み込み・再サンプリングなし）
+            audio_input = self.audio_array
+        elif self._preprocessing_enabled():
+            print("音声前処理を実行します...")
+            audio_input = self._preprocess_audio(self.audio_filepath)
+        else:
+            print("音声前処理をスキップします - 元の音声ファイルを使用")
+            audio_input = self.audio_filepath
+        # 初期プロンプトが指定されていない場合はデフォルト値を使用
+        if initial_prompt is None:
+            # より具体的な初期プロンプトを使用
+            initial_prompt = self.config.initial_prompt
+            
+        print(f"文字起こし中: {self.filepath if self.audio_source == 'pipe' else audio_input}")
+        print(f"使用する初期プロンプト: {initial_prompt}")
+        return audio_input
+
     def transcribe(self, initial_prompt: str = None) -> None:
         """Transcribes the audio file using Whisper with word-level timestamps."""
         try:
-            if not os.path.exists(self.audio_filepath):
-                raise FileNotFoundError(f"音声ファイルが見つかりません: {self.audio_filepath}")
+            # 同じファイル・同じパラメータの結果がキャッシュにあればASRを省略
+            if self.load_cached_transcription(initial_prompt):
+                return
             
-            # PyTorchの警告を抑制
-            warnings.filterwarnings("ignore", category=FutureWarning, module="whisper")
-            
-            # GPUメモリの最適化設定
-            os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'max_split_size_mb:512,expandable_segments:True'
-            
-            # 音声前処理の有効/無効を環境変数から取得
-            enable_preprocessing = os.environ.get("ENABLE_AUDIO_PREPROCESSING", "True").lower() == "true"
-            
-            # 音声ファイルの前処理（オプション）
-            audio_file_to_use = self.audio_filepath
-            if enable_preprocessing:
-                print("音声前処理を実行します...")
-                audio_file_to_use = self._preprocess_audio(self.audio_filepath)
-            else:
-                print("音声前処理をスキップします - 元の音声ファイルを使用")
-              # 初期プロンプトが指定されていない場合はデフォルト値を使用
-            if initial_prompt is None:
-                # より具体的な初期プロンプトを使用
-                initial_prompt = "これは日本語の会話音声です。正確な文字起こしをお願いします。"
-                
-            print(f"文字起こし中: {audio_file_to_use}")
-            print(f"使用する初期プロンプト: {initial_prompt}")
+            audio_input = self._prepare_audio_input(initial_prompt)
 
-            # faster-whisperが利用可能で、高速モードが選択されている場合
-            use_faster_whisper = FASTER_WHISPER_AVAILABLE
-            
-            if use_faster_whisper:
-                print("faster-whisperを使用して文字起こしを実行します（高速モード）")
-                # CTranslate2最適化されたモデルを使用
-                try:
-                    # 高速なwhisperモデルを使用 - 常にCPUで実行
-                    model = WhisperModel(
-                        model_size_or_path="deepdml/faster-whisper-large-v3-turbo-ct2", 
-                        device="cpu",  # 常にCPUを使用 
-                        compute_type="int8"  # int8量子化で効率的に実行
-                    )
-                    
-                    print("モデル情報: large-v3-turbo (CPU, int8量子化)")
-                      # faster-whisperのTranscribeオプション
-                    segments, info = model.transcribe(
-                        audio_file_to_use,
-                        language="ja",
-                        task="transcribe",
-                        initial_prompt="これは日本語の会話音声です。正確な文字起こしをお願いします。",  # 統一されたプロンプト
-                        condition_on_previous_text=True,
-                        temperature=0.0,  # より決定的な出力
-                        beam_size=5,
-                        word_timestamps=True,
-                        vad_filter=True,  # 音声区間検出フィルタを有効化
-                        vad_parameters={"min_silence_duration_ms": 500}  # 無音区間のパラメータ
-                    )
-                    
-                    print(f"検出された言語: {info.language} (確度: {info.language_probability:.2f})")
-                    
-                    # セグメントを保存
-                    self.segments = []
-                    for segment in segments:
-                        words = []
-                        if hasattr(segment, 'words') and segment.words:
-                            for word in segment.words:
-                                words.append({
-                                    "word": word.word,
-                                    "start": word.start,
-                                    "end": word.end,
-                                    "probability": word.probability
-                                })
-                        
-                        # faster-whisperのセグメントをアプリケーション形式に変換
-                        # start -> start_timecode, end -> end_timecode, text -> transcription
-                        start_timecode = self._seconds_to_timecode(segment.start)
-                        end_timecode = self._seconds_to_timecode(segment.end)
-                        self.segments.append(Segment(
-                            start_timecode=start_timecode,
-                            end_timecode=end_timecode,
-                            transcription=segment.text
-                        ))
-                    
-                    # 結果を保存
-                    self.transcription_result = {
-                        "text": " ".join([segment.text for segment in segments]),
-                        "segments": [{
-                            "start": segment.start,
-                            "end": segment.end,
-                            "text": segment.text
-                        } for segment in segments],
-                        "language": info.language
-                    }
-                    
-                    # EDLとSRTデータを生成
-                    self.generate_edl_data("00:00:00:00")
-                    self.generate_srt_data()
-                    return
-                    
-                except Exception as e:
-                    print(f"faster-whisperでのエラー: {str(e)}")
-                    print("標準のwhisperにフォールバックします...")
-            
-            # 標準のwhisperを使用する場合は、ここから下の既存のコードを実行
-            # 勾配計算を無効化
-            torch.set_grad_enabled(False)
-            
-            # CUDA初期化前の設定
-            if torch.cuda.is_available():
-                # GPUキャッシュをクリア
-                torch.cuda.empty_cache()
-                # メモリの断片化を防ぐ
-                torch.cuda.memory.set_per_process_memory_fraction(0.8)  # GPUメモリの80%まで使用に制限
-                # CUDAストリームを同期
-                torch.cuda.synchronize()
-                
-                # CUBLASワークスペースを制限
-                os.environ['CUBLAS_WORKSPACE_CONFIG'] = ':4096:8'
-                
-                # 利用可能なGPUメモリをチェック
-                total_memory = torch.cuda.get_device_properties(0).total_memory
-                available_memory = total_memory - torch.cuda.memory_allocated(0)
-                print(f"利用可能なGPUメモリ: {available_memory / 1024**3:.2f} GB")
-            
-            # モデルロードの関数を定義
-            def load_model_safely(model_name, device):
-                try:
-                    # 古いバージョンのWhisperでは一部のパラメータがサポートされていないため削除
-                    model = whisper.load_model(
-                        model_name,
-                        device=device,
-                        download_root=os.path.join(os.path.expanduser("~"), ".cache", "whisper")
-                    )
-                    return model
-                except Exception as e:
-                    print(f"モデルロード中のエラー: {str(e)}")
-                    return None
-              # モデルサイズの要件（より現実的な見積もり）
-            model_memory_requirements = {
-                "large-v3": 10 * 1024**3,    # 10GB
-                "large-v2": 10 * 1024**3,    # 10GB  
-                "medium": 5 * 1024**3,       # 5GB
-                "small": 2 * 1024**3         # 2GB
-            }
-            
-            # モデル選択
-            model = None
-            
-            if torch.cuda.is_available():
-                # 利用可能なメモリに基づいてモデルを選択
-                for model_name, required_memory in model_memory_requirements.items():
-                    if available_memory >= required_memory * 1.2:  # 20%のバッファを追加
-                        print(f"選択したモデル: {model_name} (必要メモリ: {required_memory / 1024**3:.1f}GB)")
-                        model = load_model_safely(model_name, "cuda")
-                        if model is not None:
-                            print(f"{model_name}モデルのロードに成功しました")
-                            break
-                        else:
-                            torch.cuda.empty_cache()
-                            torch.cuda.synchronize()
-            
-            # どのモデルもロードできなかった場合、CPUでsmallモデルを使用
-            if model is None:
-                print("警告: GPUモデルのロードに失敗したため、CPUでsmallモデルを使用します")
-                model = load_model_safely("small", "cpu")
-                if model is None:
-                    raise Exception("すべてのモデルのロードに失敗しました")
-                print("smallモデルをCPUにロードしました")
-              # 文字起こしを実行
-            transcribe_options = {
-                "language": "ja",
-                "task": "transcribe",
-                "temperature": 0.0,  # 決定的な出力
-                "beam_size": 5,
-                "best_of": 5,  # 複数候補から最良を選択
-                "patience": 1.0,
-                "initial_prompt": initial_prompt,
-                "condition_on_previous_text": True,
-                "verbose": True,
-                "fp16": False,  # 精度を優先
-                "suppress_tokens": [-1],  # 特殊トークンを抑制
-                "word_timestamps": True  # 単語レベルのタイムスタンプ
-            }
-            
-            # 文字起こしを実行
-            result = model.transcribe(audio_file_to_use, **transcribe_options)
-            
-            self.transcription_result = result
+            params = self._transcription_params(initial_prompt)
+            print(f"{params['backend']}を使用して文字起こしを実行します")
+            try:
+                self.transcription_result = self._transcribe_audio(audio_input, params)
+            except Exception as e:
+                if not self._can_fall_back(params):
+                    raise
+                print(f"faster-whisperでのエラー: {str(e)}")
+                print("標準のwhisperにフォールバックします...")
+                params = self._whisper_params(initial_prompt)
+                self.transcription_result = self._transcribe_audio(audio_input, params)
+            # 集計はこの実行の結果としてだけ報告する（キャッシュには保存しない）
+            self.adaptive_report = self.transcription_result.pop("adaptive", None)
+            self._store_transcription(params)
             
             print(f"文字起こし完了: {len(self.transcription_result.get('segments', []))}セグメント")
         except Exception as e:
             print(f"文字起こし中にエラーが発生しました: {str(e)}")
             raise Exception(f"Whisper transcription error: {e}")
+        finally:
+            # メモリ上の音声は文字起こし後に不要（ワーカーから返すオブジェクトにも含めない）
+            self.audio_array = None
+
+    @classmethod
+    def transcribe_batch(cls, mp4_files: List["MP4File"], initial_prompt: str = None,
+                         gap_seconds: float = 1.0) -> None:
+        """
+        Transcribes several short files in one ASR pass and gives each file its own result.
+
+        各ファイルの音声を16kHzのPCMとしてメモリに読み込み、短い無音を挟んで1つのバッファに
+        つなげて1回だけ文字起こしします（モデルの準備・言語判定・プロンプトの処理が1回で済む）。
+        セグメントはオフセット表で各ファイルに戻すため、リール名とソースタイムコードは
+        ファイルごとに処理した場合と同じ規則で付きます。結果はファイルごとにキャッシュに保存します。
+
+        Args:
+            mp4_files: Files in processing order (their audio_source should be "pipe").
+            initial_prompt: Initial prompt passed to Whisper.
+            gap_seconds: Silence inserted between neighbouring files.
+        """
+        clips = []
+        for mp4_file in mp4_files:
+            mp4_file._load_audio_array()
+            clips.append(mp4_file.audio_array)
+            mp4_file.audio_array = None
+        buffer, spans = concatenate_clips(clips, gap_seconds)
+        del clips
+        
+        first = mp4_files[0]
+        params = first._transcription_params(initial_prompt)
+        print(f"{len(mp4_files)}個の短いファイルをまとめて文字起こしします "
+              f"(合計 {len(buffer) / SAMPLE_RATE:.1f}秒, バックエンド: {params['backend']})")
+        result = first._transcribe_audio(buffer, params)
+        language = result.get("language") or params["language"]
+        # 2段階デコードの集計はバッチ全体のものなので、先頭のファイルにまとめて付ける
+        first.adaptive_report = result.get("adaptive")
+        
+        for mp4_file, segments in zip(mp4_files, split_segments(result.get("segments", []), spans, language)):
+            mp4_file.transcription_result = {
+                "text": " ".join(segment["text"] for segment in segments),
+                "segments": segments,
+                "language": language,
+            }
+            mp4_file._store_transcription(mp4_file._transcription_params(initial_prompt))
+            print(f" - {os.path.basename(mp4_file.filepath)}: {len(segments)}セグメント")
+
+    def transcribe_iter(self, initial_prompt: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribes like transcribe(), yielding each Whisper segment as soon as it is decoded.
+
+        ストリーミングできるバックエンド（faster-whisper、フェイク）のジェネレータを1回だけ消費し、
+        デコードされたセグメントを順に返します。
+        標準のwhisper、長時間ファイルモード、キャッシュヒットの場合は、文字起こしの完了後に
+        まとめて返します。最後まで消費すると transcription_result とキャッシュは transcribe() と同じになります。
+
+        Yields:
+            Segment dictionaries (start, end, text, words, ...) in time order.
+        """
+        params = self._transcription_params(initial_prompt)
+        backend = get_backend(params["backend"])
+        streamable = backend.streaming and not self._chunking_params() and not self.adaptive
+        if not streamable or self.load_cached_transcription(initial_prompt):
+            if not streamable:
+                self.transcribe(initial_prompt)
+            yield from self.transcription_result.get("segments", [])
+            return
+
+        segments: List[Dict[str, Any]] = []
+        try:
+            audio_input = self._prepare_audio_input(initial_prompt)
+            try:
+                print(f"{backend.name}で逐次文字起こしを実行します（ストリーミングモード）")
+                speech_audio, time_map = self._compact_speech(audio_input, params)
+                if speech_audio is None:
+                    # 音声区間がない場合はASRを省略
+                    stream, language = iter(()), params["language"]
+                else:
+                    stream, language = backend.segments(speech_audio, params)
+                    if time_map is not None:
+                        stream = map(time_map.map_segment, stream)
+                for segment in stream:
+                    segments.append(segment)
+                    yield segment
+            except Exception as e:
+                # 一部のセグメントを返した後は、結果が重複するためフォールバックできない
+                if segments or not self._can_fall_back(params):
+                    raise
+                print(f"faster-whisperでのエラー: {str(e)}")
+                print("標準のwhisperにフォールバックします...")
+                params = self._whisper_params(initial_prompt)
+                self.transcription_result = self._transcribe_audio(audio_input, params)
+                self._store_transcription(params)
+                print(f"文字起こし完了: {len(self.transcription_result.get('segments', []))}セグメント")
+                yield from self.transcription_result.get("segments", [])
+                return
+        except Exception as e:
+            print(f"文字起こし中にエラーが発生しました: {str(e)}")
+            raise Exception(f"Whisper transcription error: {e}")
+        finally:
+            self.audio_array = None
+
+        self.transcription_result = {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": language,
+        }
+        self._store_transcription(params)
+        print(f"文字起こし完了: {len(segments)}セグメント")
 
     def _preprocess_audio(self, audio_path: str) -> str:
         """音声ファイルの前処理（ノイズ除去と音量調整）を行います。"""
@@ -469,7 +657,8 @@ class MP4File:
             base_name = os.path.splitext(os.path.basename(audio_path))[0]
             processed_path = os.path.join(base_dir, f"{base_name}_processed.wav")
             
-            # pydubを使用して音声を読み込み
+            # pydubを使用して音声を読み込み（前処理を使うときだけインポートする）
+            from pydub import AudioSegment
             audio = AudioSegment.from_file(audio_path)
             
             # 音量の正規化（headroomを0.5に調整してより大きな音量に）
@@ -510,194 +699,324 @@ class MP4File:
             print("警告: 文字起こし結果にセグメントが含まれていません")
             return
 
+        # 単語のタイムスタンプから作り直す（オプション指定時）
+        if self.resegment_options is not None and self.segment_words(self.resegment_options):
+            return
+
         # Whisperのセグメントをそのまま使用する
         print(f"音声をセグメント化中...")
         
         # タイムコードでソート
         sorted_segments = sorted(segments, key=lambda x: x.get("start", 0))
         
-        for i, segment in enumerate(sorted_segments):
-            start_time = segment.get("start", 0)
-            end_time = segment.get("end", 0)
-            text = segment.get("text", "").strip()
+        previous_end = None
+        for segment in sorted_segments:
+            self._append_whisper_segment(segment, previous_end)
+            previous_end = segment.get("end", 0)
+
+    def _append_whisper_segment(self, segment: Dict[str, Any], previous_end: Optional[float]) -> bool:
+        """
+        Appends one Whisper segment to the segment store after cleaning it up.
+
+        Args:
+            segment: The Whisper segment dictionary.
+            previous_end: End time of the preceding Whisper segment (None for the first one).
+
+        Returns:
+            Whether the segment was kept.
+        """
+        start_time = segment.get("start", 0)
+        end_time = segment.get("end", 0)
+        text = segment.get("text", "").strip()
+        
+        # 空のセグメントをスキップ
+        if not text:
+            return False
             
-            # 空のセグメントをスキップ
-            if not text:
-                continue
-                
-            # 極端に短いセグメントをスキップ（0.2秒未満）
-            if end_time - start_time < 0.2:
-                continue
-                
-            # タイムコードの逆転がないか確認
-            if i > 0 and start_time < sorted_segments[i-1].get("end", 0):
-                # 前のセグメントの終了時間より新しい開始時間を設定
-                start_time = sorted_segments[i-1].get("end", 0) + 0.1
-                
-            start_timecode = self._seconds_to_timecode(start_time)
-            end_timecode = self._seconds_to_timecode(end_time)
+        # 極端に短いセグメントをスキップ（既定では0.2秒未満）
+        if end_time - start_time < self.config.min_segment_length:
+            return False
+            
+        # タイムコードの逆転がないか確認
+        if previous_end is not None and start_time < previous_end:
+            # 前のセグメントの終了時間より新しい開始時間を設定
+            start_time = previous_end + 0.1
             
-            # セグメントを追加
-            self.segments.append(Segment(start_timecode, end_timecode, text))
-            print(f"セグメント追加: {start_timecode} - {end_timecode} | {text[:30]}...")
+        start_timecode = Timecode.from_seconds(start_time, self.frame_rate, self.drop_frame)
+        end_timecode = Timecode.from_seconds(end_time, self.frame_rate, self.drop_frame)
+        
+        # セグメントを追加（単語のタイムスタンプがあれば一緒に保存）
+        self.segments.append(start_timecode, end_timecode, text, segment.get("words"))
+        print(f"セグメント追加: {start_timecode} - {end_timecode} | {text[:30]}...")
+        return True
+
+    def stream_segments(self, initial_prompt: str = None,
+                        on_segment: Optional[Callable[["MP4File", SegmentView], None]] = None) -> Iterator[SegmentView]:
+        """
+        Transcribes and segments the file incrementally, yielding each subtitle as soon as it is decoded.
+
+        transcribe_iter のセグメントを1つずつ segment_audio と同じ処理で SegmentStore に追加します。
+        長いファイルでも最初の字幕はデコード直後（先頭の30秒分）に得られます。文字起こし済み
+        （キャッシュから読み込み済み）の場合は、そのセグメントをすぐに返します。
+        最後まで消費した後の segments は transcribe() + segment_audio() と同じです。
+
+        Args:
+            initial_prompt: Initial prompt passed to Whisper.
+            on_segment: Called with this file and each new segment (e.g. to show live subtitles).
+
+        Yields:
+            Each kept segment, in time order.
+        """
+        self.segments = SegmentStore(self.frame_rate, self.drop_frame)
+        transcribed = self.transcription_result.get("segments")
+        if transcribed:
+            source = iter(sorted(transcribed, key=lambda x: x.get("start", 0)))
+        else:
+            source = self.transcribe_iter(initial_prompt)
+        
+        previous_end = None
+        for segment in source:
+            if self._append_whisper_segment(segment, previous_end):
+                view = self.segments[-1]
+                if on_segment is not None:
+                    on_segment(self, view)
+                yield view
+            previous_end = segment.get("end", 0)
+        
+        # 単語単位の区切りは全体が揃ってから作り直す（逐次表示はWhisperのセグメント単位）
+        if self.resegment_options is not None:
+            self.segment_words(self.resegment_options)
+
+    def segment_words(self, options: ResegmentOptions) -> bool:
+        """
+        Rebuilds the segments from word timestamps within the given limits.
+
+        Args:
+            options: Maximum characters, maximum duration and minimum gap of a segment.
+
+        Returns:
+            False if the transcription has no word timestamps (segments are left unchanged).
+        """
+        segments = sorted(self.transcription_result.get("segments", []), key=lambda x: x.get("start", 0))
+        words = [word for segment in segments for word in segment.get("words") or [] if word["word"].strip()]
+        if not words:
+            print("警告: 単語のタイムスタンプがないため、Whisperのセグメントを使用します")
+            return False
+
+        print(f"単語のタイムスタンプからセグメントを作成中 (最大文字数: {options.max_chars or '制限なし'}, "
+              f"最大長: {options.max_duration or '制限なし'}秒, 最小間隔: {options.min_gap or '無効'}秒)...")
+        language = self.transcription_result.get("language") or "ja"
+        self.segments = SegmentStore(self.frame_rate, self.drop_frame)
+        for group in resegment(words, options, language):
+            # 極端に短いセグメントをスキップ（segment_audioと同じ0.2秒未満）
+            if group[-1]["end"] - group[0]["start"] < 0.2:
+                continue
+            self._add_segment(group)
+        print(f"{len(words)}単語から{len(self.segments)}セグメントを作成しました")
+        return True
 
     def _add_segment(self, words: List[Dict]) -> None:
-        """Creates a Segment from a list of words."""
+        """Appends a segment built from a list of words."""
         start_time = words[0]["start"]
         end_time = words[-1]["end"]
-        # 単語間のスペースを調整（日本語の場合は不要）
-        language = self.transcription_result.get("language", "")
-        if language in ["ja", "zh", "ko"]:
-            # 日本語、中国語、韓国語の場合はスペースを削除
-            transcription = "".join(word["word"].strip() for word in words)
-        else:
-            # その他の言語の場合は単語間にスペースを入れる
-            transcription = " ".join(word["word"].strip() for word in words)
+        # 単語間のスペースを調整（日本語、中国語、韓国語の場合はスペースを削除）
+        language = self.transcription_result.get("language") or ""
+        transcription = join_words(words, language)
             
-        start_timecode = self._seconds_to_timecode(start_time)
-        end_timecode = self._seconds_to_timecode(end_time)
-        self.segments.append(Segment(start_timecode, end_timecode, transcription))
+        start_timecode = Timecode.from_seconds(start_time, self.frame_rate, self.drop_frame)
+        end_timecode = Timecode.from_seconds(end_time, self.frame_rate, self.drop_frame)
+        self.segments.append(start_timecode, end_timecode, transcription, words)
         print(f"セグメント追加: {start_timecode} - {end_timecode}")
 
-    def generate_edl_data(self, record_start: str, use_timecode_offset: bool = True) -> Tuple[EDLData, str]:
-        """Generates EDL data with sequential record timecodes."""
+    def build_edl_events(self, use_timecode_offset: bool = True) -> List[Dict]:
+        """
+        Builds the file's EDL events without record timecodes.
+
+        レコードタイムライン上の配置に依存しない処理（オフセット適用、範囲の調整、
+        1フレーム短縮、短いセグメントの除外）だけを行います。ワーカープロセスで実行し、
+        配置は place_edl_events で後から行えます。
+
+        Args:
+            use_timecode_offset: Whether to use the MP4 file's internal timecode as offset.
+
+        Returns:
+            A list of events holding source timecodes and durations.
+        """
         reel_name = f"TAPE{self.file_index:02d}"
-        current_record = self._timecode_to_seconds(record_start)
 
-        print(f"EDLデータを生成中 (リール名: {reel_name}, 開始レコード: {record_start})...")
+        print(f"EDLイベントを生成中 (リール名: {reel_name})...")
         print(f"タイムコードオフセットの使用: {'有効' if use_timecode_offset else '無効'}")
         
-        # EDLイベントのリストをクリア
-        self.edl_data = EDLData(title="My Video Project", fcm="NON-DROP FRAME")
-          # EDLイベントとそのレコードタイムコードを保存するリスト
-        self.edl_events_with_timecode = []
+        # 配置前のイベントのリスト
+        self.edl_source_events = []
         
         # 内部タイムコードの終了時間を計算（実際の動画長を使用）
-        end_time_seconds = None  # 初期化
-        if self.timecode_offset and self.timecode_offset != "00:00:00:00":
-            start_time_seconds = self._timecode_to_seconds(self.timecode_offset)
+        end_timecode = None  # 初期化
+        if self.timecode_offset and self.timecode_offset.frames:
             # 動画の長さが取得できていれば使用、そうでなければデフォルトの1時間を使用
-            if self.duration:
-                end_time_seconds = start_time_seconds + self.duration
-            else:
-                end_time_seconds = start_time_seconds + 3600  # 1時間後（フォールバック）
-            print(f"内部タイムコード範囲: {self.timecode_offset} - {self._seconds_to_timecode(end_time_seconds)}")
+            duration = self.duration if self.duration else 3600  # 1時間後（フォールバック）
+            end_timecode = Timecode.from_seconds(self.timecode_offset.seconds + duration, self.frame_rate,
+                                                 self.drop_frame)
+            print(f"内部タイムコード範囲: {self.timecode_offset} - {end_timecode}")
         
         # 最小長さ（フレーム数）の設定
         min_duration_frames = 5
         
+        if len(self.segments) >= EDL_BATCH_THRESHOLD:
+            self.edl_source_events = self._build_edl_events_batch(
+                use_timecode_offset, end_timecode, min_duration_frames
+            )
+            print(f"EDLイベント生成完了: {len(self.edl_source_events)}イベント")
+            return self.edl_source_events
+        
         for segment in self.segments:
             # タイムコードオフセットを適用（オプション）
             if use_timecode_offset and self.timecode_offset:
                 source_in = self.apply_timecode_offset(segment.start_timecode)
                 source_out = self.apply_timecode_offset(segment.end_timecode)
                 
-                # 内部タイムコードの範囲をチェック（end_time_secondsが設定されている場合のみ）
-                if end_time_seconds is not None:
-                    source_out_seconds = self._timecode_to_seconds(source_out)
-                    if source_out_seconds > end_time_seconds:
-                        print(f"警告: セグメントの終了時間 ({source_out}) が内部タイムコードの範囲を超えています。終了時間を調整します。")
-                        source_out = self._seconds_to_timecode(end_time_seconds)
+                # 内部タイムコードの範囲をチェック（end_timecodeが設定されている場合のみ）
+                if end_timecode is not None and source_out > end_timecode:
+                    print(f"警告: セグメントの終了時間 ({source_out}) が内部タイムコードの範囲を超えています。終了時間を調整します。")
+                    source_out = end_timecode
                     
                 print(f"タイムコードオフセット適用: {segment.start_timecode} → {source_in}")
             else:
                 source_in = segment.start_timecode
                 source_out = segment.end_timecode
             
-            # セグメントの長さを計算
-            source_in_parts = source_in.split(':')
-            source_out_parts = source_out.split(':')
-            
-            # タイムコードをフレームに変換
-            source_in_frames = (
-                int(source_in_parts[0]) * 3600 * 30 +
-                int(source_in_parts[1]) * 60 * 30 +
-                int(source_in_parts[2]) * 30 +
-                int(source_in_parts[3])
-            )
-            source_out_frames = (
-                int(source_out_parts[0]) * 3600 * 30 +
-                int(source_out_parts[1]) * 60 * 30 +
-                int(source_out_parts[2]) * 30 +
-                int(source_out_parts[3])
-            )
-            
             # オフラインエラー防止のためsource_outを1フレーム短くする
-            source_out_frames -= 1
-            source_out = self._frames_to_timecode(source_out_frames)
+            source_out = source_out - 1
             
             # セグメントのフレーム数を計算
-            segment_frames = source_out_frames - source_in_frames
+            segment_frames = source_out.frames - source_in.frames
             
             # 短いセグメントをスキップ
             if segment_frames < min_duration_frames:
                 print(f"短いセグメントをスキップ: {source_in} → {source_out} (フレーム数: {segment_frames})")
                 continue
             
-            duration = self._timecode_to_seconds(source_out) - self._timecode_to_seconds(source_in)
-            record_in = self._seconds_to_timecode(current_record)
-            record_out = self._seconds_to_timecode(current_record + duration)
+            self.edl_source_events.append({
+                "segment": segment,
+                "source_in": source_in,
+                "source_out": source_out,
+                "duration": source_out - source_in,
+            })
+
+        print(f"EDLイベント生成完了: {len(self.edl_source_events)}イベント")
+        return self.edl_source_events
+
+    def _build_edl_events_batch(self, use_timecode_offset: bool, end_timecode: Optional[Timecode],
+                                min_duration_frames: int) -> List[Dict]:
+        """
+        Vectorized build_edl_events for files with many segments.
+
+        オフセット適用、範囲の調整、1フレーム短縮、短いセグメントの除外を
+        全セグメントのフレーム数の配列に対して一度に行います。結果はループ版と同じです。
+
+        Args:
+            use_timecode_offset: Whether to use the MP4 file's internal timecode as offset.
+            end_timecode: End of the file's internal timecode range (None: no clamping).
+            min_duration_frames: Events shorter than this many frames are dropped.
+
+        Returns:
+            A list of events holding source timecodes and durations.
+        """
+        count = len(self.segments)
+        # ストアのフレーム配列から直接コピー（Segmentオブジェクトを経由しない）
+        source_in = np.array(self.segments.start_frames(), dtype=np.int64)
+        source_out = np.array(self.segments.end_frames(), dtype=np.int64)
+
+        if use_timecode_offset and self.timecode_offset:
+            source_in += self.timecode_offset.frames
+            source_out += self.timecode_offset.frames
+            if end_timecode is not None:
+                clamped = int(np.count_nonzero(source_out > end_timecode.frames))
+                if clamped:
+                    print(f"警告: {clamped}個のセグメントの終了時間が内部タイムコードの範囲を超えています。終了時間を調整します。")
+                np.minimum(source_out, end_timecode.frames, out=source_out)
+            print(f"タイムコードオフセット適用: +{self.timecode_offset} ({count}セグメント)")
+
+        # オフラインエラー防止のためsource_outを1フレーム短くする
+        source_out -= 1
+        durations = source_out - source_in
+
+        # 短いセグメントをスキップ
+        kept = np.flatnonzero(durations >= min_duration_frames)
+        if count - len(kept):
+            print(f"短いセグメントをスキップ: {count - len(kept)}個 ({min_duration_frames}フレーム未満)")
+
+        zero = Timecode(0, self.frame_rate, self.drop_frame)
+        segments = self.segments
+        return [
+            {
+                "segment": segments[index],
+                "source_in": zero.with_frames(in_frames),
+                "source_out": zero.with_frames(out_frames),
+                "duration": zero.with_frames(duration),
+            }
+            for index, in_frames, out_frames, duration in zip(
+                kept.tolist(), source_in[kept].tolist(), source_out[kept].tolist(), durations[kept].tolist()
+            )
+        ]
+
+    def place_edl_events(self, record_start: Timecode) -> Tuple[EDLData, Timecode]:
+        """
+        Places the events built by build_edl_events on the record timeline.
+
+        レコード側のフレームレートがファイルと異なる場合は、イベントの長さをレコード側の
+        フレーム数に換算します（ソースのタイムコードはファイルのまま）。
+
+        Args:
+            record_start: The record timecode of the first event (its rate and drop-frame
+                numbering are the record timeline's).
+
+        Returns:
+            A tuple of the file's EDL data and the next record start timecode.
+        """
+        reel_name = f"TAPE{self.file_index:02d}"
+        clip_name = os.path.basename(self.filepath)
+
+        print(f"EDLデータを生成中 (リール名: {reel_name}, 開始レコード: {record_start})...")
+        
+        # EDLイベントのリストをクリア
+        self.edl_data = EDLData(title="My Video Project",
+                                fcm="DROP FRAME" if record_start.drop_frame else "NON-DROP FRAME")
+        # EDLイベントとそのレコードタイムコードを保存するリスト
+        self.edl_events_with_timecode = []
+        
+        # レコードタイムコードは長さの累積和で一度に求める
+        durations = np.fromiter((e["duration"].frames for e in self.edl_source_events),
+                                dtype=np.int64, count=len(self.edl_source_events))
+        if record_start.rate != self.frame_rate:
+            durations = np.rint(durations * float(record_start.rate / self.frame_rate)).astype(np.int64)
+        record_outs = (record_start.frames + np.cumsum(durations)).tolist()
+        record_ins = [record_start.frames] + record_outs[:-1]
+        
+        for source_event, in_frames, out_frames in zip(self.edl_source_events, record_ins, record_outs):
+            record_in = record_start.with_frames(in_frames)
+            record_out = record_start.with_frames(out_frames)
             
             # ビデオとオーディオを含むイベント（DaVinci Resolveで正しく認識される形式）
             main_event = {
                 "reel_name": reel_name,
                 "track_type": "AA/V",  # オーディオとビデオの両方
                 "transition": "C",
-                "source_in": source_in,
-                "source_out": source_out,
+                "source_in": source_event["source_in"],
+                "source_out": source_event["source_out"],
                 "record_in": record_in,
                 "record_out": record_out,
-                "clip_name": os.path.basename(self.filepath),
+                "clip_name": clip_name,
             }
             self.edl_data.add_event(main_event)
             
             # EDLイベントとそのレコードタイムコードを保存（SRT生成用）
             self.edl_events_with_timecode.append({
-                "segment": segment,
+                "segment": source_event["segment"],
                 "record_in": record_in,
                 "record_out": record_out
             })
-            
-            current_record += duration
 
-        new_record_start = self._seconds_to_timecode(current_record)
+        new_record_start = record_start.with_frames(record_outs[-1]) if record_outs else record_start
         print(f"EDLデータ生成完了: {len(self.edl_data.events)}イベント, 次の開始レコード: {new_record_start}")
         return self.edl_data, new_record_start
-
-    def generate_srt_data(self) -> SRTData:
-        """Generates SRT data based on original segment timecodes."""
-        print(f"SRTデータを生成中...")
-        
-        # SRTデータを初期化
-        self.srt_data = SRTData()
-        
-        # 元のセグメントのタイムコードを使用してSRTデータを生成
-        print(f"元のセグメントのタイムコードに基づいてSRTデータを生成します")
-        for segment in self.segments:
-            self.srt_data.add_segment(segment)
-        
-        print(f"SRTデータ生成完了: {len(self.srt_data.segments)}セグメント")
-        return self.srt_data
-
-    def _seconds_to_timecode(self, seconds: float) -> str:
-        """Converts seconds to HH:MM:SS:FF format (30 fps)."""
-        total_frames = int(seconds * 30)
-        hours = total_frames // (3600 * 30)
-        minutes = (total_frames % (3600 * 30)) // (60 * 30)
-        secs = (total_frames % (60 * 30)) // 30
-        frames = total_frames % 30
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
-
-    def _timecode_to_seconds(self, timecode: str) -> float:
-        """Converts HH:MM:SS:FF to seconds (30 fps)."""
-        hh, mm, ss, ff = map(int, timecode.split(":"))
-        return hh * 3600 + mm * 60 + ss + ff / 30.0
-
-    def _frames_to_timecode(self, total_frames: int) -> str:
-        """フレーム数からHH:MM:SS:FF形式のタイムコードに変換します（30 fps）。"""
-        hours = total_frames // (3600 * 30)
-        minutes = (total_frames % (3600 * 30)) // (60 * 30)
-        secs = (total_frames % (60 * 30)) // 30
-        frames = total_frames % 30
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
-
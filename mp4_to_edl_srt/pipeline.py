@@ -0,0 +1,173 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+# キューの終端を表す番兵
+_DONE = object()
+
+# キューで待機する間、停止の指示を確認する間隔（秒）
+_POLL_INTERVAL = 0.1
+
+
+class Stage:
+    """One stage of a StagedPipeline: a function applied by a number of worker threads."""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1):
+        """
+        Initializes the stage.
+
+        Args:
+            name: Stage name used in log messages.
+            func: Function applied to each item. Returning None drops the item
+                (later stages are skipped and None is emitted for it).
+            workers: Number of threads running this stage.
+        """
+        self.name: str = name
+        self.func: Callable[[Any], Any] = func
+        self.workers: int = max(1, workers)
+
+
+class StagedPipeline:
+    """
+    Producer/consumer pipeline of stages connected by bounded queues.
+
+    各ステージは独自のスレッド数で並行に動作します。ステージ間のキューには上限があるため、
+    下流が詰まると上流はput()で待機し（バックプレッシャー）、先行しすぎることはありません。
+    結果の受け取りを途中でやめた場合（呼び出し側のエラーなど）は close() でスレッドを
+    停止させます（with 文でも使えます）。
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2):
+        """
+        Initializes the pipeline.
+
+        Args:
+            stages: Stages in processing order.
+            queue_size: Maximum number of items waiting between two stages.
+        """
+        self.stages: List[Stage] = stages
+        self.queue_size: int = max(1, queue_size)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def __enter__(self) -> "StagedPipeline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops the stage threads and waits for them to finish.
+
+        待機中のスレッドはすぐに終了し、処理中のアイテムはそのステージの処理が終わった時点で
+        破棄されます。すべての結果を受け取った後に呼んでも何もしません。
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _put(self, target: queue.Queue, entry: Any) -> bool:
+        """Puts an entry, giving up when the pipeline is stopped. Returns whether it was put."""
+        while not self._stop.is_set():
+            try:
+                target.put(entry, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Gets an entry, returning the end marker when the pipeline is stopped."""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def run(self, items: Iterable[Any], ordered: bool = True) -> Iterator[Any]:
+        """
+        Runs items through all stages.
+
+        Args:
+            items: Input items.
+            ordered: Yield results in input order (otherwise in completion order).
+
+        Yields:
+            The result of the last stage for each item, or None if a stage dropped it.
+        """
+        self.close()
+        self._stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        output: queue.Queue = queue.Queue()
+        threads = self._threads
+
+        def feed() -> None:
+            for index, item in enumerate(items):
+                if not self._put(queues[0], (index, item)):
+                    return
+            for _ in range(self.stages[0].workers):
+                self._put(queues[0], _DONE)
+
+        threads.append(threading.Thread(target=feed, name="pipeline-feed", daemon=True))
+
+        for stage_index, stage in enumerate(self.stages):
+            in_queue = queues[stage_index]
+            is_last = stage_index == len(self.stages) - 1
+            out_queue = output if is_last else queues[stage_index + 1]
+            downstream_workers = 1 if is_last else self.stages[stage_index + 1].workers
+            remaining = [stage.workers]
+            lock = threading.Lock()
+
+            def work(stage=stage, in_queue=in_queue, out_queue=out_queue,
+                     downstream_workers=downstream_workers, remaining=remaining, lock=lock) -> None:
+                while True:
+                    entry = self._get(in_queue)
+                    if entry is _DONE:
+                        break
+                    index, item = entry
+                    result = None
+                    if item is not None:
+                        try:
+                            result = stage.func(item)
+                        except Exception as e:
+                            print(f"エラー: ステージ '{stage.name}' で予期しないエラーが発生しました: {e}")
+                    if not self._put(out_queue, (index, result)):
+                        return
+                # ステージの最後のワーカーが下流に終端を伝える
+                with lock:
+                    remaining[0] -= 1
+                    last_worker = remaining[0] == 0
+                if last_worker:
+                    for _ in range(downstream_workers):
+                        self._put(out_queue, _DONE)
+
+            for worker_index in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=work, name=f"pipeline-{stage.name}-{worker_index}", daemon=True
+                ))
+
+        for thread in threads:
+            thread.start()
+
+        pending: Dict[int, Any] = {}
+        next_index = 0
+        try:
+            while True:
+                entry = self._get(output)
+                if entry is _DONE:
+                    break
+                index, result = entry
+                if not ordered:
+                    yield result
+                    continue
+                # 入力順に並べ替えて出力
+                pending[index] = result
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+        finally:
+            # 途中で受け取りをやめた場合も、待機中のスレッドを止めて終了を待つ
+            self.close()
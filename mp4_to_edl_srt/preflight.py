@@ -0,0 +1,233 @@
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from asr_backend import resolve_backend
+from config import TranscriptionConfig
+from mp4_box import AudioStream, MovieInfo, ffprobe_movie_info, read_movie_info
+
+# 事前チェックでファイルを並行して調べるスレッド数（ボックスの読み込みとFFprobeの待ち時間が中心）
+DEFAULT_PREFLIGHT_WORKERS = 8
+
+# 処理時間の見積もりに使う実時間係数（処理時間 / 音声の長さ）の目安。
+# CPUでlarge-v3-turbo (int8, ビームサーチ) を使った場合の値で、実際の値は
+# util/bench_batched.py などで計測できる
+ESTIMATED_RTF = {
+    ("faster-whisper", "sequential"): 0.5,
+    ("faster-whisper", "batched"): 0.2,
+    ("whisper", "sequential"): 1.0,
+    ("whisper", "batched"): 1.0,
+}
+# 音声の抽出・セグメント化・EDL/SRTの書き出しにかかる時間（音声1秒あたり）
+OVERHEAD_RTF = 0.01
+# 実際に計測した実時間係数の履歴（設定ごと）。あれば上の目安より優先する
+RTF_HISTORY_PATH = os.environ.get(
+    "MP4_TO_EDL_SRT_RTF_HISTORY",
+    os.path.join(os.path.expanduser("~"), ".cache", "mp4_to_edl_srt", "rtf_history.json")
+)
+# 履歴を更新するときの新しい計測値の重み（指数移動平均）
+_HISTORY_WEIGHT = 0.5
+
+
+class FileProbe(NamedTuple):
+    """Pre-flight result of one input file."""
+    path: str
+    file_index: int  # ソート順の番号（リール名に使う。除外したファイルも番号を使う）
+    duration: Optional[float]
+    audio: Optional[AudioStream]  # 最初の音声ストリーム
+    timecode: Optional[str]
+    creation_time: Optional[str]
+    error: Optional[str]  # 除外する理由（None: 処理できる）
+    frame_rate: Optional[Fraction] = None  # タイムコードのフレームレート
+
+    def movie_info(self) -> MovieInfo:
+        """Returns the metadata MP4File needs, so that it does not read the file again."""
+        return MovieInfo(self.duration, self.creation_time, (self.timecode,) if self.timecode else (),
+                         (self.audio,) if self.audio else (), self.frame_rate)
+
+
+class Manifest(NamedTuple):
+    """Pre-flight results of a folder."""
+    files: List[FileProbe]
+    total_seconds: float  # 処理するファイルの音声の合計（秒）
+    estimated_seconds: float  # 処理時間の見積もり（秒）
+    rtf: float  # 見積もりに使った実時間係数（音声1秒あたりの処理時間）
+    measured: bool  # rtf が過去の実行で計測した値か（False: 目安の値）
+
+    @property
+    def accepted(self) -> List[FileProbe]:
+        return [probe for probe in self.files if probe.error is None]
+
+    @property
+    def rejected(self) -> List[FileProbe]:
+        return [probe for probe in self.files if probe.error is not None]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the manifest as JSON-serializable data."""
+        return {
+            "total_seconds": self.total_seconds,
+            "estimated_seconds": self.estimated_seconds,
+            "rtf": self.rtf,
+            "rtf_measured": self.measured,
+            "accepted": len(self.accepted),
+            "rejected": len(self.rejected),
+            "files": [
+                {**probe._asdict(), "audio": probe.audio._asdict() if probe.audio else None,
+                 "frame_rate": str(probe.frame_rate) if probe.frame_rate else None}
+                for probe in self.files
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        """Writes the manifest as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def probe_file(path: str, file_index: int) -> FileProbe:
+    """
+    Reads the metadata of one file and decides whether it can be processed.
+
+    MP4/MOVのボックスから読み、読めない形式はFFprobeを使います（MP4File.extract_metadataと同じ）。
+    空のファイル、メタデータを読めないファイル、長さが0のファイル、音声ストリームのない
+    ファイルは除外します。
+    """
+    def rejected(reason: str, **fields: Any) -> FileProbe:
+        return FileProbe(path, file_index, fields.get("duration"), fields.get("audio"),
+                         fields.get("timecode"), fields.get("creation_time"), reason, fields.get("frame_rate"))
+
+    try:
+        if os.path.getsize(path) == 0:
+            return rejected("空のファイルです")
+        info = read_movie_info(path) or ffprobe_movie_info(path)
+    except OSError as e:
+        return rejected(f"ファイルを読み込めません: {e}")
+    except (subprocess.CalledProcessError, ValueError):
+        return rejected("メタデータを読み取れません（破損しているか、対応していない形式です）")
+
+    fields = {
+        "duration": info.duration,
+        "audio": info.audio_streams[0] if info.audio_streams else None,
+        "timecode": info.timecodes[0] if info.timecodes else None,
+        "creation_time": info.creation_time,
+        "frame_rate": info.frame_rate,
+    }
+    if not info.duration or info.duration <= 0:
+        return rejected("長さが0です", **fields)
+    if not info.audio_streams:
+        return rejected("音声ストリームがありません", **fields)
+    return FileProbe(path, file_index, error=None, **fields)
+
+
+def rtf_key(config: TranscriptionConfig) -> str:
+    """Returns the key of the settings that determine the real-time factor in the history."""
+    backend = resolve_backend(config.backend)
+    if backend == "fake":
+        return f"fake/{config.fake_speed:g}"
+    model = config.model if backend == "faster-whisper" else config.whisper_model
+    return f"{backend}/{model}/{config.compute_type}/{config.mode}/beam{config.beam_size}"
+
+
+def load_rtf_history(path: Optional[str] = RTF_HISTORY_PATH) -> Dict[str, float]:
+    """Reads the measured real-time factors (empty if there is no history)."""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {key: float(value) for key, value in json.load(f).items()}
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"警告: 処理速度の履歴を読み込めませんでした: {e}")
+        return {}
+
+
+def record_rtf(config: TranscriptionConfig, rtf: float, path: Optional[str] = RTF_HISTORY_PATH) -> None:
+    """Blends a measured real-time factor into the history of the settings."""
+    if not path:
+        return
+    history = load_rtf_history(path)
+    key = rtf_key(config)
+    history[key] = rtf if key not in history else (1 - _HISTORY_WEIGHT) * history[key] + _HISTORY_WEIGHT * rtf
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2)
+    except OSError as e:
+        print(f"警告: 処理速度の履歴を保存できませんでした: {e}")
+
+
+def estimated_rtf(config: TranscriptionConfig, history: Optional[Dict[str, float]] = None) -> Tuple[float, bool]:
+    """
+    Returns the expected processing seconds per second of media.
+
+    Args:
+        config: Resolved settings (backend, model, decoding mode, beam size, compute type).
+        history: Measured real-time factors from load_rtf_history.
+
+    Returns:
+        A tuple of the real-time factor and whether it was measured (False: built-in guess).
+    """
+    if history and rtf_key(config) in history:
+        return history[rtf_key(config)], True
+    backend = resolve_backend(config.backend)
+    if backend == "fake":
+        rtf = 1.0 / config.fake_speed if config.fake_speed else 0.0
+    else:
+        rtf = ESTIMATED_RTF[(backend, config.mode)]
+        if config.beam_size <= 1:
+            rtf *= 0.6  # 貪欲法
+        if config.compute_type == "float32":
+            rtf *= 2.0  # 量子化なし
+    return rtf + OVERHEAD_RTF, False
+
+
+def estimate_run_seconds(total_seconds: float, config: TranscriptionConfig, workers: int = 1,
+                         history: Optional[Dict[str, float]] = None) -> float:
+    """
+    Roughly estimates the run time of a batch from its total media duration.
+
+    Args:
+        total_seconds: Total duration of the files to transcribe.
+        config: Resolved settings (backend, decoding mode, beam size, compute type).
+        workers: Files processed in parallel.
+        history: Measured real-time factors from load_rtf_history.
+
+    Returns:
+        The estimated run time in seconds.
+    """
+    return total_seconds * estimated_rtf(config, history)[0] / max(1, workers)
+
+
+def run_preflight(paths: List[str], config: TranscriptionConfig, workers: int = 1,
+                  probe_workers: int = DEFAULT_PREFLIGHT_WORKERS,
+                  history: Optional[Dict[str, float]] = None,
+                  known: Optional[Dict[str, FileProbe]] = None) -> Manifest:
+    """
+    Probes every input file concurrently before any audio is extracted or transcribed.
+
+    Args:
+        paths: Input files in processing order.
+        config: Resolved settings (used for the run-time estimate).
+        workers: Files processed in parallel (used for the run-time estimate).
+        probe_workers: Threads probing files.
+        history: Measured real-time factors from load_rtf_history.
+        known: Results of unchanged files recorded by an earlier run (Catalog.known_probes);
+            these files are not probed again.
+
+    Returns:
+        The manifest, with files in the order given.
+    """
+    known = known or {}
+
+    def probe(path: str, file_index: int) -> FileProbe:
+        if path in known:
+            return known[path]._replace(file_index=file_index)
+        return probe_file(path, file_index)
+
+    with ThreadPoolExecutor(max_workers=max(1, probe_workers)) as executor:
+        files = list(executor.map(probe, paths, range(1, len(paths) + 1)))
+    total_seconds = sum(probe.duration for probe in files if probe.error is None)
+    rtf, measured = estimated_rtf(config, history)
+    return Manifest(files, total_seconds, total_seconds * rtf / max(1, workers), rtf, measured)
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+# 単語を空白なしで連結する言語
+CJK_LANGUAGES = ("ja", "zh", "ko")
+
+# この文字の後ろは区切りやすい位置（句読点・閉じ括弧）
+_BREAK_AFTER = frozenset("。、．，！？!?.,;:…」』）)】〉》")
+# 行頭禁則: この文字で始まる単語の前では区切らない
+_NO_BREAK_BEFORE = frozenset("。、．，！？!?.,;:…」』）)】〉》ーぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮヵヶ々")
+
+
+class ResegmentOptions(NamedTuple):
+    """Limits for building segments from word timestamps (0 disables a limit)."""
+    max_chars: int = 0  # 1セグメントの最大文字数
+    max_duration: float = 0.0  # 1セグメントの最大長（秒）
+    min_gap: float = 0.0  # この長さ以上の無音で必ず区切る（秒）
+
+
+def join_words(words: Sequence[Dict[str, Any]], language: str) -> str:
+    """Joins word texts, without spaces for CJK languages and with spaces otherwise."""
+    if language in CJK_LANGUAGES:
+        return "".join(word["word"].strip() for word in words)
+    return " ".join(word["word"].strip() for word in words)
+
+
+def resegment(words: Sequence[Dict[str, Any]], options: ResegmentOptions,
+              language: str = "ja") -> List[Sequence[Dict[str, Any]]]:
+    """
+    Groups word timestamps into segments within the given limits.
+
+    単語を先頭から1回だけ走査します（線形時間）。min_gap 以上の無音では必ず区切り、
+    文字数または長さの上限を超える場合は、セグメント内の最後の句読点の後ろで区切ります
+    （句読点がなければ上限を超える単語の前）。行頭禁則の文字で始まる単語の前では区切りません。
+
+    Args:
+        words: Word timestamps (dicts with word, start, end) in time order.
+        options: Segment limits.
+        language: Transcription language; CJK words are joined without spaces.
+
+    Returns:
+        The word groups of the segments, in time order.
+    """
+    separator = 0 if language in CJK_LANGUAGES else 1
+    # prefix[i]: words[:i] を連結したときのおおよその文字数（O(1)で区間の文字数を求める）
+    prefix = [0]
+    for word in words:
+        prefix.append(prefix[-1] + len(word["word"].strip()) + separator)
+
+    max_chars, max_duration, min_gap = options
+    groups: List[Sequence[Dict[str, Any]]] = []
+    seg_start = 0  # 現在のセグメントの先頭の単語
+    last_break = 0  # 現在のセグメント内で最後に区切れる位置（0: なし）
+
+    def too_long(first: int, last: int) -> bool:
+        # words[first:last+1] が上限を超えるか
+        if max_chars and prefix[last + 1] - prefix[first] - separator > max_chars:
+            return True
+        return bool(max_duration) and words[last]["end"] - words[first]["start"] > max_duration
+
+    for i, word in enumerate(words):
+        text = word["word"].strip()
+        if i > seg_start and not (text and text[0] in _NO_BREAK_BEFORE):
+            if min_gap and word["start"] - words[i - 1]["end"] >= min_gap:
+                groups.append(words[seg_start:i])
+                seg_start, last_break = i, 0
+            elif too_long(seg_start, i):
+                cut = last_break if last_break > seg_start else i
+                groups.append(words[seg_start:cut])
+                seg_start, last_break = cut, 0
+                # 句読点で区切った残りと合わせてもまだ長い場合は、この単語の前でも区切る
+                if seg_start < i and too_long(seg_start, i):
+                    groups.append(words[seg_start:i])
+                    seg_start = i
+        if text and text[-1] in _BREAK_AFTER:
+            last_break = i + 1
+
+    if seg_start < len(words):
+        groups.append(words[seg_start:])
+    return groups
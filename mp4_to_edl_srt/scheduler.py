@@ -0,0 +1,90 @@
+import heapq
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Schedule(NamedTuple):
+    """Order in which files are handed to the worker processes."""
+    order: List[int]  # タスクの番号（処理を開始する順）
+    predicted_makespan: float  # この順で処理した場合の全体の処理時間の予測（秒）
+    sorted_makespan: float  # ファイル名順で処理した場合の予測（比較用）
+
+
+def lpt_order(costs: Sequence[float]) -> List[int]:
+    """Returns task numbers ordered longest first (ties keep their original order)."""
+    return sorted(range(len(costs)), key=lambda i: -costs[i])
+
+
+def simulate_makespan(costs: Sequence[float], order: Sequence[int], workers: int) -> float:
+    """
+    Predicts the total run time when tasks are started in the given order.
+
+    ProcessPoolExecutorと同じく、空いたワーカーが次のタスクを取る（ワークスティーリング）
+    と仮定して計算します。
+
+    Args:
+        costs: Estimated processing seconds of each task.
+        order: Task numbers in the order they are started.
+        workers: Number of worker processes.
+
+    Returns:
+        The time at which the last task finishes, in seconds.
+    """
+    finish_times = [0.0] * max(1, min(workers, len(order)))
+    for i in order:
+        # 最も早く空くワーカーに割り当てる
+        heapq.heapreplace(finish_times, finish_times[0] + costs[i])
+    return max(finish_times) if order else 0.0
+
+
+def plan_schedule(durations: Sequence[float], workers: int, rtf: float = 1.0) -> Schedule:
+    """
+    Orders files longest first for the worker pool.
+
+    長いファイルを先に始めることで、最後に長いファイルが1つだけ残って他のワーカーが
+    待つ状態を避けます（LPTスケジューリング。最適値の4/3倍以内が保証される）。
+    全ファイルに同じ実時間係数を使うため、順序は音声の長さだけで決まります。
+    rtf は予測する処理時間を秒に換算するためだけに使います。
+
+    Args:
+        durations: Media duration of each file in seconds, in sorted order.
+        workers: Number of worker processes.
+        rtf: Processing seconds per second of media (from the pre-flight estimate).
+
+    Returns:
+        The schedule with the predicted run time of the longest-first order and of the sorted order.
+    """
+    order = lpt_order(durations)
+    return Schedule(order, simulate_makespan(durations, order, workers) * rtf,
+                    simulate_makespan(durations, range(len(durations)), workers) * rtf)
+
+
+def submit_in_order(executor: Executor, func: Callable[..., Any], args: Sequence[Tuple[Any, ...]],
+                    order: Sequence[int], finished: Optional[List[float]] = None) -> Iterator[Any]:
+    """
+    Submits tasks to the executor in the scheduled order and yields their results in the original order.
+
+    EDLのイベントやリール名はファイル名順で確定させるため、処理する順序だけを変え、
+    結果は元の順序で返します（先に終わった結果は順番が来るまで待たせる）。
+
+    Args:
+        executor: The worker pool.
+        func: Function called as func(*args[i]).
+        args: Arguments of each task, in the original order.
+        order: Task numbers in the order they are submitted.
+        finished: If given, receives the perf_counter time at which each task finished
+            (in the original order), for measuring the actual run time.
+
+    Yields:
+        The result of each task, in the original order.
+    """
+    futures = [None] * len(args)
+    for i in order:
+        futures[i] = executor.submit(func, *args[i])
+    if finished is not None:
+        finished[:] = [0.0] * len(args)
+        for i, future in enumerate(futures):
+            future.add_done_callback(lambda _, i=i: finished.__setitem__(i, time.perf_counter()))
+    for future in futures:
+        yield future.result()
@@ -0,0 +1,389 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from fractions import Fraction
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from catalog import DEFAULT_CATALOG_PATH
+from edl_data import EDLData
+from mp4_file import MP4File
+from timecode import DEFAULT_RATE, DROP_FRAME_RATES, Timecode, parse_rate
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,             -- 元ファイルの絶対パス
+    reel TEXT NOT NULL,             -- クリップ名から作ったリール名（別のフォルダの同名ファイルとは重複しうる）
+    clip TEXT NOT NULL,
+    source_in INTEGER NOT NULL,     -- ソースタイムコード（フレーム数。EDLと同じオフセット適用済み）
+    source_out INTEGER NOT NULL,
+    rate TEXT NOT NULL,             -- フレームレート（"30", "30000/1001" など）
+    drop_frame INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_path ON segments (path);
+"""
+
+# 日本語のように空白で区切らない文章は、漢字・仮名を1文字ずつ区切ってFTS5（unicode61）に登録し、
+# 検索語も同じく区切ってフレーズとして検索する（1〜2文字の語も検索できる。
+# trigramトークナイザは3文字未満の語を検索できないため使わない）。
+# その他の言語の語は、字幕の単語の先頭と一致すれば検索される（前方一致。"wor" は "world" に一致する）。
+# 1文字ずつ区切る文字（漢字・仮名・ハングル・全角記号）。コンパイルに数ミリ秒かかるため、
+# 起動時ではなく最初の検索・登録時に re のキャッシュでコンパイルする
+_CJK = "([\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef])"
+
+# 検索語のトークン（1文字ずつ区切る文字、またはそれ以外の英数字の並び）。unicode61と同じく記号は区切りとみなす
+_WORD_CHAR = "(?:(?!" + _CJK + ")[^\\W_])"
+_TOKEN = "(?=[^\\W_])" + _CJK + "|" + _WORD_CHAR + "+"
+
+# CMX 3600のリール名の最大文字数
+REEL_LENGTH = 8
+
+
+class SearchHit(NamedTuple):
+    """One subtitle segment matching a query."""
+    path: str
+    reel: str
+    clip: str
+    source_in: Timecode
+    source_out: Timecode
+    text: str
+    score: float  # 大きいほど一致度が高い（FTSを使わない検索では0）
+
+
+def _split_cjk(text: str) -> str:
+    """Separates CJK characters with spaces so that unicode61 indexes them one by one."""
+    return re.sub(_CJK, r" \1 ", text)
+
+
+def clip_reel(clip: str) -> str:
+    """
+    Derives a CMX 3600 reel name from a clip file name.
+
+    プロジェクトのEDLのリール名（TAPE01など）はフォルダごとの番号のため、フォルダをまたぐ
+    検索結果では重複します。ファイル名の英数字の先頭8文字を大文字にして使います。
+    """
+    stem = os.path.splitext(os.path.basename(clip))[0]
+    reel = re.sub(r"[^A-Z0-9_]", "", stem.upper())[:REEL_LENGTH]
+    return reel or "AX"
+
+
+def unique_reel(reel: str, used: Iterable[str]) -> str:
+    """Returns the reel name, or a numbered variant of at most 8 characters not in used."""
+    used = set(used)
+    if reel not in used:
+        return reel
+    number = 2
+    while True:
+        suffix = f"_{number}"
+        candidate = reel[:REEL_LENGTH - len(suffix)] + suffix
+        if candidate not in used:
+            return candidate
+        number += 1
+
+
+def _tokens(term: str) -> List[str]:
+    """Splits a search term into the tokens unicode61 indexes (CJK characters one by one)."""
+    return [match.group(0) for match in re.finditer(_TOKEN, term)]
+
+
+def _is_word(token: str) -> bool:
+    return re.match(_CJK, token) is None
+
+
+def _phrase(tokens: List[str]) -> str:
+    """Returns the FTS5 query of a search term: a phrase, matching a word prefix if it ends in a word."""
+    return '"' + " ".join(tokens).replace('"', '""') + '"' + ("*" if _is_word(tokens[-1]) else "")
+
+
+def _pattern(tokens: List[str]) -> str:
+    """Returns a regular expression matching the same subtitles as the FTS5 phrase of a search term."""
+    parts = []
+    for index, token in enumerate(tokens):
+        if not _is_word(token):
+            parts.append(re.escape(token))
+            continue
+        part = "(?<!" + _WORD_CHAR + ")" + re.escape(token)
+        if index < len(tokens) - 1:
+            part += "(?!" + _WORD_CHAR + ")"  # 最後の語以外は単語全体と一致させる
+        parts.append(part)
+    return "[\\W_]*".join(parts)
+
+
+def _search_match(pattern: str, text: str) -> bool:
+    """SQLite function used to search without FTS5 (the compiled patterns are cached by re)."""
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
+
+class SearchIndex:
+    """
+    Full-text index of every subtitle segment, stored in the media catalog database.
+
+    セグメントごとにリール名・クリップ名・ソースのイン点/アウト点（プロジェクトのEDLと同じ）と
+    文字列を保存し、SQLiteのFTS5で検索します。FTS5が使えないSQLiteでは全セグメントを同じ規則で調べます。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Opens (and creates if needed) the index.
+
+        Args:
+            path: SQLite database file (default: the media catalog, DEFAULT_CATALOG_PATH).
+        """
+        self.path: str = os.path.normpath(path or DEFAULT_CATALOG_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.create_function("search_match", 2, _search_match, deterministic=True)
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+        self.fts: bool = self._create_fts()
+
+    def _create_fts(self) -> bool:
+        """Creates the FTS5 table if needed and returns whether full-text search is available."""
+        if self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'segments_fts'"
+        ).fetchone() is not None:
+            return True
+        try:
+            with self.connection:
+                self.connection.execute("CREATE VIRTUAL TABLE segments_fts USING fts5(text, tokenize='unicode61')")
+                # FTS5が使えなかった時に登録したセグメントを追加
+                self.connection.executemany(
+                    "INSERT INTO segments_fts (rowid, text) VALUES (?, ?)",
+                    [(row_id, _split_cjk(text)) for row_id, text in
+                     self.connection.execute("SELECT id, text FROM segments")],
+                )
+            return True
+        except sqlite3.OperationalError:
+            print("警告: このSQLiteではFTS5を使えないため、字幕の検索はインデックスを使いません")
+            return False
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _delete(self, path: str) -> None:
+        if self.fts:
+            self.connection.execute(
+                "DELETE FROM segments_fts WHERE rowid IN (SELECT id FROM segments WHERE path = ?)", (path,)
+            )
+        self.connection.execute("DELETE FROM segments WHERE path = ?", (path,))
+
+    def index_file(self, mp4_file: MP4File) -> int:
+        """
+        Replaces the indexed segments of a file with its current EDL events.
+
+        Args:
+            mp4_file: A file after build_edl_events (its file name gives the reel name).
+
+        Returns:
+            The number of indexed segments.
+        """
+        path = os.path.abspath(mp4_file.filepath)
+        clip = os.path.basename(mp4_file.filepath)
+        reel = clip_reel(clip)
+        with self.connection:
+            self._delete(path)
+            for event in mp4_file.edl_source_events:
+                source_in = event["source_in"]
+                text = event["segment"].transcription
+                cursor = self.connection.execute(
+                    "INSERT INTO segments (path, reel, clip, source_in, source_out, rate, drop_frame, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, reel, clip, source_in.frames, event["source_out"].frames, str(source_in.rate),
+                     int(source_in.drop_frame), text),
+                )
+                if self.fts:
+                    self.connection.execute(
+                        "INSERT INTO segments_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, _split_cjk(text))
+                    )
+        return len(mp4_file.edl_source_events)
+
+    def remove_missing(self) -> int:
+        """Removes the segments of files that no longer exist and returns how many files were removed."""
+        missing = [path for path, in self.connection.execute("SELECT DISTINCT path FROM segments")
+                   if not os.path.exists(path)]
+        with self.connection:
+            for path in missing:
+                self._delete(path)
+        return len(missing)
+
+    def count(self) -> int:
+        """Returns the number of indexed segments."""
+        return self.connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def search(self, query: str, limit: Optional[int] = 50, folder: Optional[str] = None) -> List[SearchHit]:
+        """
+        Finds the segments containing every word of the query, best matches first.
+
+        日本語・中国語・韓国語の文字は字幕のどこにあっても一致し、その他の言語の語は字幕の単語の
+        先頭と一致します（大文字・小文字は区別しない）。FTS5を使わない検索でも同じ規則で調べます。
+
+        Args:
+            query: Words separated by spaces. CJK text matches anywhere in a subtitle; other words
+                match the start of a word ("wor" finds "world" but not "sword").
+            limit: Maximum number of hits (None: all).
+            folder: Only search files in this folder or its subfolders.
+
+        Returns:
+            The hits, ranked by BM25 (or in file and time order without FTS5).
+        """
+        terms = [tokens for tokens in map(_tokens, query.split()) if tokens]
+        if not terms:
+            return []
+        conditions: List[str] = []
+        values: List[Any] = []
+        if self.fts:
+            sql = ("SELECT s.path, s.reel, s.clip, s.source_in, s.source_out, s.rate, s.drop_frame, s.text, "
+                   "-bm25(segments_fts) FROM segments_fts JOIN segments AS s ON s.id = segments_fts.rowid")
+            conditions.append("segments_fts MATCH ?")
+            values.append(" ".join(_phrase(tokens) for tokens in terms))
+            order = "bm25(segments_fts), s.path, s.source_in"
+        else:
+            # インデックスを使えない場合は全セグメントをFTS5と同じ規則の正規表現で調べる
+            sql = ("SELECT s.path, s.reel, s.clip, s.source_in, s.source_out, s.rate, s.drop_frame, s.text, "
+                   "0.0 FROM segments AS s")
+            for tokens in terms:
+                conditions.append("search_match(?, s.text)")
+                values.append(_pattern(tokens))
+            order = "s.path, s.source_in"
+        if folder is not None:
+            prefix = os.path.join(os.path.abspath(folder), "")
+            conditions.append("s.path >= ? AND s.path < ?")
+            values.extend([prefix, prefix + "\U0010ffff"])
+        sql += " WHERE " + " AND ".join(conditions) + " ORDER BY " + order
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(limit)
+
+        hits = []
+        for path, reel, clip, source_in, source_out, rate, drop_frame, text, score in \
+                self.connection.execute(sql, values):
+            zero = Timecode(0, Fraction(rate), bool(drop_frame))
+            hits.append(SearchHit(path, reel, clip, zero.with_frames(source_in), zero.with_frames(source_out),
+                                  text, score))
+        return hits
+
+
+def hits_to_edl(hits: Iterable[SearchHit], title: str = "Search Selects", handles: int = 0,
+                rate: Optional[Fraction] = None, drop_frame: Optional[bool] = None) -> EDLData:
+    """
+    Builds a CMX 3600 selects EDL with one event per hit, placed back to back from 00:00:00:00.
+
+    別のファイルが同じリール名を使っている場合は、2つ目以降のファイルのリール名に番号を付けて
+    区別します（クリップ名のコメントは元のまま）。レコード側のフレームレートと異なるクリップは、
+    長さをそのフレームレートに換算して並べます（ソースのタイムコードはクリップのまま）。
+
+    Args:
+        hits: Search hits in the order they should appear.
+        title: EDL title.
+        handles: Frames added before and after each hit (at the clip's frame rate).
+        rate: Record frame rate. None uses the frame rate of the hits, which must then all
+            have the same rate.
+        drop_frame: Drop-frame record timecode (FCM: DROP FRAME). None uses drop-frame when
+            every hit at the record rate has drop-frame timecode.
+
+    Returns:
+        The EDL data (events have the same form as the project EDL).
+
+    Raises:
+        ValueError: rate is None and the hits have different frame rates, or drop_frame is
+            set for a rate without drop-frame numbering.
+    """
+    hits = list(hits)
+    rates = {hit.source_in.rate for hit in hits}
+    if rate is None:
+        if len(rates) > 1:
+            raise ValueError("フレームレートの異なるクリップが含まれています。レコード側のフレームレートを指定してください: "
+                             + ", ".join(f"{float(r):.3f}fps" for r in sorted(rates)))
+        rate = rates.pop() if rates else DEFAULT_RATE
+    if drop_frame is None:
+        numbering = [hit.source_in.drop_frame for hit in hits if hit.source_in.rate == rate]
+        drop_frame = rate in DROP_FRAME_RATES and bool(numbering) and all(numbering)
+    record_start = Timecode(0, rate, drop_frame)
+    edl_data = EDLData(title=title, fcm="DROP FRAME" if drop_frame else "NON-DROP FRAME")
+    reels: Dict[str, str] = {}  # ファイルのパス → EDLで使うリール名
+    for hit in hits:
+        reel = reels.get(hit.path)
+        if reel is None:
+            reel = unique_reel(hit.reel, reels.values())
+            if reel != hit.reel:
+                print(f"リール名 {hit.reel} は別のファイルが使っているため、{hit.clip} は {reel} にします")
+            reels[hit.path] = reel
+        source_in = hit.source_in.with_frames(max(0, hit.source_in.frames - handles))
+        source_out = hit.source_out + handles
+        duration = source_out.frames - source_in.frames
+        if source_in.rate != rate:
+            duration = round(duration * rate / source_in.rate)
+        record_out = record_start + duration
+        edl_data.add_event({
+            "reel_name": reel,
+            "track_type": "AA/V",
+            "transition": "C",
+            "source_in": source_in,
+            "source_out": source_out,
+            "record_in": record_start,
+            "record_out": record_out,
+            "clip_name": hit.clip,
+        })
+        record_start = record_out
+    return edl_data
+
+
+def search_main(argv: Optional[List[str]] = None) -> None:
+    """Command line interface to search the subtitles of every processed file."""
+    parser = argparse.ArgumentParser(prog="main.py search",
+                                     description="Search the subtitles of every processed file")
+    parser.add_argument("query", help="Words to find (a subtitle must contain all of them; CJK text matches "
+                                      "anywhere, other words match the start of a word)")
+    parser.add_argument("--catalog", default=None, help=f"Catalog database (default: {DEFAULT_CATALOG_PATH})")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of hits (0: all, default: %(default)s)")
+    parser.add_argument("--folder", default=None, help="Only search files in this folder or its subfolders")
+    parser.add_argument("--edl", default=None, metavar="PATH", help="Write the hits as a CMX 3600 selects EDL")
+    parser.add_argument("--handles", type=int, default=0,
+                        help="Frames added before and after each hit in the EDL (default: %(default)s)")
+    parser.add_argument("--rate", type=parse_rate, default=None,
+                        help="Record frame rate of the EDL, e.g. 30 or 29.97 (default: the rate of the hits; "
+                             "required when they differ)")
+    parser.add_argument("--drop-frame", dest="drop_frame", action="store_true", default=None,
+                        help="Drop-frame record timecode (default: drop-frame when the hits use it)")
+    parser.add_argument("--non-drop-frame", dest="drop_frame", action="store_false",
+                        help="Non-drop-frame record timecode")
+    parser.add_argument("--chronological", action="store_true",
+                        help="List (and write) the hits in file and time order instead of by rank")
+
+    args = parser.parse_args(argv)
+    with SearchIndex(args.catalog) as index:
+        started = time.perf_counter()
+        hits = index.search(args.query, args.limit or None, args.folder)
+        elapsed = time.perf_counter() - started
+    if args.chronological:
+        hits.sort(key=lambda hit: (hit.path, hit.source_in.frames))
+
+    for hit in hits:
+        print(f"{hit.score:6.2f}  {hit.reel:8s} {hit.source_in.to_cmx()} {hit.source_out.to_cmx()}  "
+              f"{hit.clip}  {hit.text}")
+    print(f"{len(hits)}件 ({elapsed * 1000:.1f} ms)")
+
+    if args.edl:
+        try:
+            edl_data = hits_to_edl(hits, title=f"Search: {args.query}", handles=args.handles,
+                                   rate=args.rate, drop_frame=args.drop_frame)
+        except ValueError as e:
+            parser.error(str(e))
+        with open(args.edl, "w", encoding="utf-8") as f:
+            edl_data.write_to(f)
+        print(f"EDLファイルを保存しました: {args.edl} ({len(edl_data.events)}イベント)")
+
+
+if __name__ == "__main__":
+    search_main(sys.argv[1:])
@@ -0,0 +1,192 @@
+from array import array
+from fractions import Fraction
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from segment import Segment, clean_japanese_text
+from timecode import Timecode, DEFAULT_RATE
+
+
+class SegmentView(Segment):
+    """
+    A Segment-compatible view of one row of a SegmentStore.
+
+    値はストアの配列から必要になったときに読み出すため、ビュー自体はほぼメモリを使いません。
+    """
+
+    def __init__(self, store: "SegmentStore", index: int):
+        """
+        Initializes the view.
+
+        Args:
+            store: The store holding the segment.
+            index: Absolute row index in the store's columns.
+        """
+        self._store = store
+        self._index = index
+
+    @property
+    def start_timecode(self) -> Timecode:
+        store = self._store
+        return Timecode(store._start[self._index], store.rate, store.drop_frame)
+
+    @property
+    def end_timecode(self) -> Timecode:
+        store = self._store
+        return Timecode(store._end[self._index], store.rate, store.drop_frame)
+
+    @property
+    def transcription(self) -> str:
+        return self._store._text_at(self._index)
+
+    @property
+    def words(self) -> List[Dict[str, Any]]:
+        """Word-level timestamps of the segment (empty if the store has none)."""
+        return self._store._words_at(self._index)
+
+
+class SegmentStore:
+    """
+    Columnar, array-backed container of segments.
+
+    開始・終了フレームは整数配列、テキストは1つのUTF-8バッファとそのオフセット配列、
+    単語情報（任意）も同様に配列で保持します。Segmentオブジェクトのリストと比べて
+    セグメントあたりのメモリが小さく、スライスは配列をコピーしません。
+    """
+
+    def __init__(self, rate: Fraction = DEFAULT_RATE, drop_frame: bool = False):
+        """
+        Initializes an empty store.
+
+        Args:
+            rate: Frame rate of the stored timecodes.
+            drop_frame: Whether the timecodes use drop-frame numbering.
+        """
+        self.rate: Fraction = rate
+        self.drop_frame: bool = drop_frame
+        self._start = array("q")  # 開始フレーム
+        self._end = array("q")  # 終了フレーム
+        self._text = bytearray()  # 全セグメントのテキスト（UTF-8）
+        self._text_offsets = array("q", [0])  # i番目のテキストは _text[offsets[i]:offsets[i+1]]
+        # 単語情報: i番目のセグメントの単語は word_offsets[i]:word_offsets[i+1]
+        self._word_offsets = array("q", [0])
+        self._word_start = array("d")  # 秒
+        self._word_end = array("d")
+        self._word_probability = array("f")
+        self._word_text = bytearray()
+        self._word_text_offsets = array("q", [0])
+        # スライスの場合の範囲（None: ストア全体）
+        self._lo: int = 0
+        self._hi: Optional[int] = None
+
+    def append(self, start: Timecode, end: Timecode, transcription: str,
+               words: Optional[Sequence[Dict[str, Any]]] = None) -> None:
+        """
+        Appends a segment.
+
+        Args:
+            start: Start timecode (at the store's frame rate).
+            end: End timecode.
+            transcription: Text of the segment (cleaned like Segment does).
+            words: Optional word timestamps (dicts with word, start, end, probability).
+        """
+        if self._hi is not None:
+            raise TypeError("スライスにはセグメントを追加できません")
+        self._start.append(start.frames)
+        self._end.append(end.frames)
+        self._text += clean_japanese_text(transcription).encode("utf-8")
+        self._text_offsets.append(len(self._text))
+        for word in words or ():
+            self._word_start.append(word["start"])
+            self._word_end.append(word["end"])
+            self._word_probability.append(word.get("probability") or 0.0)
+            self._word_text += (word.get("word") or "").encode("utf-8")
+            self._word_text_offsets.append(len(self._word_text))
+        self._word_offsets.append(len(self._word_start))
+
+    def append_segment(self, segment: Segment) -> None:
+        """Appends a Segment (or a view of another store)."""
+        self.append(segment.start_timecode, segment.end_timecode, segment.transcription,
+                     getattr(segment, "words", None))
+
+    def _bounds(self) -> Tuple[int, int]:
+        return self._lo, len(self._start) if self._hi is None else self._hi
+
+    def __len__(self) -> int:
+        lo, hi = self._bounds()
+        return hi - lo
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[SegmentView, "SegmentStore"]:
+        lo, hi = self._bounds()
+        if isinstance(index, slice):
+            start, stop, step = index.indices(hi - lo)
+            if step != 1:
+                raise ValueError("SegmentStoreのスライスはステップ1のみ対応しています")
+            # 配列はコピーせず、範囲だけを持つストアを返す
+            view = object.__new__(SegmentStore)
+            view.__dict__.update(self.__dict__)
+            view._lo = lo + start
+            view._hi = lo + max(start, stop)
+            return view
+        if index < 0:
+            index += hi - lo
+        if not 0 <= index < hi - lo:
+            raise IndexError("セグメントのインデックスが範囲外です")
+        return SegmentView(self, lo + index)
+
+    def __iter__(self) -> Iterator[SegmentView]:
+        lo, hi = self._bounds()
+        for index in range(lo, hi):
+            yield SegmentView(self, index)
+
+    def start_frames(self) -> memoryview:
+        """
+        Returns the start frames as a zero-copy int64 memoryview.
+
+        np.asarray などで直接読み込めます。ビューを保持している間はストアに追加できません。
+        """
+        lo, hi = self._bounds()
+        return memoryview(self._start)[lo:hi]
+
+    def end_frames(self) -> memoryview:
+        """Returns the end frames as a zero-copy int64 memoryview."""
+        lo, hi = self._bounds()
+        return memoryview(self._end)[lo:hi]
+
+    def _text_at(self, index: int) -> str:
+        offsets = self._text_offsets
+        return self._text[offsets[index]:offsets[index + 1]].decode("utf-8")
+
+    def _words_at(self, index: int) -> List[Dict[str, Any]]:
+        text_offsets = self._word_text_offsets
+        return [
+            {
+                "word": self._word_text[text_offsets[w]:text_offsets[w + 1]].decode("utf-8"),
+                "start": self._word_start[w],
+                "end": self._word_end[w],
+                "probability": self._word_probability[w],
+            }
+            for w in range(self._word_offsets[index], self._word_offsets[index + 1])
+        ]
+
+    def srt_entries(self) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields (start ms, end ms, text) in start order, straight from the columns.
+
+        開始時間が同じセグメントは追加順のままです（SRTData.write_merged への入力用）。
+        """
+        lo, hi = self._bounds()
+        start, end = self._start, self._end
+        numerator, denominator = self.rate.numerator, self.rate.denominator
+        # ほぼ時間順に並んでいるため、このソートはほぼ線形時間で終わる
+        for index in sorted(range(lo, hi), key=start.__getitem__):
+            yield (
+                start[index] * 1000 * denominator // numerator,
+                end[index] * 1000 * denominator // numerator,
+                self._text_at(index),
+            )
+
+    def nbytes(self) -> int:
+        """Returns the approximate memory used by the columns in bytes."""
+        columns = [self._start, self._end, self._text_offsets, self._word_offsets, self._word_start,
+                   self._word_end, self._word_probability, self._word_text_offsets]
+        return sum(c.itemsize * len(c) for c in columns) + len(self._text) + len(self._word_text)
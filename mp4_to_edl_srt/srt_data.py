@@ -1,6 +1,15 @@
-import os
-from typing import List, Dict
+import heapq
+from operator import itemgetter
+from typing import List, Iterable, Iterator, Tuple
 from segment import Segment
+from timecode import format_srt_time
+
+# SRTの1エントリ: (開始ミリ秒, 終了ミリ秒, テキスト)
+SRTEntry = Tuple[int, int, str]
+
+
+def _start_ms(segment: Segment) -> int:
+    return segment.start_timecode.milliseconds
 
 
 class SRTData:
@@ -15,36 +24,76 @@ class SRTData:
         """Adds a segment to the SRT data."""
         self.segments.append(segment)
 
+    def sorted_segments(self) -> List[Segment]:
+        """Returns the segments ordered by start time (stable for equal starts)."""
+        # 各ファイルのセグメントはほぼ時間順なので、このソートはほぼ線形時間で終わる
+        return sorted(self.segments, key=_start_ms)
+
+    def srt_entries(self) -> Iterator[SRTEntry]:
+        """Yields the segments as (start ms, end ms, text) entries in start order."""
+        for segment in self.sorted_segments():
+            yield (segment.start_timecode.milliseconds, segment.end_timecode.milliseconds, segment.transcription)
+
     def write_to_file(self, output_path: str) -> None:
         """Writes the SRT data to a file."""
-        # セグメントを開始時間でソート
-        sorted_segments = sorted(self.segments, key=lambda x: self._timecode_to_seconds(x.start_timecode))
-        
+        self.write_merged(output_path, [self.srt_entries()])
+
+    @staticmethod
+    def write_merged(output_path: str, segment_streams: Iterable[Iterable[SRTEntry]]) -> int:
+        """
+        Merges per-file entry streams by start time and writes them as one SRT file.
+
+        各ストリームはすでに開始時間順であることが前提です。ヒープによるk-wayマージで
+        全体を再ソートせず（O(n log k)）、セグメントは1つずつファイルに書き出されます。
+        開始時間が同じ場合は、先に渡されたストリームのセグメントが先になります。
+
+        Args:
+            output_path: Path of the SRT file to write.
+            segment_streams: One time-ordered iterable of (start ms, end ms, text) entries
+                per source file (SRTData.srt_entries or SegmentStore.srt_entries).
+
+        Returns:
+            The number of written segments.
+        """
+        count = 0
         with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(sorted_segments, 1):
-                # SRTのタイムコード形式に変換
-                start_srt = self._timecode_to_srt(segment.start_timecode)
-                end_srt = self._timecode_to_srt(segment.end_timecode)
+            merged = heapq.merge(*segment_streams, key=itemgetter(0))
+            for count, (start_ms, end_ms, text) in enumerate(merged, 1):
+                # SRTのタイムコード形式に変換（整数のミリ秒から）
+                start_srt = format_srt_time(start_ms)
+                end_srt = format_srt_time(end_ms)
                 
-                # テキストを取得（すでにSegmentクラスで整形済み）
-                text = segment.transcription
-                
-                # SRT形式で書き込み
-                f.write(f"{i}\n")
-                f.write(f"{start_srt} --> {end_srt}\n")
-                f.write(f"{text}\n\n")
+                # テキストはすでにSegmentクラス（SegmentStore）で整形済み
+                f.write(f"{count}\n{start_srt} --> {end_srt}\n{text}\n\n")
         
         print(f"SRTファイルを保存しました: {output_path}")
-        print(f"合計 {len(sorted_segments)} セグメントを書き込みました")
-
-    def _timecode_to_srt(self, timecode: str) -> str:
-        """Converts HH:MM:SS:FF to SRT format (HH:MM:SS,mmm)."""
-        hh, mm, ss, ff = timecode.split(':')
-        # 30fpsを想定して、フレーム数をミリ秒に変換（1フレーム = 33.33ミリ秒）
-        ms = int(int(ff) * 1000 / 30)
-        return f"{hh}:{mm}:{ss},{ms:03d}"
-        
-    def _timecode_to_seconds(self, timecode: str) -> float:
-        """Converts HH:MM:SS:FF to seconds (30 fps)."""
-        hh, mm, ss, ff = map(int, timecode.split(":"))
-        return hh * 3600 + mm * 60 + ss + ff / 30.0
+        print(f"合計 {count} セグメントを書き込みました")
+        return count
+
+
+class LiveSRTWriter:
+    """
+    Appends subtitles to an SRT file as they are produced (partial output of a running batch).
+
+    1エントリごとにフラッシュするため、処理中でもファイルを開いて途中経過を確認できます。
+    エントリは生成順（ファイル順・ファイル内の時間順）で、タイムコードは各ファイルの先頭からの時間です。
+    """
+    def __init__(self, output_path: str) -> None:
+        """Opens (truncates) the partial SRT file."""
+        self.output_path: str = output_path
+        self.count: int = 0
+        self._stream = open(output_path, 'w', encoding='utf-8')
+
+    def write(self, segment: Segment) -> None:
+        """Appends one segment and flushes it to disk."""
+        self.count += 1
+        self._stream.write(
+            f"{self.count}\n{segment.start_timecode.to_srt()} --> {segment.end_timecode.to_srt()}\n"
+            f"{segment.transcription}\n\n"
+        )
+        self._stream.flush()
+
+    def close(self) -> None:
+        """Closes the file."""
+        self._stream.close()
+
@@ -0,0 +1,245 @@
+from fractions import Fraction
+from typing import Dict, Tuple, Union
+
+# 対応するフレームレート
+RATE_23_976 = Fraction(24000, 1001)
+RATE_24 = Fraction(24)
+RATE_25 = Fraction(25)
+RATE_29_97 = Fraction(30000, 1001)
+RATE_30 = Fraction(30)
+RATE_50 = Fraction(50)
+RATE_59_94 = Fraction(60000, 1001)
+
+# EDL/SRTの生成で使うフレームレート
+DEFAULT_RATE = RATE_30
+
+# ドロップフレームが定義されているフレームレート
+DROP_FRAME_RATES = (RATE_29_97, RATE_59_94)
+
+# 書き出しを高速化するためのゼロ埋め済みの数字（f"{n:02d}" より大幅に速い）
+_DIGITS_2 = [f"{n:02d}" for n in range(100)]
+_DIGITS_3 = [f"{n:03d}" for n in range(1000)]
+
+# (公称フレーム数/秒, 1分ごとに飛ばすフレーム数, レートの分子, 分母)
+_Spec = Tuple[int, int, int, int]
+# Fractionのハッシュ計算は遅いため、レートのオブジェクトIDで引く
+_specs: Dict[Tuple[int, bool], Tuple[Fraction, _Spec]] = {}
+
+
+def _spec(rate: Fraction, drop_frame: bool) -> _Spec:
+    entry = _specs.get((id(rate), drop_frame))
+    if entry is not None and entry[0] is rate:
+        return entry[1]
+    if drop_frame and rate not in DROP_FRAME_RATES:
+        raise ValueError(f"ドロップフレームは29.97/59.94fpsでのみ使用できます: {float(rate):.3f}fps")
+    nominal = -(-rate.numerator // rate.denominator)  # 29.97 → 30, 23.976 → 24
+    drop = nominal // 15 if drop_frame else 0  # 29.97 DF: 2, 59.94 DF: 4
+    spec = (nominal, drop, rate.numerator, rate.denominator)
+    # 参照を保持してIDの再利用を防ぐ
+    _specs[(id(rate), drop_frame)] = (rate, spec)
+    return spec
+
+
+# 名前の付いたフレームレート（standard_rateで同じオブジェクトに揃える）
+STANDARD_RATES = (RATE_23_976, RATE_24, RATE_25, RATE_29_97, RATE_30, RATE_50, RATE_59_94)
+
+
+def standard_rate(rate: Fraction) -> Fraction:
+    """Returns the standard rate object within 1/100 fps of the given rate (e.g. 2997/100 → 30000/1001), or the rate itself."""
+    for standard in STANDARD_RATES:
+        if abs(rate - standard) < Fraction(1, 100):
+            return standard
+    return rate
+
+
+def parse_rate(text: str) -> Fraction:
+    """Parses a frame rate such as "30", "29.97" or "30000/1001" (decimals close to an NTSC rate select it)."""
+    rate = Fraction(text)
+    if rate <= 0:
+        raise ValueError(f"フレームレートが正しくありません: {text}")
+    return standard_rate(rate)
+
+
+def format_srt_time(milliseconds: int) -> str:
+    """Formats integer milliseconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    total_seconds, ms = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(total_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    digits = _DIGITS_2
+    hh = digits[hours] if hours < 100 else str(hours)
+    return f"{hh}:{digits[minutes]}:{digits[seconds]},{_DIGITS_3[ms]}"
+
+
+class Timecode:
+    """
+    A SMPTE timecode stored as an integer frame count at a rational frame rate.
+
+    計算や比較はフレーム数の整数演算だけで行い、文字列への変換は
+    EDL/SRTの書き出し時（to_cmx / to_srt）にのみ行います。
+    """
+
+    __slots__ = ("frames", "rate", "drop_frame", "_spec")
+
+    def __init__(self, frames: int = 0, rate: Fraction = DEFAULT_RATE, drop_frame: bool = False):
+        """
+        Initializes a timecode.
+
+        Args:
+            frames: Frame count from 00:00:00:00.
+            rate: Frame rate in frames per second.
+            drop_frame: Label frames with drop-frame numbering (29.97 and 59.94 only).
+        """
+        self.frames: int = frames
+        self.rate: Fraction = rate
+        self.drop_frame: bool = drop_frame
+        self._spec: _Spec = _spec(rate, drop_frame)
+
+    def with_frames(self, frames: int) -> "Timecode":
+        """Returns a timecode at another frame with the same rate and numbering."""
+        result = object.__new__(Timecode)
+        result.frames = frames
+        result.rate = self.rate
+        result.drop_frame = self.drop_frame
+        result._spec = self._spec
+        return result
+
+    @classmethod
+    def from_seconds(cls, seconds: float, rate: Fraction = DEFAULT_RATE, drop_frame: bool = False) -> "Timecode":
+        """Returns the timecode of the frame containing the given time (truncated)."""
+        spec = _spec(rate, drop_frame)
+        result = object.__new__(cls)
+        result.frames = int(seconds * spec[2] / spec[3])
+        result.rate = rate
+        result.drop_frame = drop_frame
+        result._spec = spec
+        return result
+
+    @classmethod
+    def from_components(cls, hours: int, minutes: int, seconds: int, frames: int,
+                        rate: Fraction = DEFAULT_RATE, drop_frame: bool = False) -> "Timecode":
+        """Returns the timecode with the given HH:MM:SS:FF label."""
+        nominal, drop, _, _ = _spec(rate, drop_frame)
+        total = (hours * 3600 + minutes * 60 + seconds) * nominal + frames
+        if drop:
+            total_minutes = hours * 60 + minutes
+            total -= drop * (total_minutes - total_minutes // 10)
+        return cls(total, rate, drop_frame)
+
+    @classmethod
+    def parse(cls, text: str, rate: Fraction = DEFAULT_RATE) -> "Timecode":
+        """
+        Parses an HH:MM:SS:FF (or drop-frame HH:MM:SS;FF) label.
+
+        Args:
+            text: The timecode label.
+            rate: Frame rate of the timecode. A ';' separator selects drop-frame
+                numbering when the rate supports it.
+
+        Returns:
+            The parsed timecode.
+        """
+        label = text.strip()
+        drop_frame = ";" in label and rate in DROP_FRAME_RATES
+        parts = label.replace(";", ":").replace(".", ":").split(":")
+        if len(parts) != 4:
+            raise ValueError(f"タイムコードの形式が正しくありません: {text}")
+        hours, minutes, seconds, frames = map(int, parts)
+        return cls.from_components(hours, minutes, seconds, frames, rate, drop_frame)
+
+    @property
+    def seconds(self) -> float:
+        """Elapsed time in seconds."""
+        _, _, numerator, denominator = self._spec
+        return self.frames * denominator / numerator
+
+    def components(self) -> Tuple[int, int, int, int]:
+        """Returns the (hours, minutes, seconds, frames) label of the timecode."""
+        nominal, drop, _, _ = self._spec
+        frames = self.frames
+        if drop:
+            # ドロップフレーム: 10分ごとを除く毎分の先頭のフレーム番号を飛ばす
+            per_10_minutes = nominal * 600 - drop * 9
+            per_minute = nominal * 60 - drop
+            tens, rest = divmod(frames, per_10_minutes)
+            frames += drop * 9 * tens
+            if rest > drop:
+                frames += drop * ((rest - drop) // per_minute)
+        total_seconds, ff = divmod(frames, nominal)
+        hours, rest = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(rest, 60)
+        return hours, minutes, seconds, ff
+
+    def to_cmx(self) -> str:
+        """Formats the timecode for CMX 3600 EDLs (HH:MM:SS:FF, HH:MM:SS;FF for drop-frame)."""
+        if self.drop_frame:
+            hours, minutes, seconds, frames = self.components()
+            separator = ";"
+        else:
+            # ノンドロップは公称フレーム数で割るだけ（書き出しで最も多く呼ばれるため展開）
+            total_seconds, frames = divmod(self.frames, self._spec[0])
+            minutes, seconds = divmod(total_seconds, 60)
+            hours, minutes = divmod(minutes, 60)
+            separator = ":"
+        digits = _DIGITS_2
+        hh = digits[hours] if hours < 100 else str(hours)
+        return f"{hh}:{digits[minutes]}:{digits[seconds]}{separator}{digits[frames]}"
+
+    @property
+    def milliseconds(self) -> int:
+        """Elapsed time in whole milliseconds (truncated)."""
+        _, _, numerator, denominator = self._spec
+        return self.frames * 1000 * denominator // numerator
+
+    def to_srt(self) -> str:
+        """Formats the elapsed time for SRT files (HH:MM:SS,mmm, truncated to milliseconds)."""
+        return format_srt_time(self.milliseconds)
+
+    def _check(self, other: "Timecode") -> None:
+        if other.rate is not self.rate and other.rate != self.rate:
+            raise ValueError(
+                f"フレームレートの異なるタイムコードは計算できません: {float(self.rate):.3f} / {float(other.rate):.3f}"
+            )
+
+    def __add__(self, other: Union["Timecode", int]) -> "Timecode":
+        if isinstance(other, Timecode):
+            self._check(other)
+            return self.with_frames(self.frames + other.frames)
+        return self.with_frames(self.frames + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Union["Timecode", int]) -> "Timecode":
+        if isinstance(other, Timecode):
+            self._check(other)
+            return self.with_frames(self.frames - other.frames)
+        return self.with_frames(self.frames - other)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Timecode):
+            return NotImplemented
+        return self.frames == other.frames and self.rate == other.rate
+
+    def __hash__(self) -> int:
+        return hash((self.frames, self.rate))
+
+    def __lt__(self, other: "Timecode") -> bool:
+        self._check(other)
+        return self.frames < other.frames
+
+    def __le__(self, other: "Timecode") -> bool:
+        self._check(other)
+        return self.frames <= other.frames
+
+    def __gt__(self, other: "Timecode") -> bool:
+        self._check(other)
+        return self.frames > other.frames
+
+    def __ge__(self, other: "Timecode") -> bool:
+        self._check(other)
+        return self.frames >= other.frames
+
+    def __str__(self) -> str:
+        return self.to_cmx()
+
+    def __repr__(self) -> str:
+        return f"Timecode({self.to_cmx()!r}, {float(self.rate):.3f}fps)"
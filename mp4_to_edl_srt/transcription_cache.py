@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from typing import List, Dict, Optional, Any
+
+# 既定のキャッシュディレクトリとサイズ上限
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MP4_TO_EDL_SRT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "mp4_to_edl_srt", "transcriptions")
+)
+DEFAULT_MAX_BYTES = 2 * 1024**3  # 2GB
+
+# キャッシュ形式のバージョン（形式を変えた場合は上げて古いエントリを無効化する）
+CACHE_VERSION = 1
+
+
+def file_identity(filepath: str, content_hash: bool = False) -> Dict[str, Any]:
+    """
+    Returns the identity of a source file used in cache keys.
+
+    Args:
+        filepath: Path to the source file.
+        content_hash: Hash the file content (SHA-256) instead of using
+            (size, mtime, inode). Slower, but survives copies and touches.
+
+    Returns:
+        A JSON-serializable dictionary identifying the file content.
+    """
+    if content_hash:
+        digest = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return {"sha256": digest.hexdigest()}
+
+    stat = os.stat(filepath)
+    identity = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+    # inodeを持たないファイルシステム（一部のNAS共有など）ではパスで区別する
+    if not stat.st_ino:
+        identity["path"] = os.path.abspath(filepath)
+    return identity
+
+
+def make_cache_key(identity: Dict[str, Any], params: Dict[str, Any]) -> str:
+    """Builds a cache key from a file identity and the model/decode parameters."""
+    payload = json.dumps(
+        {"version": CACHE_VERSION, "file": identity, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    On-disk, size-bounded LRU cache of transcription results.
+
+    各エントリは1つのJSONファイルで、最終アクセス時刻をファイルの更新時刻として
+    記録します。合計サイズが上限を超えると、最も古くアクセスされたエントリから削除します。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 content_hash: bool = False):
+        """
+        Initializes the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries.
+            max_bytes: Maximum total size of the cache in bytes.
+            content_hash: Identify source files by content hash instead of (size, mtime, inode).
+        """
+        self.cache_dir: str = os.path.normpath(cache_dir or DEFAULT_CACHE_DIR)
+        self.max_bytes: int = max_bytes
+        self.content_hash: bool = content_hash
+
+    def key_for(self, filepath: str, params: Dict[str, Any]) -> str:
+        """Returns the cache key of a source file transcribed with the given parameters."""
+        return make_cache_key(file_identity(filepath, self.content_hash), params)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Returns the cached transcription result, or None on a miss.
+
+        ヒットしたエントリは更新時刻を更新し、LRUの最新として扱います。
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"警告: 破損したキャッシュエントリを削除します: {path} ({e})")
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("result")
+
+    def put(self, key: str, result: Dict, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Stores a transcription result and evicts old entries if the cache is too large.
+
+        Args:
+            key: Cache key from key_for.
+            result: The transcription result (segments with word timestamps).
+            meta: Extra information shown by the cache CLI (source path, parameters).
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._entry_path(key)
+        entry = {
+            "version": CACHE_VERSION,
+            "created": time.time(),
+            "meta": meta or {},
+            "result": result,
+        }
+        # 複数プロセスから同時に書き込まれても壊れないよう、一時ファイル経由で置き換える
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.prune(self.max_bytes)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Returns the cache entries, most recently used first."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append({
+                "key": name[:-len(".json")],
+                "path": path,
+                "size": stat.st_size,
+                "last_used": stat.st_mtime,
+            })
+        entries.sort(key=lambda e: e["last_used"], reverse=True)
+        return entries
+
+    def read_meta(self, key: str) -> Dict[str, Any]:
+        """Returns the metadata stored with an entry (without touching its LRU position)."""
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as f:
+                return json.load(f).get("meta", {})
+        except (OSError, ValueError):
+            return {}
+
+    def total_size(self) -> int:
+        """Returns the total size of the cache in bytes."""
+        return sum(e["size"] for e in self.entries())
+
+    def prune(self, max_bytes: int) -> int:
+        """
+        Removes least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            The number of removed entries.
+        """
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        removed = 0
+        while entries and total > max_bytes:
+            oldest = entries.pop()
+            if self._remove(oldest["path"]):
+                total -= oldest["size"]
+                removed += 1
+        return removed
+
+    def clear(self) -> int:
+        """Removes all entries and returns how many were removed."""
+        return self.prune(-1)
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+def _format_size(size: float) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def _parse_size(text: str) -> int:
+    """Parses sizes like 500M, 2G or 1048576."""
+    text = text.strip().upper().rstrip("B")
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def cache_main(argv: Optional[List[str]] = None) -> None:
+    """Command line interface to inspect and prune the transcription cache."""
+    parser = argparse.ArgumentParser(prog="main.py cache", description="Transcription cache management")
+    parser.add_argument("--cache-dir", default=None, help=f"Cache directory (default: {DEFAULT_CACHE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Show the number of entries and the total size")
+    subparsers.add_parser("list", help="List entries, most recently used first")
+    prune_parser = subparsers.add_parser("prune", help="Remove least recently used entries")
+    prune_parser.add_argument("--max-size", required=True, help="Size to prune down to (e.g. 500M, 2G)")
+    subparsers.add_parser("clear", help="Remove all entries")
+
+    args = parser.parse_args(argv)
+    cache = TranscriptionCache(args.cache_dir)
+
+    if args.command == "stats":
+        entries = cache.entries()
+        print(f"キャッシュディレクトリ: {cache.cache_dir}")
+        print(f"エントリ数: {len(entries)}")
+        print(f"合計サイズ: {_format_size(sum(e['size'] for e in entries))}")
+    elif args.command == "list":
+        for entry in cache.entries():
+            meta = cache.read_meta(entry["key"])
+            last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_used"]))
+            print(f"{entry['key'][:16]}  {_format_size(entry['size']):>8s}  {last_used}  "
+                  f"{meta.get('model', '-')}  {meta.get('source', '-')}")
+    elif args.command == "prune":
+        removed = cache.prune(_parse_size(args.max_size))
+        print(f"{removed}個のエントリを削除しました (現在のサイズ: {_format_size(cache.total_size())})")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"{removed}個のエントリを削除しました")
+
+
+if __name__ == "__main__":
+    cache_main(sys.argv[1:])
@@ -0,0 +1,154 @@
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from audio_pipe import SAMPLE_RATE, DEFAULT_CHUNK_SECONDS
+
+# エネルギーを計算するフレームの長さ（秒）
+FRAME_SECONDS = 0.02
+
+
+class VADOptions(NamedTuple):
+    """Settings of the energy-based speech detection pre-pass."""
+    threshold_db: float = 12.0  # 雑音レベルよりこれだけ大きい音で音声区間が始まる（dB）
+    hysteresis_db: float = 6.0  # 開始の閾値よりこれだけ小さくなるまで音声区間が続く（dB）
+    min_speech: float = 0.25  # これより短い音声区間は無視する（秒）
+    min_silence: float = 1.0  # これより短い無音では区切らない（秒）
+    padding: float = 0.3  # 音声区間の前後に付ける余白（秒）
+    floor_db: float = -60.0  # これより小さい音は雑音レベルに関係なく無音とみなす（dBFS）
+
+
+def _array_chunks(audio: np.ndarray, sample_rate: int) -> Iterator[np.ndarray]:
+    """Yields views of an in-memory recording in pipe-sized chunks (no copies)."""
+    size = int(DEFAULT_CHUNK_SECONDS * sample_rate)
+    for start in range(0, len(audio), size):
+        yield audio[start:start + size]
+
+
+def frame_energy_db(chunks: Union[np.ndarray, Iterable[np.ndarray]], sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Returns the energy of consecutive 20 ms frames in dBFS.
+
+    音声はチャンクごとに処理し、保持するのはフレームごとのエネルギーだけなので、
+    iter_pcm_chunks と組み合わせれば長い録音でも音声全体をメモリに読み込みません。
+
+    Args:
+        chunks: Mono float32 samples, either as one array or split into consecutive chunks.
+        sample_rate: Sample rate of the samples.
+
+    Returns:
+        One energy value per frame (a trailing partial frame is dropped).
+    """
+    if isinstance(chunks, np.ndarray):
+        chunks = _array_chunks(chunks, sample_rate)
+    frame = int(FRAME_SECONDS * sample_rate)
+    parts = []
+    remainder = np.zeros(0, dtype=np.float32)
+    for chunk in chunks:
+        if remainder.size:
+            chunk = np.concatenate([remainder, chunk])
+        n_frames = len(chunk) // frame
+        frames = chunk[:n_frames * frame].reshape(n_frames, frame)
+        power = np.mean(np.square(frames, dtype=np.float32), axis=1)
+        parts.append(10.0 * np.log10(power + 1e-12))
+        remainder = chunk[n_frames * frame:]
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(parts)
+
+
+def detect_speech(energy_db: np.ndarray, options: VADOptions = VADOptions()) -> List[Tuple[float, float]]:
+    """
+    Finds speech regions with a hysteresis threshold over frame energies.
+
+    雑音レベル（エネルギーの下位10%）より threshold_db 大きいフレームで音声区間が始まり、
+    そこから hysteresis_db 下がるまで続きます。短い無音は埋め、短い音声区間は除き、
+    前後に余白を付けて重なった区間は結合します。すべて配列演算で行います。
+
+    Args:
+        energy_db: Frame energies from frame_energy_db.
+        options: Detection settings.
+
+    Returns:
+        (start, end) of each padded speech region in seconds, in time order.
+    """
+    if energy_db.size == 0:
+        return []
+    noise_db = float(np.percentile(energy_db, 10))
+    high = max(noise_db + options.threshold_db, options.floor_db)
+    low = high - options.hysteresis_db
+
+    # 下側の閾値を超える連続区間
+    edges = np.diff((energy_db > low).astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if starts.size == 0:
+        return []
+    # 上側の閾値を超えるフレームを含む区間だけを音声とする（区間の間のフレームは low 以下なので最大値に影響しない）
+    loud = np.maximum.reduceat(energy_db, starts) > high
+    starts, ends = starts[loud], ends[loud]
+    if starts.size == 0:
+        return []
+
+    # 短い無音を埋める
+    keep_gap = (starts[1:] - ends[:-1]) * FRAME_SECONDS >= options.min_silence
+    starts = np.concatenate([starts[:1], starts[1:][keep_gap]])
+    ends = np.concatenate([ends[:-1][keep_gap], ends[-1:]])
+    # 短い音声区間を除く
+    long_enough = (ends - starts) * FRAME_SECONDS >= options.min_speech
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    total = energy_db.size * FRAME_SECONDS
+    regions: List[Tuple[float, float]] = []
+    for start, end in zip((starts * FRAME_SECONDS - options.padding).tolist(),
+                          (ends * FRAME_SECONDS + options.padding).tolist()):
+        start, end = max(0.0, start), min(total, end)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def compact_audio(audio: np.ndarray, regions: List[Tuple[float, float]],
+                  sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Concatenates the speech regions of a recording into one array for ASR."""
+    return np.concatenate([audio[int(start * sample_rate):int(end * sample_rate)] for start, end in regions])
+
+
+class TimeMap:
+    """Maps timestamps in the concatenated speech audio back to the original recording."""
+
+    def __init__(self, regions: List[Tuple[float, float]], sample_rate: int = SAMPLE_RATE):
+        """
+        Initializes the map.
+
+        Args:
+            regions: Speech regions passed to compact_audio.
+            sample_rate: Sample rate used by compact_audio.
+        """
+        self.regions: List[Tuple[float, float]] = regions
+        # compact_audio と同じサンプル単位の丸めで、結合後の各区間の開始時刻を求める
+        self._compact_starts: List[float] = []
+        position = 0
+        for start, end in regions:
+            self._compact_starts.append(position / sample_rate)
+            position += int(end * sample_rate) - int(start * sample_rate)
+
+    def to_source(self, seconds: float) -> float:
+        """Returns the time in the original recording of a time in the concatenated audio."""
+        index = max(0, bisect_right(self._compact_starts, seconds) - 1)
+        start, end = self.regions[index]
+        return min(start + seconds - self._compact_starts[index], end)
+
+    def map_segment(self, segment: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns a copy of a segment with its (and its words') timestamps mapped back."""
+        mapped = dict(segment)
+        mapped["start"] = self.to_source(segment["start"])
+        mapped["end"] = self.to_source(segment["end"])
+        mapped["words"] = [
+            {**word, "start": self.to_source(word["start"]), "end": self.to_source(word["end"])}
+            for word in segment.get("words", [])
+        ]
+        return mapped
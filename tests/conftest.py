@@ -0,0 +1,5 @@
+import os
+import sys
+
+# モジュールはパッケージではなく mp4_to_edl_srt/ から直接インポートされる（main.py と同じ）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt"))
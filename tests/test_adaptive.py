@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from adaptive import AdaptiveOptions, EscalationWindow, plan_escalation, splice_segments, transcribe_adaptive
+
+SAMPLE_RATE = 16000
+
+
+def _segment(start, end, text, avg_logprob=-0.2, words=None):
+    segment = {"start": start, "end": end, "text": text, "avg_logprob": avg_logprob}
+    if words is not None:
+        segment["words"] = [{"word": word, "start": s, "end": e} for word, s, e in words]
+    return segment
+
+
+FIRST_PASS = [
+    _segment(0.0, 2.0, "a"),
+    _segment(2.0, 4.0, "b", -1.0),
+    _segment(4.5, 6.0, "c"),
+    _segment(6.5, 8.0, "d", -1.5),
+    _segment(20.0, 22.0, "e", -0.9),
+    _segment(22.0, 24.0, "f"),
+]
+
+
+def test_plan_escalation_merges_close_segments():
+    windows = plan_escalation(FIRST_PASS, AdaptiveOptions(padding=1.0, merge_gap=3.0), 23.0)
+    assert windows == [
+        EscalationWindow(1.0, 9.0, 2.0, 8.0, 1, 4),  # b〜d（間のcも置き換える）
+        EscalationWindow(19.0, 23.0, 20.0, 22.0, 4, 5),  # 録音の終わりで止まる
+    ]
+
+
+def test_confident_or_empty_segments_are_kept():
+    segments = [_segment(0.0, 1.0, "a"), _segment(1.0, 2.0, " ", -3.0)]
+    assert plan_escalation(segments, AdaptiveOptions(), 2.0) == []
+
+
+def test_splice_replaces_only_the_keep_range():
+    windows = [EscalationWindow(1.0, 5.0, 2.0, 4.0, 1, 2)]
+    # 窓の先頭（1.0秒）からの時刻。余白（1〜2秒、4〜5秒）の単語は採用しない
+    redecoded = [_segment(0.0, 4.0, "xbby", words=[("x", 0.0, 0.8), ("bb", 1.0, 2.9), ("y", 3.2, 4.0)])]
+    spliced = splice_segments(FIRST_PASS[:3], windows, [redecoded], "en")
+    assert [(s["start"], s["end"], s["text"]) for s in spliced] == [
+        (0.0, 2.0, "a"), (2.0, 3.9, "bb"), (4.5, 6.0, "c"),
+    ]
+
+
+def test_transcribe_adaptive_reports_escalated_audio():
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    segments = [_segment(0.0, 4.0, "a"), _segment(4.0, 6.0, "b", -2.0), _segment(6.0, 10.0, "c")]
+    calls = []
+
+    def first_pass(samples, params):
+        calls.append(("first", params["beam_size"]))
+        return {"segments": segments, "language": "ja"}
+
+    def beam_search(samples, params):
+        calls.append(("window", len(samples) / SAMPLE_RATE))
+        return {"segments": [_segment(1.0, 3.0, "B")]}
+
+    result = transcribe_adaptive(audio, {"backend": "faster-whisper", "beam_size": 5, "language": "ja"},
+                                 first_pass, beam_search, lambda: audio, AdaptiveOptions(padding=1.0), 10.0)
+    assert calls == [("first", 1), ("window", 4.0)]
+    assert [s["text"] for s in result["segments"]] == ["a", "B", "c"]
+    assert result["adaptive"]["windows"] == 1
+    assert result["adaptive"]["escalated_seconds"] == pytest.approx(2.0)
+    assert result["adaptive"]["decoded_seconds"] == pytest.approx(4.0)
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+from fractions import Fraction
+
+import pytest
+
+from catalog import Catalog
+from config import TranscriptionConfig
+from mp4_box import AudioStream
+from mp4_file import MP4File
+from preflight import FileProbe
+from test_mp4_box import _movie
+
+CONFIG = TranscriptionConfig(backend="fake")
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    with Catalog(str(tmp_path / "catalog.sqlite3")) as media_catalog:
+        yield media_catalog
+
+
+def _touch(path, data=None):
+    """Rewrites (or only touches) a file and moves its modification time forward."""
+    stat = os.stat(path)
+    if data is not None:
+        with open(path, "wb") as f:
+            f.write(data)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def _probe(path):
+    return FileProbe(path, 1, 12.5, AudioStream("aac", 48000, 2), "01:00:00;00", None, None, Fraction(30000, 1001))
+
+
+def test_sync_identity_tracks_content(catalog, tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    with open(path, "wb") as f:
+        f.write(b"a" * 1000)
+    assert not catalog._sync_identity(path)  # 新しいファイル
+    assert catalog._sync_identity(path)
+    _touch(path)  # 更新時刻だけが変わった
+    assert catalog._sync_identity(path)
+    catalog.record_probes([_probe(path)])
+    assert catalog.get(path)["duration"] == 12.5
+    # 同じサイズでも中央のバイトが変わっていれば古い情報を消す
+    _touch(path, b"a" * 500 + b"b" + b"a" * 499)
+    assert not catalog._sync_identity(path)
+    row = catalog.get(path)
+    assert (row["size"], row["duration"], row["probed_at"]) == (1000, None, None)
+
+
+def test_known_probes_round_trip(catalog, tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    with open(path, "wb") as f:
+        f.write(b"data")
+    assert catalog.known_probes([path]) == {}
+    catalog.record_probes([_probe(path), FileProbe(str(tmp_path / "missing.mp4"), 2, None, None, None, None, "x")])
+    known = catalog.known_probes([path, str(tmp_path / "missing.mp4")])
+    assert known == {path: FileProbe(path, 0, 12.5, AudioStream("aac", 48000, 2), "01:00:00;00", None, None,
+                                     Fraction(30000, 1001))}
+    _touch(path, b"changed")
+    assert catalog.known_probes([path]) == {}
+
+
+def test_unchanged_files_reuse_the_recorded_transcription(catalog, tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    with open(path, "wb") as f:
+        f.write(_movie())
+    mp4_file = MP4File(path, 1, config=CONFIG)
+    mp4_file.transcription_result = {"language": "ja", "segments": [{"start": 0.0, "end": 2.0, "text": "一番目"}]}
+    mp4_file.transcription_params = mp4_file._transcription_params(None)
+    catalog.record_file(mp4_file, str(tmp_path))
+    known = catalog.known_transcriptions([path])
+    assert known[path]["result"] == mp4_file.transcription_result
+
+    restored = MP4File(path, 1, config=CONFIG, known_transcription=known[path])
+    assert restored.load_cached_transcription()
+    assert restored.transcription_result == mp4_file.transcription_result
+    # パラメータが変わった場合は使わない
+    other = MP4File(path, 1, config=TranscriptionConfig(backend="fake", fake_speed=3.0),
+                    known_transcription=known[path])
+    assert not other.load_cached_transcription()
+
+    _touch(path, _movie(timecode_frames=0))
+    assert catalog.known_transcriptions([path]) == {}
+
+
+def test_version_1_catalog_is_migrated(tmp_path):
+    path = str(tmp_path / "catalog.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+        "fingerprint TEXT NOT NULL, duration REAL, timecode TEXT, creation_time TEXT, audio_codec TEXT, "
+        "sample_rate INTEGER, channels INTEGER, probe_error TEXT, probed_at REAL, timecode_offset TEXT, "
+        "backend TEXT, model TEXT, params TEXT, segment_count INTEGER, processing_seconds REAL, "
+        "processed_at REAL, edl_path TEXT, srt_path TEXT);"
+        "INSERT INTO files (path, size, mtime_ns, fingerprint, duration, probed_at) "
+        "VALUES ('/clip.mp4', 1, 1, 'x', 10.0, 1.0);"
+        "PRAGMA user_version = 1;"
+    )
+    connection.close()
+    with Catalog(path) as catalog:
+        assert catalog.connection.execute("PRAGMA user_version").fetchone()[0] == 3
+        row = catalog.get("/clip.mp4")
+        # フレームレートがないため、次の事前チェックで調べ直す
+        assert (row["duration"], row["frame_rate"], row["probed_at"]) == (10.0, None, None)
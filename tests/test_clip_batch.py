@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from clip_batch import ClipSpan, concatenate_clips, plan_batches, split_segments
+
+SAMPLE_RATE = 16000
+
+
+def test_plan_batches_groups_consecutive_short_files():
+    durations = [10.0, 20.0, 100.0, 5.0, None, 15.0, 15.0, 15.0]
+    assert plan_batches(durations, max_clip_seconds=30.0, max_batch_seconds=40.0) == [
+        [0, 1], [2], [3], [4], [5, 6], [7],
+    ]
+
+
+def test_plan_batches_without_short_files():
+    assert plan_batches([60.0, None], 30.0, 300.0) == [[0], [1]]
+    assert plan_batches([], 30.0, 300.0) == []
+
+
+def test_concatenate_clips_records_offsets():
+    clips = [np.ones(SAMPLE_RATE, dtype=np.float32), np.full(SAMPLE_RATE // 2, 2.0, dtype=np.float32)]
+    buffer, spans = concatenate_clips(clips, 0.5, SAMPLE_RATE)
+    assert spans == [ClipSpan(0.0, 1.0), ClipSpan(1.5, 0.5)]
+    assert buffer.size == 2 * SAMPLE_RATE
+    assert not buffer[SAMPLE_RATE:SAMPLE_RATE * 3 // 2].any()  # 区切りの無音
+    assert (buffer[SAMPLE_RATE * 3 // 2:] == 2.0).all()
+
+
+SPANS = [ClipSpan(0.0, 3.0), ClipSpan(4.0, 2.0)]
+
+
+def test_split_segments_by_word_midpoint():
+    segment = {
+        "start": 2.0, "end": 5.5, "text": "おはようございます",
+        "words": [{"word": "おはよう", "start": 2.0, "end": 3.2}, {"word": "ございます", "start": 4.1, "end": 5.5}],
+    }
+    first, second = split_segments([segment], SPANS)
+    assert [(s["start"], s["end"], s["text"]) for s in first] == [(2.0, 3.0, "おはよう")]
+    assert [(s["start"], s["end"], s["text"]) for s in second] == [
+        (pytest.approx(0.1), pytest.approx(1.5), "ございます"),
+    ]
+
+
+def test_split_segments_without_words_uses_the_segment_midpoint():
+    segments = [{"start": 0.5, "end": 2.0, "text": "a"}, {"start": 3.0, "end": 5.0, "text": "b"}]
+    first, second = split_segments(segments, SPANS, "en")
+    assert [(s["start"], s["end"], s["text"]) for s in first] == [(0.5, 2.0, "a")]
+    # 中央の4.0秒は2つ目のクリップ。開始はクリップの先頭に収める
+    assert [(s["start"], s["end"], s["text"]) for s in second] == [(0.0, 1.0, "b")]
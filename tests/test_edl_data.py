@@ -0,0 +1,62 @@
+import io
+
+from edl_data import EDLData
+from timecode import Timecode
+
+
+def _event(reel, source_in, source_out, record_in, record_out, clip="clip01.mp4"):
+    return {
+        "reel_name": reel,
+        "track_type": "AA/V",
+        "transition": "C",
+        "source_in": Timecode.parse(source_in),
+        "source_out": Timecode.parse(source_out),
+        "record_in": Timecode.parse(record_in),
+        "record_out": Timecode.parse(record_out),
+        "clip_name": clip,
+    }
+
+
+def test_cmx_3600_format():
+    # 従来のEDLの出力と1文字ずつ同じであること
+    edl_data = EDLData(title="MP4 to EDL Project")
+    edl_data.add_event(_event("TAPE01", "01:08:00:11", "01:08:03:12", "00:00:00:00", "00:00:03:01"))
+    edl_data.add_event(_event("TAPE01", "01:08:03:13", "01:08:05:05", "00:00:03:01", "00:00:04:23"))
+    assert str(edl_data) == (
+        "TITLE: MP4 to EDL Project\n"
+        "FCM: NON-DROP FRAME\n"
+        "\n"
+        "001  TAPE01   AA/V C        01:08:00:11 01:08:03:12 00:00:00:00 00:00:03:01\n"
+        "* FROM CLIP NAME: clip01.mp4\n"
+        "* AUDIO LEVEL CH1: 0.0 CH2: 0.0\n"
+        "\n"
+        "002  TAPE01   AA/V C        01:08:03:13 01:08:05:05 00:00:03:01 00:00:04:23\n"
+        "* FROM CLIP NAME: clip01.mp4\n"
+        "* AUDIO LEVEL CH1: 0.0 CH2: 0.0\n"
+    )
+
+
+def test_video_only_event_has_no_audio_comment():
+    event = _event("TAPE02", "00:00:00:00", "00:00:01:00", "00:00:00:00", "00:00:01:00")
+    event["track_type"] = "V"
+    lines = list(EDLData.event_lines(7, event))
+    assert lines == [
+        "",
+        "007  TAPE02   V    C        00:00:00:00 00:00:01:00 00:00:00:00 00:00:01:00",
+        "* FROM CLIP NAME: clip01.mp4",
+    ]
+
+
+def test_streamed_writing_matches_str():
+    first = _event("TAPE01", "00:00:01:00", "00:00:02:00", "00:00:00:00", "00:00:01:00")
+    second = _event("TAPE02", "00:00:05:00", "00:00:06:00", "00:00:01:00", "00:00:02:00", "clip02.mp4")
+    edl_data = EDLData(title="Streamed")
+    edl_data.add_event(first)
+    edl_data.add_event(second)
+
+    stream = io.StringIO()
+    EDLData(title="Streamed").write_header(stream)
+    next_number = edl_data.write_events(stream, events=[first])
+    assert next_number == 2
+    assert edl_data.write_events(stream, next_number, [second]) == 3
+    assert stream.getvalue() == str(edl_data)
@@ -0,0 +1,72 @@
+import numpy as np
+
+from long_file import Chunk, plan_chunks, stitch_chunks
+
+SAMPLE_RATE = 16000
+
+
+def _segment(start, end, words):
+    """Returns a segment whose words (text, start, end) are spread over it."""
+    return {
+        "start": start,
+        "end": end,
+        "text": "".join(text for text, _, _ in words),
+        "words": [{"word": text, "start": s, "end": e} for text, s, e in words],
+    }
+
+
+# 0〜12秒と10〜20秒の2チャンク（継ぎ目は11秒）
+CHUNKS = [
+    Chunk(0.0, 12.0, float("-inf"), 11.0),
+    Chunk(10.0, 20.0, 11.0, float("inf")),
+]
+
+
+def test_plan_chunks_cuts_at_silence():
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 0.3, 100 * SAMPLE_RATE).astype(np.float32)
+    audio[48 * SAMPLE_RATE:49 * SAMPLE_RATE] = 0.0  # 目標の50秒の手前の無音
+    chunks = plan_chunks(audio, 50.0, 2.0, SAMPLE_RATE)
+    assert len(chunks) == 2
+    assert 48.0 <= chunks[0].end <= 49.0
+    assert chunks[1].start == chunks[0].end - 2.0
+    assert chunks[0].keep_until == chunks[1].keep_from == chunks[0].end - 1.0
+    assert chunks[-1].end == 100.0
+
+
+def test_short_recording_is_one_chunk():
+    chunks = plan_chunks(np.zeros(60 * SAMPLE_RATE, dtype=np.float32), 50.0, 2.0, SAMPLE_RATE)
+    assert chunks == [Chunk(0.0, 60.0, float("-inf"), float("inf"))]
+
+
+def test_stitch_shifts_and_keeps_each_segment_once():
+    first = [_segment(1.0, 4.0, [("あ", 1.0, 4.0)]), _segment(10.5, 11.8, [("い", 10.5, 11.8)])]
+    # 2つ目のチャンクの相対時刻: 0.5〜1.8秒は1つ目のチャンクで採用済みのセグメント
+    second = [_segment(0.5, 1.8, [("い", 0.5, 1.8)]), _segment(3.0, 5.0, [("う", 3.0, 5.0)])]
+    stitched = stitch_chunks(CHUNKS, [first, second])
+    assert [(s["start"], s["end"], s["text"]) for s in stitched] == [
+        (1.0, 4.0, "あ"), (10.5, 11.8, "い"), (13.0, 15.0, "う"),
+    ]
+    assert stitched[2]["words"][0]["start"] == 13.0
+
+
+def test_seam_words_are_not_duplicated():
+    first = [_segment(9.0, 11.5, [("今日は", 9.0, 10.0), ("晴れ", 10.0, 11.5)])]
+    second = [_segment(0.0, 3.0, [("今日は", -1.0, 0.0), ("晴れ", 0.0, 1.5), ("です", 1.5, 3.0)])]
+    stitched = stitch_chunks(CHUNKS, [first, second])
+    assert [s["text"] for s in stitched] == ["今日は晴れ", "です"]
+    assert stitched[1]["start"] == 11.5
+
+
+def test_trimmed_segment_text_uses_language_spacing():
+    first = [_segment(9.0, 11.5, [(" good", 9.0, 10.0), (" morning", 10.0, 11.5)])]
+    second = [_segment(0.0, 3.0, [(" morning", 0.0, 1.5), (" every", 1.5, 2.0), (" one", 2.0, 3.0)])]
+    stitched = stitch_chunks(CHUNKS, [first, second], "en")
+    assert stitched[1]["text"] == "every one"
+
+
+def test_segments_without_words_are_dropped_by_overlap():
+    first = [{"start": 9.0, "end": 11.5, "text": "a"}]
+    second = [{"start": 0.5, "end": 1.4, "text": "a"}, {"start": 1.0, "end": 4.0, "text": "b"}]
+    stitched = stitch_chunks(CHUNKS, [first, second])
+    assert [s["text"] for s in stitched] == ["a", "b"]
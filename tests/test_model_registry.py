@@ -0,0 +1,77 @@
+import sys
+from types import SimpleNamespace
+
+from model_registry import ModelRegistry
+
+KEY = ("faster-whisper", "small", "cpu", "int8")
+
+
+def _registry():
+    # idle_timeout=None で作成し、解放スレッドを起動せずに evict_idle を直接呼ぶ
+    registry = ModelRegistry(idle_timeout=None)
+    registry.get(*KEY, loader=object)
+    registry.idle_timeout = 0.0
+    return registry
+
+
+def test_get_reuses_loaded_model():
+    registry = ModelRegistry(idle_timeout=None)
+    model = registry.get(*KEY, loader=object)
+    assert registry.get(*KEY, loader=lambda: None) is model
+    assert registry.loaded_models() == [KEY]
+
+
+def test_models_in_use_are_not_evicted_as_idle():
+    registry = _registry()
+    with registry.in_use(*KEY):
+        with registry.in_use(*KEY):
+            assert registry.evict_idle() == 0
+        assert registry.evict_idle() == 0
+    assert registry.evict_idle() == 1
+    assert registry.loaded_models() == []
+
+
+def test_idle_time_counts_from_the_end_of_use():
+    registry = _registry()
+    registry.idle_timeout = 3600.0
+    registry._last_used[KEY] -= 7200.0  # 長い文字起こしの開始前に取得した
+    with registry.in_use(*KEY):
+        pass
+    assert registry.evict_idle() == 0
+
+
+def test_explicit_evict_ignores_use():
+    registry = _registry()
+    with registry.in_use(*KEY):
+        assert registry.evict() == 1
+    assert registry.loaded_models() == []
+
+
+def test_faster_whisper_model_stays_in_use_while_decoding(monkeypatch):
+    import asr_backend
+    import model_registry
+
+    class FakeModel:
+        def transcribe(self, audio_input, **options):
+            segments = ({"start": float(n), "end": n + 1.0, "text": str(n)} for n in range(3))
+            return segments, SimpleNamespace(language="ja", language_probability=1.0)
+
+    registry = ModelRegistry(idle_timeout=None)
+    monkeypatch.setattr(model_registry, "_registry", registry)
+    monkeypatch.setitem(sys.modules, "faster_whisper", SimpleNamespace(WhisperModel=lambda **_: FakeModel()))
+    params = {"model": "small", "device": "cpu", "compute_type": "int8", "batched": None, "language": "ja",
+              "initial_prompt": "", "condition_on_previous_text": False, "temperature": 0.0, "beam_size": 1,
+              "word_timestamps": False, "vad_filter": False, "vad_parameters": None}
+
+    segments, language = asr_backend.FasterWhisperBackend().segments(None, params)
+    registry.idle_timeout = 0.0
+    assert language == "ja"
+    assert next(segments)["text"] == "0"
+    assert registry.evict_idle() == 0
+    assert [segment["text"] for segment in segments] == ["1", "2"]
+    assert registry.evict_idle() == 1
+
+    # 一度も消費せずに閉じた場合も使用中の登録は解除される
+    segments, _ = asr_backend.FasterWhisperBackend().segments(None, params)
+    segments.close()
+    assert registry.evict_idle() == 1
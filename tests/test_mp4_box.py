@@ -0,0 +1,122 @@
+import json
+import struct
+from fractions import Fraction
+
+from main import write_project_outputs
+from mp4_box import AudioStream, MovieInfo, read_movie_info
+from mp4_file import MP4File
+from timecode import RATE_25, RATE_29_97, RATE_30
+
+# 1904年起点の2023-11-14T22:13:20Z
+CREATION = 2082844800 + 1700000000
+
+
+def _box(box_type, *payloads):
+    payload = b"".join(payloads)
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _trak(track_id, handler, *children):
+    tkhd = _box(b"tkhd", struct.pack(">IIII", 0, 0, 0, track_id), bytes(68))
+    hdlr = _box(b"hdlr", bytes(8), handler, bytes(12))
+    return _box(b"trak", tkhd, *children[:-1], _box(b"mdia", hdlr, *children[-1:]))
+
+
+def _movie(timecode_frames=107892, timecode_flags=1, extra_moov=b"", timecode_rate=(30000, 1001, 30)):
+    """Builds a movie with a video track, its (29.97 fps) timecode track and an AAC track."""
+    ftyp = _box(b"ftyp", b"isom", bytes(4), b"isom")
+    # タイムコードのサンプル（mdatの先頭）
+    mdat = _box(b"mdat", struct.pack(">I", timecode_frames))
+    sample_offset = len(ftyp) + 8
+
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, CREATION, CREATION, 1000, 12345), bytes(80))
+    video = _trak(1, b"vide", _box(b"tref", _box(b"tmcd", struct.pack(">I", 2))), b"")
+    tmcd_entry = (b"tmcd" + bytes(6) + struct.pack(">H", 1)
+                  + struct.pack(">IIIIB3x", 0, timecode_flags, *timecode_rate))
+    tmcd_stsd = _box(b"stsd", struct.pack(">II", 0, 1), struct.pack(">I", 4 + len(tmcd_entry)), tmcd_entry)
+    stco = _box(b"stco", struct.pack(">III", 0, 1, sample_offset))
+    timecode = _trak(2, b"tmcd", _box(b"minf", _box(b"stbl", tmcd_stsd, stco)))
+    audio_entry = (b"mp4a" + bytes(6) + struct.pack(">H", 1)
+                   + struct.pack(">HHIHHHHI", 0, 0, 0, 2, 16, 0, 0, 48000 << 16))
+    audio_stsd = _box(b"stsd", struct.pack(">II", 0, 1), struct.pack(">I", 4 + len(audio_entry)), audio_entry)
+    audio = _trak(3, b"soun", _box(b"minf", _box(b"stbl", audio_stsd)))
+    return ftyp + mdat + _box(b"moov", mvhd, video, timecode, audio, extra_moov)
+
+
+def _write(tmp_path, data, name="clip.mp4"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_reads_metadata_from_boxes(tmp_path):
+    info = read_movie_info(_write(tmp_path, _movie()))
+    assert info == MovieInfo(
+        duration=12.345,
+        creation_time="2023-11-14T22:13:20.000000Z",
+        timecodes=("01:00:00;00",),
+        audio_streams=(AudioStream("aac", 48000, 2),),
+        frame_rate=Fraction(30000, 1001),
+    )
+
+
+def test_non_drop_frame_timecode(tmp_path):
+    info = read_movie_info(_write(tmp_path, _movie(timecode_frames=1800, timecode_flags=0)))
+    assert info.timecodes == ("00:01:00:00",)
+
+
+def test_fragmented_movie_falls_back(tmp_path):
+    assert read_movie_info(_write(tmp_path, _movie(extra_moov=_box(b"mvex")))) is None
+
+
+def test_not_a_movie(tmp_path):
+    assert read_movie_info(_write(tmp_path, b"not a movie at all", "text.mp4")) is None
+    assert read_movie_info(_write(tmp_path, b"", "empty.mp4")) is None
+    assert read_movie_info(str(tmp_path / "missing.mp4")) is None
+
+
+def test_truncated_movie(tmp_path):
+    assert read_movie_info(_write(tmp_path, _movie()[:-20])) is None
+
+
+def _transcribed(path, file_index=1):
+    mp4_file = MP4File(path, file_index)
+    mp4_file.transcription_result = {"language": "ja", "segments": [
+        {"start": 0.0, "end": 2.0, "text": "一番目"},
+        {"start": 2.0, "end": 4.0, "text": "二番目"},
+    ]}
+    list(mp4_file.stream_segments())
+    mp4_file.build_edl_events()
+    return mp4_file
+
+
+def test_mp4_file_uses_the_timecode_rate(tmp_path):
+    mp4_file = _transcribed(_write(tmp_path, _movie()))
+    assert mp4_file.frame_rate is RATE_29_97
+    assert mp4_file.drop_frame
+    assert mp4_file.timecode_offset.to_cmx() == "01:00:00;00"
+    event = mp4_file.edl_source_events[0]
+    assert event["source_in"].to_cmx() == "01:00:00;00"
+    assert event["source_out"].to_cmx() == "01:00:01;28"  # 2秒 = 59フレーム、1フレーム短縮
+
+    restored = MP4File.from_transcript(json.loads(json.dumps(mp4_file.transcript_entry())))
+    assert (restored.frame_rate, restored.drop_frame) == (RATE_29_97, True)
+    assert restored.timecode_offset == mp4_file.timecode_offset
+
+
+def test_record_timeline_follows_the_first_file(tmp_path):
+    drop_frame = _transcribed(_write(tmp_path, _movie()), 1)
+    pal = _transcribed(_write(tmp_path, _movie(1500, 0, timecode_rate=(25, 1, 25)), "pal.mp4"), 2)
+    assert (pal.frame_rate, pal.drop_frame) == (RATE_25, False)
+    assert pal.timecode_offset.to_cmx() == "00:01:00:00"
+    write_project_outputs([drop_frame, pal], str(tmp_path), save_transcript=False)
+    lines = (tmp_path / "output.edl").read_text(encoding="utf-8").splitlines()
+    assert lines[1] == "FCM: DROP FRAME"
+    # 25fpsのファイルはソースのタイムコードをそのままに、長さを29.97fpsに換算して並べる
+    assert lines[-3].split()[4:] == ["00:01:02:00", "00:01:03:24", "00:00:05;26", "00:00:07;25"]
+
+
+def test_old_transcripts_are_30_fps():
+    mp4_file = MP4File.from_transcript({"file": "clip.mp4", "file_index": 1, "timecode_offset": "01:00:00:00"})
+    assert (mp4_file.frame_rate, mp4_file.drop_frame) == (RATE_30, False)
+    assert mp4_file.timecode_offset.frames == 108000
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from pipeline import Stage, StagedPipeline
+
+
+def _pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+
+def test_results_in_input_order():
+    def slow_double(value):
+        time.sleep(0.001 * (value % 3))
+        return value * 2
+
+    pipeline = StagedPipeline([Stage("double", slow_double, 3), Stage("add", lambda value: value + 1)], queue_size=1)
+    assert list(pipeline.run(range(20))) == [value * 2 + 1 for value in range(20)]
+    assert not _pipeline_threads()
+
+
+def test_dropped_and_failed_items_yield_none():
+    def fail_on_three(value):
+        if value == 3:
+            raise RuntimeError("boom")
+        return value
+
+    stages = [Stage("drop", lambda value: None if value == 1 else value), Stage("fail", fail_on_three)]
+    assert list(StagedPipeline(stages).run(range(5))) == [0, None, 2, None, 4]
+
+
+def test_close_stops_threads_when_consumer_stops_early():
+    with StagedPipeline([Stage("identity", lambda value: value, 2)], queue_size=1) as pipeline:
+        for value in pipeline.run(range(1000)):
+            if value == 3:
+                break
+    assert not _pipeline_threads()
@@ -0,0 +1,69 @@
+import json
+from fractions import Fraction
+
+import pytest
+
+from config import TranscriptionConfig
+from mp4_box import AudioStream
+from preflight import FileProbe, estimated_rtf, load_rtf_history, probe_file, record_rtf, rtf_key, run_preflight
+from test_mp4_box import _movie
+
+CONFIG = TranscriptionConfig(backend="fake", fake_speed=2.0)
+
+
+def test_probe_file_reads_the_boxes(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(_movie())
+    probe = probe_file(str(path), 3)
+    assert probe == FileProbe(str(path), 3, 12.345, AudioStream("aac", 48000, 2), "01:00:00;00",
+                              "2023-11-14T22:13:20.000000Z", None, Fraction(30000, 1001))
+    info = probe.movie_info()
+    assert (info.timecodes, info.audio_streams, info.frame_rate) == (("01:00:00;00",), (probe.audio,), probe.frame_rate)
+
+
+def test_probe_file_rejects_unusable_files(tmp_path):
+    empty = tmp_path / "empty.mp4"
+    empty.write_bytes(b"")
+    assert probe_file(str(empty), 1).error == "空のファイルです"
+    # 音声トラックのないムービー（音声トラックのハンドラーを別の種類にする）
+    silent = tmp_path / "silent.mp4"
+    silent.write_bytes(_movie().replace(b"soun", b"text"))
+    probe = probe_file(str(silent), 2)
+    assert probe.error == "音声ストリームがありません"
+    assert probe.duration == 12.345
+
+
+def test_run_preflight_keeps_order_and_uses_known_probes(tmp_path):
+    paths = []
+    for name in ["a.mp4", "b.mp4"]:
+        path = tmp_path / name
+        path.write_bytes(_movie())
+        paths.append(str(path))
+    empty = tmp_path / "c.mp4"
+    empty.write_bytes(b"")
+    paths.append(str(empty))
+    known = {paths[1]: FileProbe(paths[1], 0, 100.0, AudioStream("aac", 48000, 2), None, None, None)}
+    manifest = run_preflight(paths, CONFIG, workers=2, probe_workers=3, known=known)
+    assert [(probe.path, probe.file_index) for probe in manifest.files] == [(p, i) for i, p in enumerate(paths, 1)]
+    assert [probe.path for probe in manifest.rejected] == [paths[2]]
+    assert manifest.total_seconds == pytest.approx(112.345)
+    assert manifest.estimated_seconds == pytest.approx(112.345 * manifest.rtf / 2)
+    assert json.loads(json.dumps(manifest.to_dict()))["files"][0]["frame_rate"] == "30000/1001"
+
+
+def test_rtf_history_blends_measurements(tmp_path):
+    path = str(tmp_path / "history" / "rtf.json")
+    assert load_rtf_history(path) == {}
+    rtf, measured = estimated_rtf(CONFIG)
+    assert (rtf, measured) == (pytest.approx(0.51), False)  # 2倍速 + 処理の目安
+    record_rtf(CONFIG, 0.2, path)
+    record_rtf(CONFIG, 0.4, path)
+    assert load_rtf_history(path) == {rtf_key(CONFIG): pytest.approx(0.3)}
+    assert estimated_rtf(CONFIG, load_rtf_history(path)) == (pytest.approx(0.3), True)
+    record_rtf(CONFIG, 1.0, None)  # パスがなければ記録しない
+
+
+def test_corrupt_rtf_history_is_ignored(tmp_path):
+    path = tmp_path / "rtf.json"
+    path.write_text("[1, 2]", encoding="utf-8")
+    assert load_rtf_history(str(path)) == {}
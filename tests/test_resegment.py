@@ -0,0 +1,51 @@
+from resegment import ResegmentOptions, join_words, resegment
+
+
+def _word(text, start, end):
+    return {"word": text, "start": start, "end": end}
+
+
+WORDS = [
+    _word("今日は", 0.0, 0.5), _word("晴れ", 0.5, 0.8), _word("です。", 0.8, 1.2),
+    _word("明日は", 1.3, 1.6), _word("雨", 1.6, 1.8), _word("でしょう", 1.8, 2.2),
+]
+
+
+def _texts(groups, language="ja"):
+    return [join_words(group, language) for group in groups]
+
+
+def test_no_limits_keeps_one_segment():
+    assert _texts(resegment(WORDS, ResegmentOptions())) == ["今日は晴れです。明日は雨でしょう"]
+
+
+def test_max_chars_cuts_after_punctuation():
+    assert _texts(resegment(WORDS, ResegmentOptions(max_chars=10))) == ["今日は晴れです。", "明日は雨でしょう"]
+
+
+def test_max_duration_cuts_before_the_word_over_the_limit():
+    assert _texts(resegment(WORDS, ResegmentOptions(max_duration=1.0))) == ["今日は晴れ", "です。", "明日は雨でしょう"]
+
+
+def test_min_gap_always_cuts():
+    assert _texts(resegment(WORDS, ResegmentOptions(min_gap=0.1))) == ["今日は晴れです。", "明日は雨でしょう"]
+
+
+def test_no_segment_starts_with_small_kana():
+    words = [_word("あ", 0.0, 0.2), _word("っ", 0.2, 0.3), _word("た", 0.3, 0.4)]
+    assert _texts(resegment(words, ResegmentOptions(max_chars=1))) == ["あっ", "た"]
+
+
+def test_other_languages_are_joined_with_spaces():
+    words = [_word(" Hello,", 0.0, 0.4), _word(" world", 0.4, 0.8), _word(" again", 2.0, 2.4)]
+    assert _texts(resegment(words, ResegmentOptions(min_gap=1.0), "en"), "en") == ["Hello, world", "again"]
+
+
+def test_every_word_is_kept_in_order():
+    groups = resegment(WORDS, ResegmentOptions(max_chars=3, max_duration=0.5))
+    assert [word for group in groups for word in group] == WORDS
+    assert all(groups)
+
+
+def test_empty_input():
+    assert resegment([], ResegmentOptions(max_chars=10)) == []
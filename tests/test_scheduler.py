@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import lpt_order, plan_schedule, simulate_makespan, submit_in_order
+
+
+def test_lpt_order_longest_first_and_stable():
+    assert lpt_order([3.0, 1.0, 2.0, 3.0]) == [0, 3, 2, 1]
+    assert lpt_order([]) == []
+
+
+def test_simulate_makespan():
+    costs = [1.0, 1.0, 1.0, 1.0, 4.0]
+    assert simulate_makespan(costs, range(5), 2) == 6.0
+    assert simulate_makespan(costs, lpt_order(costs), 2) == 4.0
+    # ワーカーがタスクより多い場合は最も長いタスクで決まる
+    assert simulate_makespan(costs, range(5), 8) == 4.0
+    assert simulate_makespan(costs, [], 2) == 0.0
+
+
+def test_plan_schedule():
+    schedule = plan_schedule([1.0, 1.0, 1.0, 1.0, 4.0], 2)
+    assert schedule.order == [4, 0, 1, 2, 3]
+    assert schedule.predicted_makespan == 4.0
+    assert schedule.sorted_makespan == 6.0
+
+
+def test_plan_schedule_scales_the_prediction_by_rtf():
+    schedule = plan_schedule([60.0, 60.0, 240.0], 2, rtf=0.5)
+    assert schedule.order == [2, 0, 1]
+    assert schedule.predicted_makespan == 120.0
+    assert schedule.sorted_makespan == 150.0
+
+
+def test_submit_in_order_returns_original_order():
+    started = []
+
+    def task(value):
+        started.append(value)
+        return value * 10
+
+    finished = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = list(submit_in_order(executor, task, [(0,), (1,), (2,)], [2, 0, 1], finished))
+    assert started == [2, 0, 1]
+    assert results == [0, 10, 20]
+    assert len(finished) == 3 and all(finished)
@@ -0,0 +1,120 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from search import SearchHit, SearchIndex, clip_reel, hits_to_edl
+from timecode import RATE_29_97, Timecode
+
+TEXTS = [
+    "東京タワーで会議をします",
+    "予算の変更について",
+    "hello world",
+    "Hello, World!",
+    "sword fight",
+    "worldwide news",
+]
+
+
+def _clip(path, texts, start=0):
+    """Returns an object with the attributes SearchIndex.index_file reads."""
+    events = [{
+        "segment": SimpleNamespace(transcription=text),
+        "source_in": Timecode(start + number * 100),
+        "source_out": Timecode(start + number * 100 + 50),
+    } for number, text in enumerate(texts)]
+    return SimpleNamespace(filepath=path, file_index=1, edl_source_events=events)
+
+
+@pytest.fixture(params=[True, False], ids=["fts5", "scan"])
+def index(request, tmp_path):
+    with SearchIndex(str(tmp_path / "catalog.sqlite3")) as search_index:
+        search_index.index_file(_clip("/archive/a/clip01.mp4", TEXTS))
+        if not request.param:
+            search_index.fts = False  # インデックスを使わない検索も同じ結果になること
+        yield search_index
+
+
+def _found(index, query):
+    return sorted(hit.text for hit in index.search(query))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("東京", ["東京タワーで会議をします"]),
+    ("京タ", ["東京タワーで会議をします"]),  # 語の途中からでも一致する
+    ("会", ["東京タワーで会議をします"]),  # 1文字の語
+    ("会議 東京", ["東京タワーで会議をします"]),
+    ("予算 会議", []),
+    ("予算変更", []),  # フレーズとして検索する
+])
+def test_cjk_queries(index, query, expected):
+    assert _found(index, query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("world", ["Hello, World!", "hello world", "worldwide news"]),
+    ("wor", ["Hello, World!", "hello world", "worldwide news"]),  # 単語の先頭と一致する
+    ("orld", []),
+    ("HELLO world", ["Hello, World!", "hello world"]),
+    ("hello wor", ["Hello, World!", "hello world"]),
+    ("sword", ["sword fight"]),
+    ("、", []),
+])
+def test_latin_queries(index, query, expected):
+    assert _found(index, query) == expected
+
+
+def test_hits_keep_source_timecodes(index):
+    hit, = index.search("予算")
+    assert (hit.reel, hit.clip) == ("CLIP01", "clip01.mp4")
+    assert (hit.source_in.frames, hit.source_out.frames) == (100, 150)
+
+
+def test_folder_filter_and_reindex(tmp_path):
+    with SearchIndex(str(tmp_path / "catalog.sqlite3")) as index:
+        index.index_file(_clip("/archive/a/clip01.mp4", ["会議"]))
+        index.index_file(_clip("/archive/b/clip01.mp4", ["会議"]))
+        assert len(index.search("会議")) == 2
+        assert [hit.path for hit in index.search("会議", folder="/archive/b")] == [os.path.abspath("/archive/b/clip01.mp4")]
+        # 同じファイルを登録し直すと前のセグメントは置き換えられる
+        index.index_file(_clip("/archive/a/clip01.mp4", ["予算"]))
+        assert index.count() == 2
+        assert len(index.search("会議")) == 1
+
+
+def test_clip_reel():
+    assert clip_reel("clip01.mp4") == "CLIP01"
+    assert clip_reel("a-very-long-name.mov") == "AVERYLON"
+    assert clip_reel("インタビュー.mp4") == "AX"
+
+
+def _hit(path, source_in, source_out, rate=None, drop_frame=False):
+    zero = Timecode(0) if rate is None else Timecode(0, rate, drop_frame)
+    return SearchHit(path, clip_reel(path), os.path.basename(path), zero.with_frames(source_in),
+                     zero.with_frames(source_out), "text", 1.0)
+
+
+def test_hits_to_edl_renumbers_colliding_reels():
+    hits = [_hit("/a/clip01.mp4", 100, 130), _hit("/b/clip01.mp4", 10, 40), _hit("/a/clip01.mp4", 200, 230)]
+    edl_data = hits_to_edl(hits, handles=5)
+    assert [event["reel_name"] for event in edl_data.events] == ["CLIP01", "CLIP01_2", "CLIP01"]
+    assert edl_data.fcm == "NON-DROP FRAME"
+    first = edl_data.events[0]
+    assert (first["source_in"].frames, first["source_out"].frames) == (95, 135)
+    assert [event["record_in"].frames for event in edl_data.events] == [0, 40, 80]
+
+
+def test_hits_to_edl_uses_drop_frame_of_hits():
+    edl_data = hits_to_edl([_hit("/a/clip01.mp4", 0, 30, RATE_29_97, True)])
+    assert edl_data.fcm == "DROP FRAME"
+    assert edl_data.events[0]["record_out"].to_cmx() == "00:00:01;00"
+
+
+def test_hits_to_edl_mixed_rates():
+    hits = [_hit("/a/clip01.mp4", 0, 60, RATE_29_97, True), _hit("/a/clip02.mp4", 0, 60)]
+    with pytest.raises(ValueError):
+        hits_to_edl(hits)
+    edl_data = hits_to_edl(hits, rate=RATE_29_97, drop_frame=False)
+    assert edl_data.fcm == "NON-DROP FRAME"
+    # 30fpsのクリップの長さは29.97fpsに換算される（60フレーム = 59.94 → 60）
+    assert [event["record_out"].frames for event in edl_data.events] == [60, 120]
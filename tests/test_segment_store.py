@@ -0,0 +1,57 @@
+import pytest
+
+from segment_store import SegmentStore
+from timecode import RATE_29_97, Timecode
+
+
+def _store():
+    store = SegmentStore(RATE_29_97, True)
+    store.append(Timecode(60, RATE_29_97, True), Timecode(90, RATE_29_97, True), "二番目")
+    store.append(Timecode(0, RATE_29_97, True), Timecode(30, RATE_29_97, True), "一番目",
+                 [{"word": "一番", "start": 0.0, "end": 0.5, "probability": 0.5}, {"word": "目", "start": 0.5, "end": 1.0}])
+    store.append(Timecode(120, RATE_29_97, True), Timecode(150, RATE_29_97, True), "三番目")
+    return store
+
+
+def test_views_read_the_columns():
+    store = _store()
+    assert len(store) == 3
+    segment = store[1]
+    assert segment.transcription == "一番目"
+    assert segment.start_timecode == Timecode(0, RATE_29_97, True)
+    assert segment.end_timecode.drop_frame
+    assert segment.words == [
+        {"word": "一番", "start": 0.0, "end": 0.5, "probability": 0.5},
+        {"word": "目", "start": 0.5, "end": 1.0, "probability": 0.0},
+    ]
+    assert store[0].words == []
+    assert store[-1].transcription == "三番目"
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_slices_share_the_columns():
+    store = _store()
+    tail = store[1:]
+    assert [segment.transcription for segment in tail] == ["一番目", "三番目"]
+    assert list(tail.start_frames()) == [0, 120]
+    assert list(tail[1:].end_frames()) == [150]
+    with pytest.raises(TypeError):
+        tail.append(Timecode(0, RATE_29_97, True), Timecode(1, RATE_29_97, True), "追加")
+
+
+def test_srt_entries_in_start_order():
+    assert list(_store().srt_entries()) == [
+        (0, 1001, "一番目"),
+        (2002, 3003, "二番目"),
+        (4004, 5005, "三番目"),
+    ]
+
+
+def test_append_segment_copies_words():
+    store = _store()
+    copy = SegmentStore(RATE_29_97, True)
+    for segment in store:
+        copy.append_segment(segment)
+    assert [(s.transcription, s.words) for s in copy] == [(s.transcription, s.words) for s in store]
+    assert copy.nbytes() > 0
@@ -0,0 +1,24 @@
+from srt_data import SRTData
+
+
+def _blocks(path):
+    with open(path, encoding="utf-8") as f:
+        return [block.split("\n") for block in f.read().split("\n\n") if block]
+
+
+def test_write_merged_interleaves_streams_by_start(tmp_path):
+    first = [(0, 1000, "一"), (2000, 3000, "三"), (5000, 6000, "六")]
+    second = [(1000, 2000, "二"), (2000, 2500, "四"), (4000, 4500, "五")]
+    path = str(tmp_path / "output.srt")
+    assert SRTData.write_merged(path, [iter(first), iter(second)]) == 6
+    blocks = _blocks(path)
+    # 開始時間が同じ場合は先に渡したストリームが先
+    assert [block[2] for block in blocks] == ["一", "二", "三", "四", "五", "六"]
+    assert [block[0] for block in blocks] == ["1", "2", "3", "4", "5", "6"]
+    assert blocks[3][1] == "00:00:02,000 --> 00:00:02,500"
+
+
+def test_write_merged_without_segments(tmp_path):
+    path = str(tmp_path / "output.srt")
+    assert SRTData.write_merged(path, [iter([]), iter([])]) == 0
+    assert (tmp_path / "output.srt").read_text(encoding="utf-8") == ""
@@ -0,0 +1,75 @@
+from fractions import Fraction
+
+import pytest
+
+from timecode import RATE_24, RATE_29_97, RATE_30, RATE_59_94, Timecode, format_srt_time, parse_rate
+
+
+@pytest.mark.parametrize("label, rate, frames", [
+    ("00:00:00:00", RATE_30, 0),
+    ("01:02:03:04", RATE_30, (3600 + 2 * 60 + 3) * 30 + 4),
+    ("00:00:01:23", RATE_24, 47),
+    ("00:01:00;02", RATE_29_97, 1800),
+    ("00:10:00;00", RATE_29_97, 17982),
+    ("01:00:00;00", RATE_29_97, 107892),
+    ("00:01:00;04", RATE_59_94, 3600),
+])
+def test_parse_and_format(label, rate, frames):
+    timecode = Timecode.parse(label, rate)
+    assert timecode.frames == frames
+    assert timecode.drop_frame == (";" in label)
+    assert timecode.to_cmx() == label
+
+
+@pytest.mark.parametrize("rate, drop_frame", [
+    (RATE_30, False), (RATE_29_97, False), (RATE_29_97, True), (RATE_59_94, True),
+])
+def test_round_trip(rate, drop_frame):
+    # 10分の区切りをまたぐ範囲（ドロップフレームで番号を飛ばす毎分の先頭を含む）
+    for frames in range(0, 60 * 60 * 11, 7):
+        label = Timecode(frames, rate, drop_frame).to_cmx()
+        assert Timecode.parse(label, rate).frames == frames, label
+
+
+def test_drop_frame_skips_labels():
+    before = Timecode(1799, RATE_29_97, True)
+    assert before.to_cmx() == "00:00:59;29"
+    assert (before + 1).to_cmx() == "00:01:00;02"
+
+
+def test_drop_frame_requires_ntsc_rate():
+    with pytest.raises(ValueError):
+        Timecode(0, RATE_30, True)
+
+
+def test_parse_rejects_malformed_label():
+    with pytest.raises(ValueError):
+        Timecode.parse("01:02:03")
+
+
+def test_seconds_and_srt():
+    assert Timecode.from_seconds(1.999, RATE_30).frames == 59
+    assert Timecode(30, RATE_30).to_srt() == "00:00:01,000"
+    assert Timecode(30, RATE_29_97).to_srt() == "00:00:01,001"
+    assert format_srt_time(3723004) == "01:02:03,004"
+
+
+def test_arithmetic_keeps_rate():
+    timecode = Timecode(100, RATE_29_97, True) + 20
+    assert (timecode.frames, timecode.rate, timecode.drop_frame) == (120, RATE_29_97, True)
+    assert (timecode - Timecode(20, RATE_29_97)).frames == 100
+    with pytest.raises(ValueError):
+        Timecode(0, RATE_30) + Timecode(0, RATE_24)
+
+
+@pytest.mark.parametrize("text, rate", [
+    ("30", RATE_30), ("29.97", RATE_29_97), ("30000/1001", RATE_29_97), ("59.94", RATE_59_94),
+    ("25", Fraction(25)),
+])
+def test_parse_rate(text, rate):
+    assert parse_rate(text) == rate
+
+
+def test_parse_rate_rejects_zero():
+    with pytest.raises(ValueError):
+        parse_rate("0")
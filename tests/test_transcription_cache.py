@@ -0,0 +1,87 @@
+import json
+import os
+
+from transcription_cache import TranscriptionCache, _parse_size, file_identity, make_cache_key
+
+PARAMS = {"backend": "faster-whisper", "model": "small", "beam_size": 5}
+RESULT = {"language": "ja", "segments": [{"start": 0.0, "end": 1.0, "text": "テスト"}]}
+
+
+def _source(tmp_path, name="clip.mp4", data=b"movie data"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_key_depends_on_file_and_parameters(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    path = _source(tmp_path)
+    key = cache.key_for(path, PARAMS)
+    assert cache.key_for(path, dict(reversed(list(PARAMS.items())))) == key  # 順序に依存しない
+    assert cache.key_for(path, {**PARAMS, "beam_size": 1}) != key
+    other = _source(tmp_path, "other.mp4")
+    assert cache.key_for(other, PARAMS) != key  # 別のファイル（inodeが異なる）
+
+
+def test_content_hash_survives_copies(tmp_path):
+    first = _source(tmp_path, "a.mp4")
+    copy = _source(tmp_path, "b.mp4")
+    changed = _source(tmp_path, "c.mp4", b"movie dat!")
+    assert file_identity(first, True) == file_identity(copy, True)
+    assert file_identity(first, True) != file_identity(changed, True)
+    assert make_cache_key(file_identity(first, True), PARAMS) == make_cache_key(file_identity(copy, True), PARAMS)
+
+
+def test_put_and_get(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    assert cache.get("missing") is None
+    cache.put("key", RESULT, {"source": "clip.mp4"})
+    assert cache.get("key") == RESULT
+    assert cache.read_meta("key") == {"source": "clip.mp4"}
+
+
+def test_corrupt_entry_is_removed(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    cache.put("key", RESULT)
+    with open(os.path.join(cache.cache_dir, "key.json"), "w", encoding="utf-8") as f:
+        f.write("{broken")
+    assert cache.get("key") is None
+    assert cache.entries() == []
+
+
+def _entry_sizes(cache):
+    # 作成時刻の桁数によってエントリの大きさは数バイト異なる
+    return {entry["key"]: entry["size"] for entry in cache.entries()}
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    for number, key in enumerate(["old", "used", "new"]):
+        cache.put(key, RESULT)
+        os.utime(os.path.join(cache.cache_dir, f"{key}.json"), (1000 + number, 1000 + number))
+    # 読み出したエントリは最新になる
+    assert cache.get("old") == RESULT
+    sizes = _entry_sizes(cache)
+    assert cache.prune(sizes["old"] + sizes["new"]) == 1
+    assert [entry["key"] for entry in cache.entries()][1:] == ["new"]
+    assert {entry["key"] for entry in cache.entries()} == {"old", "new"}
+    assert cache.clear() == 2
+    assert cache.total_size() == 0
+
+
+def test_put_keeps_the_cache_under_its_limit(tmp_path):
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    cache.put("first", RESULT)
+    cache.max_bytes = _entry_sizes(cache)["first"] + 16  # 2つ目のエントリは入らない
+    os.utime(os.path.join(cache.cache_dir, "first.json"), (1000, 1000))
+    cache.put("second", RESULT)
+    assert [entry["key"] for entry in cache.entries()] == ["second"]
+    with open(os.path.join(cache.cache_dir, "second.json"), encoding="utf-8") as f:
+        assert json.load(f)["result"] == RESULT
+
+
+def test_parse_size():
+    assert _parse_size("500M") == 500 * 1024 ** 2
+    assert _parse_size("2g") == 2 * 1024 ** 3
+    assert _parse_size("1.5KB") == 1536
+    assert _parse_size("1048576") == 1048576
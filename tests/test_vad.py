@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from vad import FRAME_SECONDS, TimeMap, VADOptions, compact_audio, detect_speech, frame_energy_db
+
+SAMPLE_RATE = 16000
+
+
+def _recording(*parts):
+    """Concatenates (seconds, amplitude) parts of a 440 Hz tone over faint noise."""
+    rng = np.random.default_rng(0)
+    audio = []
+    for seconds, amplitude in parts:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        audio.append(amplitude * np.sin(2 * np.pi * 440 * t) + rng.normal(0, 0.001, t.size))
+    return np.concatenate(audio).astype(np.float32)
+
+
+def test_frame_energy_is_chunk_independent():
+    audio = _recording((1.0, 0.0), (1.0, 0.5))
+    whole = frame_energy_db(audio, SAMPLE_RATE)
+    chunks = frame_energy_db(iter(np.array_split(audio, 7)), SAMPLE_RATE)
+    assert whole.size == int(2.0 / FRAME_SECONDS)
+    np.testing.assert_allclose(chunks, whole, atol=1e-3)
+    assert frame_energy_db(np.zeros(0, dtype=np.float32)).size == 0
+
+
+def test_detect_speech_pads_regions():
+    audio = _recording((2.0, 0.0), (1.0, 0.5), (2.0, 0.0))
+    regions = detect_speech(frame_energy_db(audio, SAMPLE_RATE), VADOptions(padding=0.3))
+    assert len(regions) == 1
+    start, end = regions[0]
+    assert start == pytest.approx(1.7, abs=FRAME_SECONDS)
+    assert end == pytest.approx(3.3, abs=FRAME_SECONDS)
+
+
+def test_detect_speech_fills_short_silence_and_drops_short_sounds():
+    audio = _recording((2.0, 0.0), (1.0, 0.5), (0.5, 0.0), (1.0, 0.5), (2.0, 0.0), (0.1, 0.5), (2.0, 0.0))
+    regions = detect_speech(frame_energy_db(audio, SAMPLE_RATE), VADOptions(min_silence=1.0, padding=0.0))
+    assert len(regions) == 1
+    assert regions[0][0] == pytest.approx(2.0, abs=FRAME_SECONDS)
+    assert regions[0][1] == pytest.approx(4.5, abs=FRAME_SECONDS)
+
+
+def test_silence_has_no_speech():
+    assert detect_speech(frame_energy_db(_recording((3.0, 0.0)), SAMPLE_RATE)) == []
+
+
+def test_time_map_returns_source_times():
+    regions = [(1.0, 2.0), (5.0, 6.5)]
+    audio = np.arange(8 * SAMPLE_RATE, dtype=np.float32)
+    compact = compact_audio(audio, regions, SAMPLE_RATE)
+    assert compact.size == int(2.5 * SAMPLE_RATE)
+    time_map = TimeMap(regions, SAMPLE_RATE)
+    assert time_map.to_source(0.5) == pytest.approx(1.5)
+    assert time_map.to_source(1.25) == pytest.approx(5.25)
+    assert time_map.to_source(10.0) == pytest.approx(6.5)  # 最後の区間の終わりで止まる
+    segment = time_map.map_segment({"start": 0.5, "end": 1.5, "words": [{"word": "a", "start": 1.0, "end": 1.5}]})
+    assert (segment["start"], segment["end"]) == pytest.approx((1.5, 5.5))
+    assert (segment["words"][0]["start"], segment["words"][0]["end"]) == pytest.approx((5.0, 5.5))
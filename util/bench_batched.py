@@ -0,0 +1,87 @@
+"""
+faster-whisper の文字起こしモードのベンチマーク（CPU, int8）
+
+通常の逐次デコード（sequential）とバッチ推論パイプライン（batched）で同じ音声を
+文字起こしし、実時間係数（RTF = 処理時間 / 音声の長さ、小さいほど速い）を比較します。
+モデルのロードは計測に含めません（最初に1回だけウォームアップします）。
+
+使い方:
+    python util/bench_batched.py input1.mp4 [input2.mp4 ...] --batch-size 8 16
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt"))
+
+from audio_pipe import SAMPLE_RATE, load_pcm  # noqa: E402
+from config import DEFAULT_BATCH_SIZE, TranscriptionConfig  # noqa: E402
+from asr_backend import (  # noqa: E402
+    batched_inference_available, faster_whisper_available, faster_whisper_segments,
+)
+from mp4_file import MP4File  # noqa: E402
+
+
+def run(audio, params):
+    """Transcribes the samples and returns (elapsed seconds, segments, words)."""
+    start = time.perf_counter()
+    segments, _ = faster_whisper_segments(audio, params)
+    segments = list(segments)  # セグメントはジェネレータを消費したときにデコードされる
+    elapsed = time.perf_counter() - start
+    return elapsed, len(segments), sum(len(segment["words"]) for segment in segments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="faster-whisper sequential vs batched benchmark")
+    parser.add_argument("inputs", nargs="+", help="Audio or video files")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[DEFAULT_BATCH_SIZE],
+                        help="Batch sizes to measure (default: %(default)s)")
+    parser.add_argument("--model", default=None, help="faster-whisper model (default: the one mp4_file.py uses)")
+    parser.add_argument("--seconds", type=float, default=None, help="Only use the first N seconds of each input")
+    args = parser.parse_args()
+
+    if not faster_whisper_available() or not batched_inference_available():
+        sys.exit("faster-whisper 1.1以降が必要です: pip install -U faster-whisper")
+
+    def params_for(path, mode, batch_size=DEFAULT_BATCH_SIZE):
+        config = TranscriptionConfig(mode=mode, batch_size=batch_size)
+        if args.model:
+            config = config._replace(model=args.model)
+        return MP4File(path, 1, audio_source="pipe", config=config, probe=False)._faster_whisper_params()
+
+    audios = []
+    for path in args.inputs:
+        audio = load_pcm(path)
+        if args.seconds:
+            audio = audio[:int(args.seconds * SAMPLE_RATE)]
+        audios.append((path, audio))
+    total_seconds = sum(len(audio) for _, audio in audios) / SAMPLE_RATE
+    print(f"{len(audios)}ファイル, 合計 {total_seconds:.1f}秒の音声")
+
+    # モデルのロードを計測から除く
+    path, audio = audios[0]
+    run(audio[:SAMPLE_RATE * 5], params_for(path, "sequential"))
+
+    cases = [("sequential", None)] + [("batched", size) for size in args.batch_size]
+    results = {}
+    for mode, batch_size in cases:
+        elapsed = n_segments = n_words = 0
+        for path, audio in audios:
+            e, s, w = run(audio, params_for(path, mode, batch_size or DEFAULT_BATCH_SIZE))
+            elapsed += e
+            n_segments += s
+            n_words += w
+        name = mode if batch_size is None else f"{mode} (batch_size={batch_size})"
+        results[name] = elapsed
+        print(f"{name:28s}: {elapsed:8.1f} 秒  RTF {elapsed / total_seconds:.3f}  "
+              f"{n_segments}セグメント / {n_words}単語")
+
+    baseline = results["sequential"]
+    for name, elapsed in results.items():
+        if name != "sequential":
+            print(f"{name}: sequential の {baseline / elapsed:.2f}倍")
+
+
+if __name__ == "__main__":
+    main()
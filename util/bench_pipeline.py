@@ -0,0 +1,66 @@
+"""
+ASR以外の処理のスループットのベンチマーク（フェイクバックエンド使用）
+
+フェイクASRバックエンド（モデルを使わず、音声の長さから合成セグメントを作る）で
+フォルダ全体を変換し、メタデータの取得・音声の抽出・セグメント化・EDL/SRTの書き出しに
+かかる時間を処理方式ごとに計測します。モデルのダウンロードもGPUも不要なので、
+CIのマシンでも数秒で実行できます。キャッシュとカタログ（検索インデックス）は使いません。
+
+使い方:
+    python util/bench_pipeline.py input_folder [--fake-speed 0] [--workers 1 4] [--pipeline]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt"))
+
+from config import TranscriptionConfig  # noqa: E402
+from main import process_folder  # noqa: E402
+
+
+def run(input_folder, config, **kwargs):
+    """Converts the folder with the fake backend and returns the elapsed seconds."""
+    with tempfile.TemporaryDirectory() as output_folder:
+        start = time.perf_counter()
+        # 変換のログは表示しない
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_folder(input_folder, output_folder, use_cache=False, use_catalog=False, config=config,
+                           **kwargs)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark with the fake ASR backend")
+    parser.add_argument("input", help="Folder of MP4 files")
+    parser.add_argument("--fake-speed", type=float, default=0.0,
+                        help="Emit segments at this multiple of real time (default: 0, no delay)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1],
+                        help="Worker process counts to measure (default: %(default)s)")
+    parser.add_argument("--pipeline", action="store_true", help="Also measure the staged pipeline")
+    parser.add_argument("--audio-source", choices=["file", "pipe"], default="file")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (the fastest is shown)")
+    args = parser.parse_args()
+
+    n_files = len(glob.glob(os.path.join(args.input, "*.mp4")))
+    if not n_files:
+        sys.exit(f"MP4ファイルが見つかりません: {args.input}")
+    config = TranscriptionConfig(backend="fake", fake_speed=args.fake_speed)
+    print(f"{n_files}ファイル, フェイクバックエンド (速度: {args.fake_speed or '待機なし'})")
+
+    cases = [(f"workers={workers}", {"workers": workers}) for workers in args.workers]
+    if args.pipeline:
+        cases.append(("pipeline", {"pipeline": True}))
+    for name, kwargs in cases:
+        elapsed = min(run(args.input, config, audio_source=args.audio_source, **kwargs)
+                      for _ in range(args.repeat))
+        print(f"{name:12s}: {elapsed:7.2f} 秒  {n_files / elapsed:7.1f} ファイル/秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+メタデータ取得のベンチマーク（MP4ボックスの直接読み込み vs FFprobe）
+
+フォルダ内の MP4/MOV ファイルの長さ・作成時間・タイムコードを、mp4_box.read_movie_info と
+ファイルごとに FFprobe を起動する従来の方法で取得し、時間を比較します。
+FFprobe では一部のファイル（--ffprobe-files）だけを計測し、結果が一致するかも確認します。
+--synthetic を指定すると、タイムコードトラック付きの小さな MP4 を一時フォルダに作って計測します。
+
+使い方:
+    python util/bench_probe.py input_folder [--ffprobe-files 50]
+    python util/bench_probe.py --synthetic 2000
+"""
+import argparse
+import glob
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt"))
+
+from mp4_box import ffprobe_movie_info, read_movie_info  # noqa: E402
+
+
+def _box(box_type, *payloads):
+    payload = b"".join(payloads)
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def synthetic_mp4(path, index):
+    """Writes a small MP4 with a 30 fps video track, a timecode track and an AAC track (no media data)."""
+    timescale, duration = 30000, (60 + index % 600) * 30000
+    start_frame = 30 * (3600 + index)  # 01:00:00:00 から1秒ずつずらす
+    ftyp = _box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomiso2mp41")
+    mdat_payload = struct.pack(">I", start_frame)
+    mdat_offset = len(ftyp) + 8
+    mdat = _box(b"mdat", mdat_payload)
+
+    mvhd = _box(b"mvhd", struct.pack(">IIIII", 0, 3786825600, 3786825600, timescale, duration), bytes(80))
+    video = _box(
+        b"trak",
+        _box(b"tkhd", struct.pack(">IIIII", 3, 0, 0, 1, 0), bytes(64)),
+        _box(b"tref", _box(b"tmcd", struct.pack(">I", 2))),
+        _box(b"mdia", _box(b"hdlr", struct.pack(">II", 0, 0), b"vide", bytes(13))),
+    )
+    tmcd_entry = _box(b"tmcd", bytes(6), struct.pack(">H", 1),
+                      struct.pack(">IIIIBB", 0, 0, 30000, 1000, 30, 0))
+    timecode = _box(
+        b"trak",
+        _box(b"tkhd", struct.pack(">IIIII", 3, 0, 0, 2, 0), bytes(64)),
+        _box(b"mdia",
+             _box(b"hdlr", struct.pack(">II", 0, 0), b"tmcd", bytes(13)),
+             _box(b"minf", _box(b"stbl",
+                                _box(b"stsd", struct.pack(">II", 0, 1), tmcd_entry),
+                                _box(b"stco", struct.pack(">III", 0, 1, mdat_offset))))),
+    )
+    audio_entry = _box(b"mp4a", bytes(6), struct.pack(">H", 1),
+                       struct.pack(">HHIHHHHI", 0, 0, 0, 2, 16, 0, 0, 48000 << 16))
+    audio = _box(
+        b"trak",
+        _box(b"tkhd", struct.pack(">IIIII", 3, 0, 0, 3, 0), bytes(64)),
+        _box(b"mdia",
+             _box(b"hdlr", struct.pack(">II", 0, 0), b"soun", bytes(13)),
+             _box(b"minf", _box(b"stbl", _box(b"stsd", struct.pack(">II", 0, 1), audio_entry)))),
+    )
+    with open(path, "wb") as f:
+        f.write(ftyp + mdat + _box(b"moov", mvhd, video, timecode, audio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MP4 box reader vs ffprobe metadata benchmark")
+    parser.add_argument("input", nargs="?", help="Folder of MP4/MOV files")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate this many small MP4 files instead")
+    parser.add_argument("--ffprobe-files", type=int, default=50,
+                        help="Number of files to also read with ffprobe (0: skip, default: %(default)s)")
+    args = parser.parse_args()
+    if not args.input and not args.synthetic:
+        parser.error("input folder or --synthetic is required")
+
+    temp_dir = None
+    if args.synthetic:
+        temp_dir = tempfile.mkdtemp()
+        for index in range(args.synthetic):
+            synthetic_mp4(os.path.join(temp_dir, f"clip{index:05d}.mp4"), index)
+        folder = temp_dir
+    else:
+        folder = args.input
+    try:
+        paths = sorted(glob.glob(os.path.join(folder, "*.mp4")) + glob.glob(os.path.join(folder, "*.mov")))
+        if not paths:
+            sys.exit(f"MP4/MOVファイルが見つかりません: {folder}")
+
+        start = time.perf_counter()
+        infos = [read_movie_info(path) for path in paths]
+        elapsed = time.perf_counter() - start
+        parsed = sum(info is not None for info in infos)
+        with_timecode = sum(bool(info and info.timecodes) for info in infos)
+        print(f"ボックス読み込み: {len(paths)}ファイル {elapsed * 1000:.1f} ms "
+              f"({elapsed / len(paths) * 1e6:.0f} µs/ファイル), 解析 {parsed}, タイムコードあり {with_timecode}")
+
+        if args.ffprobe_files and shutil.which("ffprobe"):
+            sample = paths[:args.ffprobe_files]
+            start = time.perf_counter()
+            probed = [ffprobe_movie_info(path) for path in sample]
+            elapsed_ffprobe = time.perf_counter() - start
+            per_file = elapsed_ffprobe / len(sample)
+            print(f"FFprobe: {len(sample)}ファイル {elapsed_ffprobe * 1000:.1f} ms "
+                  f"({per_file * 1e6:.0f} µs/ファイル, {len(paths)}ファイルでは約 {per_file * len(paths):.1f} 秒)")
+            mismatches = [(path, info, expected) for path, info, expected in zip(sample, infos, probed)
+                          if info is not None and info != expected]
+            for path, info, expected in mismatches:
+                print(f"  不一致: {os.path.basename(path)}: {info} != {expected}")
+            print(f"FFprobeとの一致: {len(sample) - len(mismatches)}/{len(sample)}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+字幕検索のベンチマーク（FTS5インデックス vs 全セグメントの走査）
+
+合成した字幕（クリップ数 × クリップあたりのセグメント数）を一時的なデータベースに登録し、
+search.SearchIndex の検索（FTS5, BM25順）と、インデックスを使わずに全セグメントを調べる検索の時間を比較します。
+
+使い方:
+    python util/bench_search.py [--clips 300] [--segments 500] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt"))
+
+from search import SearchIndex  # noqa: E402
+from timecode import Timecode  # noqa: E402
+
+# 2文字の語（約4000語）。よく使う語だけでなく、まれにしか出てこない語も検索する
+KANJI = "会議予算撮影確認資料編集音声照明明日来週変更問題大丈夫今日現場監督俳優台本衣装美術車両天気移動食事休憩開始終了準備"
+WORDS = [a + b for a in KANJI for b in KANJI if a != b]
+
+QUERIES = ["撮影現場", "予算 変更", "照明の準備", "監督"]
+
+
+def synthetic_clip(index, segments, rng):
+    """Returns an object with the attributes SearchIndex.index_file reads."""
+    zero = Timecode(3600 * 30 * (index % 24))
+    events = []
+    for number in range(segments):
+        text = "".join(rng.choice(WORDS) + rng.choice(["を", "の", "は", "が", "、"]) for _ in range(rng.randint(3, 8)))
+        start = number * 90
+        events.append({
+            "segment": SimpleNamespace(transcription=text),
+            "source_in": zero + start,
+            "source_out": zero + start + 80,
+        })
+    return SimpleNamespace(filepath=f"/archive/clip{index:04d}.mp4", file_index=index + 1,
+                           edl_source_events=events)
+
+
+def measure(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subtitle search benchmark (FTS5 vs substring scan)")
+    parser.add_argument("--clips", type=int, default=300, help="Number of clips (default: %(default)s)")
+    parser.add_argument("--segments", type=int, default=500, help="Segments per clip (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query (median is shown)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with SearchIndex(os.path.join(temp_dir, "catalog.sqlite3")) as index:
+            start = time.perf_counter()
+            for clip in range(args.clips):
+                index.index_file(synthetic_clip(clip, args.segments, rng))
+            print(f"登録: {index.count()}セグメント {time.perf_counter() - start:.2f} 秒 "
+                  f"(FTS5: {'あり' if index.fts else 'なし'})")
+
+            fts = index.fts
+            for query in QUERIES:
+                fts_ms, hits = measure(lambda: index.search(query, limit=50), args.repeat)
+                index.fts = False  # インデックスを使わない検索
+                scan_ms, _ = measure(lambda: index.search(query, limit=50), args.repeat)
+                index.fts = fts
+                print(f"{query:16s}: FTS5 {fts_ms:7.2f} ms  走査 {scan_ms:7.2f} ms  ({len(hits)}件)")
+
+
+if __name__ == "__main__":
+    main()
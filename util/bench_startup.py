@@ -0,0 +1,98 @@
+"""
+起動時間のベンチマーク
+
+CLI と GUI のモジュールを新しい Python プロセスでインポートし、`python -X importtime` の
+出力から合計のインポート時間と時間のかかったモジュールを表示します。あわせて
+`main.py --help` の実行時間（プロセスの起動から終了まで）を計測し、ASRエンジン
+（torch / whisper / faster_whisper）や pydub が起動時に読み込まれていないことを確認します。
+
+使い方:
+    python util/bench_startup.py [--repeat 5] [--top 10]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt")
+
+# 起動時に読み込まれてはいけない（最初の文字起こしまで遅延する）重いモジュール
+HEAVY_MODULES = ("torch", "whisper", "faster_whisper", "ctranslate2", "pydub")
+
+# (表示名, インポートするモジュール)
+TARGETS = [
+    ("config", "config"),
+    ("mp4_file", "mp4_file"),
+    ("main (CLI)", "main"),
+    ("gui", "gui"),
+]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module):
+    """Imports the module in a fresh interpreter and returns [(self µs, cumulative µs, depth, name)]."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} をインポートできません:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append((int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2, match.group(4)))
+    return entries
+
+
+def wall_time(args, repeat):
+    """Returns the median wall time (ms) of running a command in SRC_DIR."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=SRC_DIR, capture_output=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark for the CLI and GUI modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is shown)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    failed = False
+    for label, module in TARGETS:
+        try:
+            runs = [import_times(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(e)
+            failed = True
+            continue
+        totals = [next(cumulative for _, cumulative, depth, name in entries if depth == 0 and name == module)
+                  for entries in runs]
+        entries = runs[0]
+        names = {name.split(".")[0] for _, _, _, name in entries}
+        heavy = [name for name in HEAVY_MODULES if name in names]
+        print(f"\n{label}: インポート {statistics.median(totals) / 1000:.1f} ms")
+        print(f"  重いモジュール: {', '.join(heavy) if heavy else 'なし'}")
+        top_level = sorted((e for e in entries if e[2] <= 1 and e[3] != module), key=lambda e: -e[1])
+        for _, cumulative, _, name in top_level[:args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+        failed = failed or bool(heavy)
+
+    help_ms = wall_time(["main.py", "--help"], args.repeat)
+    print(f"\nmain.py --help: {help_ms:.1f} ms（インタプリタの起動を含む）")
+    python_ms = wall_time(["-c", "pass"], args.repeat)
+    print(f"python -c pass: {python_ms:.1f} ms（参考: インタプリタの起動のみ）")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+タイムコード処理のマイクロベンチマーク
+
+文字列（HH:MM:SS:FF）を秒との間で何度も変換していた従来の処理と、
+整数フレームの Timecode 型による処理を、同じセグメント数で比較します。
+
+使い方:
+    python util/bench_timecode.py --segments 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mp4_to_edl_srt"))
+
+from timecode import Timecode  # noqa: E402
+
+
+# 従来の実装（mp4_file.py / srt_data.py の文字列ベースの変換）
+def _seconds_to_timecode(seconds):
+    total_frames = int(seconds * 30)
+    hours = total_frames // (3600 * 30)
+    minutes = (total_frames % (3600 * 30)) // (60 * 30)
+    secs = (total_frames % (60 * 30)) // 30
+    frames = total_frames % 30
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
+
+
+def _timecode_to_seconds(timecode):
+    hh, mm, ss, ff = map(int, timecode.split(":"))
+    return hh * 3600 + mm * 60 + ss + ff / 30.0
+
+
+def _frames_to_timecode(total_frames):
+    hours = total_frames // (3600 * 30)
+    minutes = (total_frames % (3600 * 30)) // (60 * 30)
+    secs = (total_frames % (60 * 30)) // 30
+    frames = total_frames % 30
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}:{frames:02d}"
+
+
+def _timecode_to_srt(timecode):
+    hh, mm, ss, ff = timecode.split(":")
+    ms = int(int(ff) * 1000 / 30)
+    return f"{hh}:{mm}:{ss},{ms:03d}"
+
+
+def run_strings(times, offset):
+    """Segment → offset → 1-frame trim → record placement → EDL/SRT text, using strings."""
+    lines = []
+    current_record = 0.0
+    for start, end in times:
+        start_tc = _seconds_to_timecode(start)
+        end_tc = _seconds_to_timecode(end)
+        source_in = _seconds_to_timecode(_timecode_to_seconds(start_tc) + _timecode_to_seconds(offset))
+        source_out = _seconds_to_timecode(_timecode_to_seconds(end_tc) + _timecode_to_seconds(offset))
+        in_parts = source_in.split(":")
+        out_parts = source_out.split(":")
+        in_frames = int(in_parts[0]) * 108000 + int(in_parts[1]) * 1800 + int(in_parts[2]) * 30 + int(in_parts[3])
+        out_frames = int(out_parts[0]) * 108000 + int(out_parts[1]) * 1800 + int(out_parts[2]) * 30 + int(out_parts[3])
+        out_frames -= 1
+        source_out = _frames_to_timecode(out_frames)
+        if out_frames - in_frames < 5:
+            continue
+        duration = _timecode_to_seconds(source_out) - _timecode_to_seconds(source_in)
+        record_in = _seconds_to_timecode(current_record)
+        record_out = _seconds_to_timecode(current_record + duration)
+        current_record += duration
+        lines.append(f"{source_in} {source_out} {record_in} {record_out}")
+        lines.append(f"{_timecode_to_srt(start_tc)} --> {_timecode_to_srt(end_tc)}")
+    return lines
+
+
+def build_timecode_events(times, offset):
+    """The same steps with integer-frame Timecode values, without formatting."""
+    events = []
+    offset_tc = Timecode.parse(offset)
+    current_record = Timecode(0)
+    for start, end in times:
+        start_tc = Timecode.from_seconds(start)
+        end_tc = Timecode.from_seconds(end)
+        source_in = start_tc + offset_tc
+        source_out = end_tc + offset_tc - 1
+        if source_out.frames - source_in.frames < 5:
+            continue
+        record_in = current_record
+        record_out = current_record + (source_out - source_in)
+        current_record = record_out
+        events.append((start_tc, end_tc, source_in, source_out, record_in, record_out))
+    return events
+
+
+def run_timecode(times, offset):
+    """Builds the events with Timecode values and formats them only at write time."""
+    lines = []
+    for start_tc, end_tc, source_in, source_out, record_in, record_out in build_timecode_events(times, offset):
+        lines.append(f"{source_in} {source_out} {record_in} {record_out}")
+        lines.append(f"{start_tc.to_srt()} --> {end_tc.to_srt()}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timecode microbenchmark")
+    parser.add_argument("--segments", type=int, default=100000, help="Number of segments (default: 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs (default: 3)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    times = []
+    t = 0.0
+    for _ in range(args.segments):
+        start = t + rng.uniform(0.0, 1.0)
+        end = start + rng.uniform(0.3, 8.0)
+        times.append((start, end))
+        t = end
+    offset = "01:00:00:00"
+
+    # SRTの書き出し結果が一致することを確認
+    # （EDLのレコード側は、従来実装の秒⇔文字列変換の切り捨て誤差で1フレームずつずれるため比較しない）
+    assert run_strings(times[:1000], offset)[1::2] == run_timecode(times[:1000], offset)[1::2]
+
+    results = {}
+    cases = [
+        ("文字列（変換+書式化）", run_strings),
+        ("Timecode（変換+書式化）", run_timecode),
+        ("Timecode（変換のみ）", build_timecode_events),
+    ]
+    for name, func in cases:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            func(times, offset)
+            best = min(best, time.perf_counter() - start)
+        results[name] = best
+        print(f"{name}: {best * 1000:8.1f} ms ({args.segments}セグメント)")
+
+    baseline = results["文字列（変換+書式化）"]
+    print(f"高速化（書式化を含む）: {baseline / results['Timecode（変換+書式化）']:.2f}倍")
+
+
+if __name__ == "__main__":
+    main()